@@ -0,0 +1,257 @@
+"""
+JSON API različice 1 za igre, podjetja in platforme.
+Poti berejo prek modela (in s tem iz kataloga, če je vklopljen), igre pa
+filtrirajo z bitnimi slikami faset (glej fasete.py). Seznami se listajo
+s ključem zadnjega zapisa na prejšnji strani (parametra od in od_id), zato
+so vse strani enako hitre; odgovor vsebuje naslov naslednje strani.
+Odgovori imajo ETag iz različice kataloga, posamezno podjetje in platforma
+pa iz svoje različice (glej razlicice.py); stisne jih vmesni sloj stiskanja.
+
+Poti:
+    GET /api/v1/igre/         parametri: razvrsti, od, od_id, koliko, polja,
+                              isci in fasete (platforma, zaloznik, razvijalec,
+                              leto, cena, ocena; vsaka lahko večkrat)
+    GET /api/v1/igre/<id>/
+    GET /api/v1/podjetja/     parametri: od, koliko, polja
+    GET /api/v1/podjetja/<id>/
+    GET /api/v1/platforme/    parametri: od, koliko, polja
+    GET /api/v1/platforme/<id>/
+
+Seznam vrne {"podatki": [...], "naslednja": naslov ali null},
+podrobnosti pa en objekt. Napake vrne kot {"napaka": opis}.
+"""
+import itertools
+import json
+import operator
+from urllib.parse import urlencode
+
+import bottle
+import fasete
+import razlicice
+from model import Igre, Podjetje, Platforma, STRAN, RAZVRSTITVE
+
+PREDPONA = '/api/v1'
+NAJVEC = 500  # največje število zapisov na strani
+MALO = 2000  # toliko izbranih iger še uredimo v pomnilniku
+KOS = 500  # pri večjih izborih beremo seznam vseh iger po toliko iger
+
+POLJA_IGRE = ['id', 'ime_igre', 'datum_izdaje', 'cena', 'vsebuje', 'razvija',
+              'povprecno_igranje', 'mediana', 'ocena']
+POLJA_PODJETJA = ['id', 'ime', 'drzava', 'datum_ustanovitve', 'opis']
+POLJA_PLATFORME = ['id', 'ime', 'tip', 'datum_izdaje', 'opis', 'podjetje']
+
+_JSON = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), check_circular=False)
+
+
+def _napaka(status, opis):
+    """
+    Sproži odgovor z napako v obliki JSON.
+    """
+    raise bottle.HTTPResponse(_JSON.encode({'napaka': opis}), status,
+                              content_type='application/json; charset=UTF-8')
+
+
+def _json(podatki):
+    bottle.response.content_type = 'application/json; charset=UTF-8'
+    return _JSON.encode(podatki)
+
+
+def _stevilo(ime, privzeto, najmanj=0, najvec=None):
+    """
+    Vrne celoštevilski parameter poizvedbe ali sproži napako 400.
+    """
+    vrednost = bottle.request.query.get(ime)
+    if vrednost is None:
+        return privzeto
+    try:
+        vrednost = int(vrednost)
+    except ValueError:
+        _napaka(400, 'Parameter {} mora biti celo število.'.format(ime))
+    if vrednost < najmanj:
+        _napaka(400, 'Parameter {} mora biti vsaj {}.'.format(ime, najmanj))
+    if najvec is not None and vrednost > najvec:
+        _napaka(400, 'Parameter {} mora biti največ {}.'.format(ime, najvec))
+    return vrednost
+
+
+def _polja(dovoljena, dodatna=()):
+    """
+    Vrne seznam izbranih polj iz parametra polja (privzeto vsa dovoljena)
+    in funkcijo, ki iz zapisa naredi slovar teh polj.
+    """
+    polja = bottle.request.query.getunicode('polja')
+    vsa = dovoljena + list(dodatna)
+    polja = vsa if not polja else polja.split(',')
+    neznana = [polje for polje in polja if polje not in vsa]
+    if neznana:
+        _napaka(400, 'Neznana polja: {}.'.format(', '.join(neznana)))
+    atributi = [polje for polje in polja if polje in dovoljena]
+    if len(atributi) == 1:
+        vrednosti = lambda zapis, atribut=atributi[0]: (getattr(zapis, atribut),)
+    elif atributi:
+        vrednosti = operator.attrgetter(*atributi)
+    else:
+        vrednosti = lambda zapis: ()
+    return polja, lambda zapis: dict(zip(atributi, vrednosti(zapis)))
+
+
+def _naslednja(od):
+    """
+    Vrne naslov naslednje strani z istimi parametri in danim začetkom
+    ali None, če naslednje strani ni.
+    """
+    if od is None:
+        return None
+    parametri = [(kljuc, vrednost) for kljuc in bottle.request.query
+                 for vrednost in bottle.request.query.getall(kljuc) if kljuc not in ('od', 'od_id')]
+    parametri += od
+    return bottle.request.path + '?' + urlencode(parametri)
+
+
+def _stran(zapisi, koliko, kljuc):
+    """
+    Iz največ koliko + 1 zapisov vrne zapise na strani
+    in parametre začetka naslednje strani (None, če je ni).
+    """
+    zapisi = list(zapisi)
+    if len(zapisi) > koliko:
+        return zapisi[:koliko], kljuc(zapisi[koliko - 1])
+    return zapisi, None
+
+
+def _izbira():
+    """
+    Vrne bitno sliko iger, ki ustrezajo fasetam in iskalnemu nizu
+    iz parametrov poizvedbe, ali None, če igre niso omejene.
+    """
+    izbira = {}
+    for faseta, (_, tip) in fasete.FASETE.items():
+        vrednosti = bottle.request.query.getall(faseta)
+        if vrednosti:
+            try:
+                izbira[faseta] = [tip(vrednost) for vrednost in vrednosti]
+            except ValueError:
+                _napaka(400, 'Neveljavna vrednost fasete {}.'.format(faseta))
+    izbrane = fasete.fasete().izberi(izbira) if izbira else None
+    niz = bottle.request.query.getunicode('isci')
+    if niz:
+        najdene = fasete.Bitmapa(igra.id for igra in Igre.poisci(niz))
+        izbrane = najdene if izbrane is None else izbrane & najdene
+    return izbrane
+
+
+def _izbrane_igre(izbrane, razvrsti, od, koliko):
+    """
+    Vrne največ koliko izbranih iger za ključem od v dani razvrstitvi.
+    Po id-ju gremo kar po bitni sliki; manjše izbore uredimo v pomnilniku,
+    pri večjih pa beremo seznam vseh iger v razvrstitvi in obdržimo izbrane.
+    """
+    if razvrsti == 'id':
+        ids = (id for id in izbrane if od is None or id > od[1])
+        return Igre.igre_po_id(list(itertools.islice(ids, koliko)))
+    if len(izbrane) <= MALO:
+        padajoce = RAZVRSTITVE[razvrsti][2] == 'DESC'
+        igre = sorted(Igre.igre_po_id(list(izbrane)), key=lambda igra: igra.kljuc(razvrsti), reverse=padajoce)
+        if od is not None:
+            od = tuple(od)
+            igre = [igra for igra in igre if (igra.kljuc(razvrsti) < od if padajoce else igra.kljuc(razvrsti) > od)]
+        return igre[:koliko]
+    igre = []
+    while len(igre) < koliko:
+        kos = list(Igre.seznam(razvrsti, od, KOS))
+        igre += [igra for igra in kos if igra.id in izbrane]
+        if len(kos) < KOS:
+            break
+        od = kos[-1].kljuc(razvrsti)
+    return igre[:koliko]
+
+
+@bottle.get(PREDPONA + '/igre/')
+@razlicice.pogojno()
+def igre():
+    razvrsti = bottle.request.query.get('razvrsti', 'id')
+    if razvrsti not in RAZVRSTITVE:
+        _napaka(400, 'Razvrstitev mora biti ena od: {}.'.format(', '.join(RAZVRSTITVE)))
+    koliko = _stevilo('koliko', STRAN, 1, NAJVEC)
+    od = None
+    if 'od_id' in bottle.request.query:
+        try:
+            od = (RAZVRSTITVE[razvrsti][3](bottle.request.query.getunicode('od', '0')), int(bottle.request.query.od_id))
+        except ValueError:
+            _napaka(400, 'Neveljaven začetek strani.')
+        if razvrsti == 'id':
+            od = (od[1], od[1])
+    _, zapis = _polja(POLJA_IGRE)
+    izbrane = _izbira()
+    if izbrane is None:
+        seznam = Igre.seznam(razvrsti, od, koliko + 1)
+    else:
+        seznam = _izbrane_igre(izbrane, razvrsti, od, koliko + 1)
+    seznam, naslednja = _stran(seznam, koliko, lambda igra: igra.kljuc(razvrsti))
+    if naslednja is not None:
+        naslednja = [('od', naslednja[0]), ('od_id', naslednja[1])]
+    return _json({'podatki': [zapis(igra) for igra in seznam], 'naslednja': _naslednja(naslednja)})
+
+
+@bottle.get(PREDPONA + '/igre/<id:int>/')
+@razlicice.pogojno()
+def igra(id):
+    polja, zapis = _polja(POLJA_IGRE, ['platforme', 'zalozniki'])
+    for igra in Igre.igre_po_id([id]):
+        podatki = zapis(igra)
+        if 'platforme' in polja or 'zalozniki' in polja:
+            platforme, zalozniki = Igre.povezave(id)
+            if 'platforme' in polja:
+                podatki['platforme'] = platforme
+            if 'zalozniki' in polja:
+                podatki['zalozniki'] = zalozniki
+        return _json(podatki)
+    _napaka(404, 'Igre ni.')
+
+
+@bottle.get(PREDPONA + '/podjetja/')
+@razlicice.pogojno()
+def podjetja():
+    koliko = _stevilo('koliko', STRAN, 1, NAJVEC)
+    _, zapis = _polja(POLJA_PODJETJA)
+    seznam, naslednja = _stran(Podjetje.seznam(_stevilo('od', -1, -1), koliko + 1), koliko,
+                               lambda podjetje: [('od', podjetje.id)])
+    return _json({'podatki': [zapis(podjetje) for podjetje in seznam], 'naslednja': _naslednja(naslednja)})
+
+
+@bottle.get(PREDPONA + '/podjetja/<id:int>/')
+@razlicice.pogojno(lambda id: razlicice.razlicice().podjetje(id))
+def podjetje(id):
+    polja, zapis = _polja(POLJA_PODJETJA, ['stevilo_razvitih', 'stevilo_izdanih'])
+    for podjetje in Podjetje.po_id(id):
+        podatki = zapis(podjetje)
+        if 'stevilo_razvitih' in polja or 'stevilo_izdanih' in polja:
+            razvite, izdane = Podjetje.stevilo_iger(id)
+            if 'stevilo_razvitih' in polja:
+                podatki['stevilo_razvitih'] = razvite
+            if 'stevilo_izdanih' in polja:
+                podatki['stevilo_izdanih'] = izdane
+        return _json(podatki)
+    _napaka(404, 'Podjetja ni.')
+
+
+@bottle.get(PREDPONA + '/platforme/')
+@razlicice.pogojno()
+def platforme():
+    koliko = _stevilo('koliko', STRAN, 1, NAJVEC)
+    _, zapis = _polja(POLJA_PLATFORME)
+    seznam, naslednja = _stran(Platforma.seznam(_stevilo('od', -1, -1), koliko + 1), koliko,
+                               lambda platforma: [('od', platforma.id)])
+    return _json({'podatki': [zapis(platforma) for platforma in seznam], 'naslednja': _naslednja(naslednja)})
+
+
+@bottle.get(PREDPONA + '/platforme/<id:int>/')
+@razlicice.pogojno(lambda id: razlicice.razlicice().platforma(id))
+def platforma(id):
+    polja, zapis = _polja(POLJA_PLATFORME, ['stevilo_iger'])
+    for platforma in Platforma.po_id(id):
+        podatki = zapis(platforma)
+        if 'stevilo_iger' in polja:
+            podatki['stevilo_iger'] = Platforma.stevilo_iger(id)
+        return _json(podatki)
+    _napaka(404, 'Platforme ni.')
@@ -0,0 +1,404 @@
+"""
+Asinhroni vmesnik do modela za uporabo iz strežnikov na osnovi asyncio.
+Poizvedbe tečejo v omejenem bazenu niti; vsaka nit uporablja svojo
+povezavo iz bazena povezav, zato poizvedbe ne skačejo med povezavami.
+
+Primer:
+    igre, stevila = await asyncio.gather(
+        Igre.najnovejse_igre(), stevilo_vseh())
+"""
+import asyncio
+import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import model
+
+NITI = 4
+
+
+class Izvajalec:
+    """
+    Omejen bazen niti, v katerem tečejo poizvedbe na bazo.
+    """
+
+    def __init__(self, niti=NITI):
+        """
+        Konstruktor izvajalca.
+        Argumenti:
+        - niti: največje število hkratnih poizvedb
+        """
+        self._niti = ThreadPoolExecutor(max_workers=niti, thread_name_prefix='baza')
+        self._kljucavnica = threading.Lock()
+
+    def _izvedi(self, tekoca, funkcija, args):
+        """
+        Izvede funkcijo v niti izvajalca. Če ta vrne generator,
+        ga izprazni v seznam, dokler je povezava še v isti niti.
+        """
+        with self._kljucavnica:
+            if tekoca.get('preklicano'):
+                return None
+            tekoca['povezava'] = model.bazen.bralec()
+        try:
+            rezultat = funkcija(*args)
+            if inspect.isgenerator(rezultat):
+                rezultat = list(rezultat)
+            return rezultat
+        finally:
+            with self._kljucavnica:
+                tekoca['povezava'] = None
+
+    def _prekini(self, tekoca):
+        """
+        Prekine poizvedbo, ki se trenutno izvaja za dano opravilo.
+        """
+        with self._kljucavnica:
+            tekoca['preklicano'] = True
+            if tekoca.get('povezava') is not None:
+                tekoca['povezava'].interrupt()
+
+    async def beri(self, funkcija, *args):
+        """
+        Izvede bralno funkcijo modela in vrne njen rezultat.
+        Ob preklicu opravila prekine tudi poizvedbo v bazi.
+        """
+        tekoca = {}
+        zanka = asyncio.get_running_loop()
+        try:
+            return await zanka.run_in_executor(self._niti, self._izvedi, tekoca, funkcija, args)
+        except asyncio.CancelledError:
+            self._prekini(tekoca)
+            raise
+
+    async def pisi(self, funkcija, *args):
+        """
+        Izvede pisalno funkcijo modela. Pisanja ni mogoče prekiniti;
+        ob preklicu se transakcija vseeno izvede do konca.
+        """
+        zanka = asyncio.get_running_loop()
+        return await asyncio.shield(zanka.run_in_executor(self._niti, funkcija, *args))
+
+    def zapri(self):
+        """
+        Počaka na konec tekočih poizvedb in ustavi niti.
+        """
+        self._niti.shutdown()
+
+
+izvajalec = Izvajalec()
+
+
+class Uporabnik:
+    """
+    Asinhroni vmesnik za uporabnike.
+    """
+
+    @staticmethod
+    async def prijava(ime, geslo):
+        """
+        Preveri uporabniško ime in geslo ter vrne uporabnika.
+        """
+        return await izvajalec.beri(model.Uporabnik.prijava, ime, geslo)
+
+    @staticmethod
+    async def dodaj_v_bazo(uporabnik, geslo):
+        """
+        V bazo doda uporabnika s podanim geslom.
+        """
+        await izvajalec.pisi(uporabnik.dodaj_v_bazo, geslo)
+
+
+class Igre:
+    """
+    Asinhroni vmesnik za igre.
+    Metode vračajo sezname namesto generatorjev.
+    """
+
+    @staticmethod
+    async def najnovejse_igre():
+        """
+        Glej model.Igre.najnovejse_igre.
+        """
+        return await izvajalec.beri(model.Igre.najnovejse_igre)
+
+    @staticmethod
+    async def podatki_o_igri(igra):
+        """
+        Glej model.Igre.podatki_o_igri.
+        """
+        return await izvajalec.beri(model.Igre.podatki_o_igri, igra)
+
+    @staticmethod
+    async def podobne_igre(igra):
+        """
+        Glej model.Igre.podobne_igre.
+        """
+        return await izvajalec.beri(model.Igre.podobne_igre, igra)
+
+    @staticmethod
+    async def poisci(niz):
+        """
+        Glej model.Igre.poisci.
+        """
+        return await izvajalec.beri(model.Igre.poisci, niz)
+
+    @staticmethod
+    async def glej_vse_igre():
+        """
+        Glej model.Igre.glej_vse_igre.
+        """
+        return await izvajalec.beri(model.Igre.glej_vse_igre)
+
+    @staticmethod
+    async def glej_vse_igre_imena():
+        """
+        Glej model.Igre.glej_vse_igre_imena.
+        """
+        return await izvajalec.beri(model.Igre.glej_vse_igre_imena)
+
+    @staticmethod
+    async def glej_vse_igre_datum():
+        """
+        Glej model.Igre.glej_vse_igre_datum.
+        """
+        return await izvajalec.beri(model.Igre.glej_vse_igre_datum)
+
+    @staticmethod
+    async def glej_vse_igre_cena():
+        """
+        Glej model.Igre.glej_vse_igre_cena.
+        """
+        return await izvajalec.beri(model.Igre.glej_vse_igre_cena)
+
+    @staticmethod
+    async def glej_vse_igre_ocena():
+        """
+        Glej model.Igre.glej_vse_igre_ocena.
+        """
+        return await izvajalec.beri(model.Igre.glej_vse_igre_ocena)
+
+    @staticmethod
+    async def imena_iger():
+        """
+        Glej model.Igre.imena_iger.
+        """
+        return await izvajalec.beri(model.Igre.imena_iger)
+
+    @staticmethod
+    async def stevilo_iger():
+        """
+        Glej model.Igre.stevilo_iger.
+        """
+        return await izvajalec.beri(model.Igre.stevilo_iger)
+
+    @staticmethod
+    async def igre_po_id(ids):
+        """
+        Glej model.Igre.igre_po_id.
+        """
+        return await izvajalec.beri(model.Igre.igre_po_id, ids)
+
+    @staticmethod
+    async def seznam(razvrsti='id', od=None, koliko=model.STRAN):
+        """
+        Glej model.Igre.seznam.
+        """
+        return await izvajalec.beri(model.Igre.seznam, razvrsti, od, koliko)
+
+    @staticmethod
+    async def povezave(id):
+        """
+        Glej model.Igre.povezave.
+        """
+        return await izvajalec.beri(model.Igre.povezave, id)
+
+    @staticmethod
+    async def dodaj_v_bazo(igra):
+        """
+        Glej model.Igre.dodaj_v_bazo.
+        """
+        await izvajalec.pisi(igra.dodaj_v_bazo)
+
+    @staticmethod
+    async def dodajplatformo(igra):
+        """
+        Glej model.Igre.dodajplatformo.
+        """
+        await izvajalec.pisi(igra.dodajplatformo)
+
+    @staticmethod
+    async def dodajdistributerja(igra):
+        """
+        Glej model.Igre.dodajdistributerja.
+        """
+        await izvajalec.pisi(igra.dodajdistributerja)
+
+    @staticmethod
+    async def spremeni_podatke(igra):
+        """
+        Glej model.Igre.spremeni_podatke.
+        """
+        await izvajalec.pisi(igra.spremeni_podatke)
+
+    @staticmethod
+    async def dodaj_vec_v_bazo(igre, velikost_paketa=None):
+        """
+        Glej model.Igre.dodaj_vec_v_bazo.
+        """
+        return await izvajalec.pisi(model.Igre.dodaj_vec_v_bazo, list(igre), velikost_paketa)
+
+
+class Podjetje:
+    """
+    Asinhroni vmesnik za podjetja.
+    """
+
+    @staticmethod
+    async def podatki_o_podjetju(podjetje):
+        """
+        Glej model.Podjetje.podatki_o_podjetju.
+        """
+        return await izvajalec.beri(model.Podjetje.podatki_o_podjetju, podjetje)
+
+    @staticmethod
+    async def razvite_igre(podjetje, od=0, koliko=model.STRAN):
+        """
+        Glej model.Podjetje.razvite_igre.
+        """
+        return await izvajalec.beri(model.Podjetje.razvite_igre, podjetje, od, koliko)
+
+    @staticmethod
+    async def izdane_igre(podjetje, od=0, koliko=model.STRAN):
+        """
+        Glej model.Podjetje.izdane_igre.
+        """
+        return await izvajalec.beri(model.Podjetje.izdane_igre, podjetje, od, koliko)
+
+    @staticmethod
+    async def stevilo_iger(podjetje):
+        """
+        Glej model.Podjetje.stevilo_iger.
+        """
+        return await izvajalec.beri(model.Podjetje.stevilo_iger, podjetje)
+
+    @staticmethod
+    async def imena_podjetij():
+        """
+        Glej model.Podjetje.imena_podjetij.
+        """
+        return await izvajalec.beri(model.Podjetje.imena_podjetij)
+
+    @staticmethod
+    async def stevilo_podjetij():
+        """
+        Glej model.Podjetje.stevilo_podjetij.
+        """
+        return await izvajalec.beri(model.Podjetje.stevilo_podjetij)
+
+    @staticmethod
+    async def po_id(id):
+        """
+        Glej model.Podjetje.po_id.
+        """
+        return await izvajalec.beri(model.Podjetje.po_id, id)
+
+    @staticmethod
+    async def seznam(od=-1, koliko=model.STRAN):
+        """
+        Glej model.Podjetje.seznam.
+        """
+        return await izvajalec.beri(model.Podjetje.seznam, od, koliko)
+
+    @staticmethod
+    async def imena_po_id(ids):
+        """
+        Glej model.Podjetje.imena_po_id.
+        """
+        return await izvajalec.beri(model.Podjetje.imena_po_id, ids)
+
+    @staticmethod
+    async def dodaj_v_bazo(podjetje):
+        """
+        Glej model.Podjetje.dodaj_v_bazo.
+        """
+        await izvajalec.pisi(podjetje.dodaj_v_bazo)
+
+
+class Platforma:
+    """
+    Asinhroni vmesnik za platforme.
+    """
+
+    @staticmethod
+    async def podatki_o_platformi(platforma):
+        """
+        Glej model.Platforma.podatki_o_platformi.
+        """
+        return await izvajalec.beri(model.Platforma.podatki_o_platformi, platforma)
+
+    @staticmethod
+    async def igre(platforma, razvrsti='id', od=None, koliko=model.STRAN):
+        """
+        Glej model.Platforma.igre.
+        """
+        return await izvajalec.beri(model.Platforma.igre, platforma, razvrsti, od, koliko)
+
+    @staticmethod
+    async def stevilo_iger(platforma):
+        """
+        Glej model.Platforma.stevilo_iger.
+        """
+        return await izvajalec.beri(model.Platforma.stevilo_iger, platforma)
+
+    @staticmethod
+    async def imena_platform():
+        """
+        Glej model.Platforma.imena_platform.
+        """
+        return await izvajalec.beri(model.Platforma.imena_platform)
+
+    @staticmethod
+    async def stevilo_platform():
+        """
+        Glej model.Platforma.stevilo_platform.
+        """
+        return await izvajalec.beri(model.Platforma.stevilo_platform)
+
+    @staticmethod
+    async def po_id(id):
+        """
+        Glej model.Platforma.po_id.
+        """
+        return await izvajalec.beri(model.Platforma.po_id, id)
+
+    @staticmethod
+    async def seznam(od=-1, koliko=model.STRAN):
+        """
+        Glej model.Platforma.seznam.
+        """
+        return await izvajalec.beri(model.Platforma.seznam, od, koliko)
+
+    @staticmethod
+    async def imena_po_id(ids):
+        """
+        Glej model.Platforma.imena_po_id.
+        """
+        return await izvajalec.beri(model.Platforma.imena_po_id, ids)
+
+
+async def stevilo_vseh():
+    """
+    Hkrati prešteje igre, podjetja in platforme.
+    """
+    return await asyncio.gather(
+        Igre.stevilo_iger(), Podjetje.stevilo_podjetij(), Platforma.stevilo_platform())
+
+
+async def glavna_stran():
+    """
+    Hkrati prebere vse podatke za glavno stran:
+    najnovejše igre ter število iger, podjetij in platform.
+    """
+    najnovejse, stevila = await asyncio.gather(Igre.najnovejse_igre(), stevilo_vseh())
+    return najnovejse, stevila
@@ -1,4 +1,5 @@
 import csv
+import re
 from geslo import sifriraj_geslo
 
 PARAM_FMT = ":{}" # za SQLite
@@ -9,9 +10,11 @@ class Tabela:
     Polja razreda:
     - ime: ime tabele
     - podatki: ime datoteke s podatki ali None
+    - indeksi: seznam parov (ime indeksa, stolpci)
     """
     ime = None
     podatki = None
+    indeksi = []
 
     def __init__(self, conn):
         """
@@ -47,6 +50,27 @@ class Tabela:
                 vrstica = {k: None if v == "" else v for k, v in zip(stolpci, vrstica)}
                 self.dodaj_vrstico(**vrstica)
 
+    def posodobi(self):
+        """
+        Metoda za popravek podatkov v obstoječi tabeli ob nadgradnji baze.
+        Privzeto ne naredi ničesar.
+        """
+        pass
+
+    def ustvari_indekse(self):
+        """
+        Metoda za ustvarjanje indeksov, ki še ne obstajajo.
+        """
+        for indeks, stolpci in self.indeksi:
+            self.conn.execute("CREATE INDEX IF NOT EXISTS {} ON {} ({});".format(indeks, self.ime, stolpci))
+
+    def obstaja(self):
+        """
+        Metoda, ki preveri, ali tabela že obstaja v bazi.
+        """
+        cur = self.conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", [self.ime])
+        return cur.fetchone() is not None
+
     def izprazni(self):
         """
         Metoda za praznjenje tabele.
@@ -142,6 +166,16 @@ class Igra(Tabela):
 
     ime = "igra"
     podatki = "podatki/igre.csv"
+    # igre razvijalca, urejene po id-ju, razvrstitve seznamov iger
+    # in igre leta za prožilce statistike po letih (glej StatistikaLet)
+    indeksi = [
+        ("igra_razvija", "razvija"),
+        ("igra_ime_igre", "ime_igre"),
+        ("igra_datum_izdaje", "datum_izdaje"),
+        ("igra_leto", "substr(datum_izdaje, 1, 4)"),
+        ("igra_ocena", "ifnull(ocena, -1)"),
+        ("igra_cena", "ifnull(cena, -1)"),
+    ]
 
     def ustvari(self):
         """
@@ -177,6 +211,20 @@ class Igra(Tabela):
             podatki["razvija"] = razvijalec[0]
 
         return super().dodaj_vrstico(**podatki)
+
+    def posodobi(self):
+        """
+        Prazne nize v številskih stolpcih (neizpolnjena polja obrazcev)
+        zamenja z NULL, da se igre pravilno uredijo.
+        """
+        self.conn.execute("""
+            UPDATE igra SET
+                cena = nullif(cena, ''),
+                povprecno_igranje = nullif(povprecno_igranje, ''),
+                mediana = nullif(mediana, ''),
+                ocena = nullif(ocena, '')
+            WHERE '' IN (cena, povprecno_igranje, mediana, ocena)
+        """)
     
 
 class Platforma(Tabela):
@@ -208,6 +256,8 @@ class Distributira(Tabela):
     """
     ime = "distributira"
     podatki = "podatki/publisherji.csv"
+    # igre založnika brez branja tabele distributira
+    indeksi = [("distributira_podjetje", "podjetje, ime_igre")]
 
     def ustvari(self):
         """
@@ -245,6 +295,8 @@ class Podpira(Tabela):
     """
     ime = "podpira"
     podatki = "podatki/podpira.csv"
+    # igre platforme brez branja tabele podpira
+    indeksi = [("podpira_platforma", "platforma, ime_igre")]
 
     def ustvari(self):
         """
@@ -276,12 +328,393 @@ class Podpira(Tabela):
             podatki["platforma"] = platforma[0]
         return super().dodaj_vrstico(**podatki)
 
+def _ocena(izraz):
+    """
+    Vrne izraz SQL, ki je enak danemu, če je ta število, sicer pa NULL.
+    Tako prazen niz (neizpolnjeno polje obrazca) ne šteje kot ocena.
+    """
+    return "(CASE WHEN typeof({0}) IN ('integer', 'real') THEN {0} END)".format(izraz)
+
+
+def _dodaj_oceno(tabela, kljuc, vrednost, ocena):
+    """
+    Vrne stavke, ki igro z dano oceno prištejejo skupini v tabeli statistike.
+    """
+    ocena = _ocena(ocena)
+    return """
+        INSERT OR IGNORE INTO {tabela} ({kljuc}) SELECT {vrednost} WHERE {vrednost} IS NOT NULL;
+        UPDATE {tabela} SET
+            stevilo_iger = stevilo_iger + 1,
+            stevilo_ocen = stevilo_ocen + ({ocena} IS NOT NULL),
+            vsota_ocen = vsota_ocen + coalesce({ocena}, 0),
+            najnizja_ocena = min(coalesce(najnizja_ocena, {ocena}), coalesce({ocena}, najnizja_ocena)),
+            najvisja_ocena = max(coalesce(najvisja_ocena, {ocena}), coalesce({ocena}, najvisja_ocena))
+        WHERE {kljuc} = {vrednost};
+    """.format(tabela=tabela, kljuc=kljuc, vrednost=vrednost, ocena=ocena)
+
+
+def _odstej_oceno(tabela, kljuc, vrednost, ocena, najnizja, najvisja):
+    """
+    Vrne stavke, ki igro z dano oceno odštejejo od skupine v tabeli statistike.
+    Najnižjo in najvišjo oceno skupine izračuna na novo le,
+    če je bila odšteta ocena ravno ena od njiju.
+    """
+    ocena = _ocena(ocena)
+    return """
+        UPDATE {tabela} SET
+            stevilo_iger = stevilo_iger - 1,
+            stevilo_ocen = stevilo_ocen - ({ocena} IS NOT NULL),
+            vsota_ocen = vsota_ocen - coalesce({ocena}, 0)
+        WHERE {kljuc} = {vrednost};
+        UPDATE {tabela} SET
+            najnizja_ocena = ({najnizja}),
+            najvisja_ocena = ({najvisja})
+        WHERE {kljuc} = {vrednost} AND {ocena} IN (najnizja_ocena, najvisja_ocena);
+        DELETE FROM {tabela} WHERE {kljuc} = {vrednost} AND stevilo_iger = 0;
+    """.format(tabela=tabela, kljuc=kljuc, vrednost=vrednost, ocena=ocena,
+               najnizja=najnizja, najvisja=najvisja)
+
+
+class Statistika(Tabela):
+    """
+    Tabela s povzetki iger po skupinah (število iger, število in vsota ocen,
+    najnižja in najvišja ocena). Tabelo sproti posodabljajo prožilci,
+    zato branje statistike ne zahteva pregleda vseh iger.
+    Polja razreda:
+    - kljuc: ime in tip stolpca, ki določa skupino
+    - izracun: poizvedba, ki statistiko izračuna iz osnovnih tabel
+    """
+    kljuc = None
+    izracun = None
+
+    def ustvari(self):
+        """
+        Ustvari tabelo statistike in njene prožilce.
+        """
+        self.conn.execute("""
+            CREATE TABLE {} (
+                {} PRIMARY KEY,
+                stevilo_iger   INTEGER NOT NULL DEFAULT 0,
+                stevilo_ocen   INTEGER NOT NULL DEFAULT 0,
+                vsota_ocen     FLOAT NOT NULL DEFAULT 0,
+                najnizja_ocena FLOAT,
+                najvisja_ocena FLOAT
+            );
+        """.format(self.ime, self.kljuc))
+        for prozilec in self.prozilci():
+            self.conn.execute(prozilec)
+
+    def posodobi(self):
+        """
+        Prožilce obstoječe tabele zamenja s trenutnimi
+        in statistiko izračuna na novo.
+        """
+        for prozilec in self.prozilci():
+            ime = re.search(r'CREATE TRIGGER (\w+)', prozilec).group(1)
+            self.conn.execute("DROP TRIGGER IF EXISTS {}".format(ime))
+            self.conn.execute(prozilec)
+        self.preracunaj()
+
+    def prozilci(self):
+        """
+        Vrne stavke za ustvarjanje prožilcev.
+        Podrazredi morajo povoziti to metodo.
+        """
+        raise NotImplementedError
+
+    def uvozi(self, encoding="UTF-8"):
+        """
+        Statistiko izračuna iz že uvoženih podatkov.
+        """
+        self.preracunaj()
+
+    def preracunaj(self):
+        """
+        Statistiko v celoti izračuna na novo.
+        """
+        self.izprazni()
+        self.conn.execute("INSERT INTO {} {}".format(self.ime, self.izracun))
+
+    def preveri(self, natancnost=1e-6):
+        """
+        Primerja shranjeno statistiko s statistiko, izračunano iz osnovnih tabel.
+        Vrne seznam ključev skupin, pri katerih se vrednosti razlikujejo.
+        """
+        shranjeno = {vrstica[0]: vrstica[1:] for vrstica in self.conn.execute(
+            "SELECT * FROM {} WHERE stevilo_iger > 0".format(self.ime))}
+        izracunano = {vrstica[0]: vrstica[1:] for vrstica in self.conn.execute(self.izracun)}
+        razlike = []
+        for kljuc in shranjeno.keys() | izracunano.keys():
+            prva, druga = shranjeno.get(kljuc), izracunano.get(kljuc)
+            if prva is None or druga is None or any(
+                    a != b and not (isinstance(a, (int, float)) and isinstance(b, (int, float))
+                                    and abs(a - b) <= natancnost)
+                    for a, b in zip(prva, druga)):
+                razlike.append(kljuc)
+        return razlike
+
+
+class StatistikaRazvijalcev(Statistika):
+    """
+    Statistika iger po razvijalcih.
+    """
+    ime = "statistika_razvijalcev"
+    kljuc = "razvija INTEGER"
+    izracun = """
+        SELECT razvija, COUNT(*), COUNT({0}), coalesce(SUM({0}), 0), MIN({0}), MAX({0})
+        FROM igra
+        WHERE razvija IS NOT NULL
+        GROUP BY razvija
+    """.format(_ocena("ocena"))
+
+    def prozilci(self):
+        """
+        Prožilci za dodajanje, spreminjanje in brisanje iger.
+        """
+        najnizja = "SELECT MIN({}) FROM igra WHERE razvija = OLD.razvija".format(_ocena("ocena"))
+        najvisja = "SELECT MAX({}) FROM igra WHERE razvija = OLD.razvija".format(_ocena("ocena"))
+        return [
+            """
+            CREATE TRIGGER statistika_razvijalcev_dodaj AFTER INSERT ON igra
+            BEGIN {} END;
+            """.format(_dodaj_oceno(self.ime, "razvija", "NEW.razvija", "NEW.ocena")),
+            """
+            CREATE TRIGGER statistika_razvijalcev_spremeni AFTER UPDATE OF razvija, ocena ON igra
+            WHEN OLD.razvija IS NOT NEW.razvija OR OLD.ocena IS NOT NEW.ocena
+            BEGIN {} {} END;
+            """.format(_odstej_oceno(self.ime, "razvija", "OLD.razvija", "OLD.ocena", najnizja, najvisja),
+                       _dodaj_oceno(self.ime, "razvija", "NEW.razvija", "NEW.ocena")),
+            """
+            CREATE TRIGGER statistika_razvijalcev_izbrisi AFTER DELETE ON igra
+            BEGIN {} END;
+            """.format(_odstej_oceno(self.ime, "razvija", "OLD.razvija", "OLD.ocena", najnizja, najvisja)),
+        ]
+
+
+class StatistikaLet(Statistika):
+    """
+    Statistika iger po letih izdaje.
+    """
+    ime = "statistika_let"
+    kljuc = "leto TEXT"
+    izracun = """
+        SELECT substr(datum_izdaje, 1, 4), COUNT(*), COUNT({0}), coalesce(SUM({0}), 0), MIN({0}), MAX({0})
+        FROM igra
+        GROUP BY substr(datum_izdaje, 1, 4)
+    """.format(_ocena("ocena"))
+
+    def prozilci(self):
+        """
+        Prožilci za dodajanje, spreminjanje in brisanje iger.
+        Najnižjo in najvišjo oceno leta poiščemo po indeksu igra_leto,
+        zato mora biti izraz za leto enak izrazu v indeksu.
+        """
+        leto = "substr({}.datum_izdaje, 1, 4)"
+        najnizja = "SELECT MIN({}) FROM igra WHERE substr(datum_izdaje, 1, 4) = {}".format(
+            _ocena("ocena"), leto.format("OLD"))
+        najvisja = "SELECT MAX({}) FROM igra WHERE substr(datum_izdaje, 1, 4) = {}".format(
+            _ocena("ocena"), leto.format("OLD"))
+        return [
+            """
+            CREATE TRIGGER statistika_let_dodaj AFTER INSERT ON igra
+            BEGIN {} END;
+            """.format(_dodaj_oceno(self.ime, "leto", leto.format("NEW"), "NEW.ocena")),
+            """
+            CREATE TRIGGER statistika_let_spremeni AFTER UPDATE OF datum_izdaje, ocena ON igra
+            WHEN OLD.datum_izdaje IS NOT NEW.datum_izdaje OR OLD.ocena IS NOT NEW.ocena
+            BEGIN {} {} END;
+            """.format(_odstej_oceno(self.ime, "leto", leto.format("OLD"), "OLD.ocena", najnizja, najvisja),
+                       _dodaj_oceno(self.ime, "leto", leto.format("NEW"), "NEW.ocena")),
+            """
+            CREATE TRIGGER statistika_let_izbrisi AFTER DELETE ON igra
+            BEGIN {} END;
+            """.format(_odstej_oceno(self.ime, "leto", leto.format("OLD"), "OLD.ocena", najnizja, najvisja)),
+        ]
+
+
+class StatistikaPlatform(Statistika):
+    """
+    Statistika iger po platformah.
+    """
+    ime = "statistika_platform"
+    kljuc = "platforma INTEGER"
+    izracun = """
+        SELECT podpira.platforma, COUNT(*), COUNT({0}), coalesce(SUM({0}), 0), MIN({0}), MAX({0})
+        FROM podpira JOIN igra ON (igra.id = podpira.ime_igre)
+        GROUP BY podpira.platforma
+    """.format(_ocena("igra.ocena"))
+
+    def prozilci(self):
+        """
+        Prožilci za dodajanje in brisanje platform igram
+        ter za spreminjanje ocen iger.
+        """
+        ocena = "(SELECT ocena FROM igra WHERE id = {}.ime_igre)"
+        skupina = "FROM podpira JOIN igra ON (igra.id = podpira.ime_igre) WHERE podpira.platforma = {}"
+        platforme_igre = "SELECT platforma FROM podpira WHERE ime_igre = NEW.id"
+        return [
+            """
+            CREATE TRIGGER statistika_platform_dodaj AFTER INSERT ON podpira
+            BEGIN {} END;
+            """.format(_dodaj_oceno(self.ime, "platforma", "NEW.platforma", ocena.format("NEW"))),
+            """
+            CREATE TRIGGER statistika_platform_izbrisi AFTER DELETE ON podpira
+            BEGIN {} END;
+            """.format(_odstej_oceno(
+                self.ime, "platforma", "OLD.platforma", ocena.format("OLD"),
+                "SELECT MIN({}) ".format(_ocena("igra.ocena")) + skupina.format("OLD.platforma"),
+                "SELECT MAX({}) ".format(_ocena("igra.ocena")) + skupina.format("OLD.platforma"))),
+            """
+            CREATE TRIGGER statistika_platform_spremeni AFTER UPDATE OF ocena ON igra
+            WHEN OLD.ocena IS NOT NEW.ocena
+            BEGIN
+                UPDATE {tabela} SET
+                    stevilo_ocen = stevilo_ocen - ({stara} IS NOT NULL) + ({nova} IS NOT NULL),
+                    vsota_ocen = vsota_ocen - coalesce({stara}, 0) + coalesce({nova}, 0)
+                WHERE platforma IN ({platforme_igre});
+                UPDATE {tabela} SET
+                    najnizja_ocena = (SELECT MIN({ocena}) {skupina}),
+                    najvisja_ocena = (SELECT MAX({ocena}) {skupina})
+                WHERE platforma IN ({platforme_igre}) AND {stara} IN (najnizja_ocena, najvisja_ocena);
+                UPDATE {tabela} SET
+                    najnizja_ocena = min(coalesce(najnizja_ocena, {nova}), coalesce({nova}, najnizja_ocena)),
+                    najvisja_ocena = max(coalesce(najvisja_ocena, {nova}), coalesce({nova}, najvisja_ocena))
+                WHERE platforma IN ({platforme_igre});
+            END;
+            """.format(tabela=self.ime, platforme_igre=platforme_igre,
+                       skupina=skupina.format("{}.platforma".format(self.ime)),
+                       ocena=_ocena("igra.ocena"), stara=_ocena("OLD.ocena"), nova=_ocena("NEW.ocena")),
+        ]
+
+
+class PodobneIgre(Tabela):
+    """
+    Tabela s podobnimi igrami, ki jih izračuna priporocila.py.
+    Podatki so izpeljani, zato tabela nima tujih ključev;
+    po večjih spremembah jih izračunamo na novo.
+    """
+    ime = "podobne_igre"
+
+    def ustvari(self):
+        """
+        Ustvari tabelo podobne_igre.
+        """
+        self.conn.execute("""
+            CREATE TABLE podobne_igre (
+                igra      INTEGER,
+                mesto     INTEGER,
+                podobna   INTEGER,
+                podobnost FLOAT,
+                PRIMARY KEY (
+                    igra,
+                    mesto
+                )
+            ) WITHOUT ROWID;
+        """)
+
+    def uvozi(self, encoding="UTF-8"):
+        """
+        Izračuna podobne igre iz že uvoženih podatkov.
+        """
+        import priporocila
+        priporocila.shrani(self.conn)
+
+
+class Spremembe(Tabela):
+    """
+    Dnevnik sprememb: za vsako dodano, spremenjeno ali izbrisano vrstico
+    osnovnih tabel prožilci dodajo zapis (zaporedna številka, tabela, ključ,
+    operacija). Zapisov ne spreminjamo, zato lahko predpomnilniki dnevnik
+    berejo od zadnje prebrane številke naprej (glej spremembe.py).
+    Polja razreda:
+    - tabele: slovar, ki tabeli priredi stolpca ključa; pri povezovalnih
+      tabelah je prvi stolpec id igre, drugi pa id platforme ali podjetja
+    """
+    ime = "spremembe"
+    tabele = {
+        "uporabnik": ("id", None),
+        "podjetje": ("id", None),
+        "igra": ("id", None),
+        "platforma": ("id", None),
+        "distributira": ("ime_igre", "podjetje"),
+        "podpira": ("ime_igre", "platforma"),
+    }
+
+    def ustvari(self):
+        """
+        Ustvari tabelo spremembe in prožilce na osnovnih tabelah.
+        AUTOINCREMENT zagotavlja, da se številke ne ponovijo niti po obrezovanju dnevnika.
+        """
+        self.conn.execute("""
+            CREATE TABLE spremembe (
+                zaporedna   INTEGER PRIMARY KEY AUTOINCREMENT,
+                tabela      TEXT NOT NULL,
+                kljuc       INTEGER NOT NULL,
+                drugi_kljuc INTEGER,
+                operacija   TEXT NOT NULL
+            );
+        """)
+        for prozilec in self.prozilci():
+            self.conn.execute(prozilec)
+
+    def prozilci(self):
+        """
+        Vrne stavke za ustvarjanje prožilcev za dodajanje, spreminjanje in brisanje.
+        Sprememba ključa se zabeleži kot brisanje stare in dodajanje nove vrstice.
+        """
+        prozilci = []
+        for tabela, (kljuc, drugi_kljuc) in self.tabele.items():
+            def zapis(vrstica, operacija):
+                return "SELECT '{}', {}.{}, {}, {}".format(
+                    tabela, vrstica, kljuc, "NULL" if drugi_kljuc is None else vrstica + "." + drugi_kljuc, operacija)
+            enak = "OLD.{0} IS NEW.{0}".format(kljuc)
+            if drugi_kljuc is not None:
+                enak += " AND OLD.{0} IS NEW.{0}".format(drugi_kljuc)
+            dodaj = "INSERT INTO spremembe (tabela, kljuc, drugi_kljuc, operacija) "
+            prozilci += [
+                """
+                CREATE TRIGGER spremembe_{tabela}_dodaj AFTER INSERT ON {tabela}
+                BEGIN {dodaj}{novi}; END;
+                """.format(tabela=tabela, dodaj=dodaj, novi=zapis("NEW", "'dodaj'")),
+                """
+                CREATE TRIGGER spremembe_{tabela}_spremeni AFTER UPDATE ON {tabela}
+                BEGIN
+                    {dodaj}{stari} WHERE NOT ({enak});
+                    {dodaj}{novi};
+                END;
+                """.format(tabela=tabela, dodaj=dodaj, enak=enak, stari=zapis("OLD", "'izbrisi'"),
+                           novi=zapis("NEW", "CASE WHEN {} THEN 'spremeni' ELSE 'dodaj' END".format(enak))),
+                """
+                CREATE TRIGGER spremembe_{tabela}_izbrisi AFTER DELETE ON {tabela}
+                BEGIN {dodaj}{stari}; END;
+                """.format(tabela=tabela, dodaj=dodaj, stari=zapis("OLD", "'izbrisi'")),
+            ]
+        return prozilci
+
+    def izbrisi(self):
+        """
+        Izbriše tabelo spremembe in njene prožilce.
+        """
+        for tabela in self.tabele:
+            for operacija in ("dodaj", "spremeni", "izbrisi"):
+                self.conn.execute("DROP TRIGGER IF EXISTS spremembe_{}_{};".format(tabela, operacija))
+        super().izbrisi()
+
+    def uvozi(self, encoding="UTF-8"):
+        """
+        Uvoženi podatki niso spremembe, zato dnevnik le izprazni.
+        Tabela mora biti uvožena zadnja.
+        """
+        self.izprazni()
+
+
 def ustvari_tabele(tabele):
     """
     Ustvari podane tabele.
     """
     for t in tabele:
         t.ustvari()
+        t.ustvari_indekse()
 
 
 def izbrisi_tabele(tabele):
@@ -328,14 +761,56 @@ def pripravi_tabele(conn):
     igra = Igra(conn)
     distributira = Distributira(conn)
     podpira = Podpira(conn)
-    return [uporabnik, podjetje, igra, platforma, distributira, podpira]
+    statistika_razvijalcev = StatistikaRazvijalcev(conn)
+    statistika_let = StatistikaLet(conn)
+    statistika_platform = StatistikaPlatform(conn)
+    podobne_igre = PodobneIgre(conn)
+    spremembe = Spremembe(conn)
+    return [uporabnik, podjetje, igra, platforma, distributira, podpira,
+            statistika_razvijalcev, statistika_let, statistika_platform, podobne_igre, spremembe]
+
+
+def pripravi_statistike(conn):
+    """
+    Pripravi objekte za tabele statistike.
+    """
+    return [t for t in pripravi_tabele(conn) if isinstance(t, Statistika)]
 
 
 def ustvari_bazo_ce_ne_obstaja(conn):
     """
     Ustvari bazo, če ta še ne obstaja.
+    Obstoječi bazi doda manjkajoče tabele in indekse.
     """
     with conn:
         cur = conn.execute("SELECT COUNT(*) FROM sqlite_master")
         if cur.fetchone() == (0, ):
-            ustvari_bazo(conn)
\ No newline at end of file
+            ustvari_bazo(conn)
+        else:
+            for t in pripravi_tabele(conn):
+                if not t.obstaja():
+                    t.ustvari()
+                    t.uvozi()
+                else:
+                    t.posodobi()
+                t.ustvari_indekse()
+
+
+if __name__ == '__main__':
+    import sqlite3
+    import sys
+    ukaz = sys.argv[1] if len(sys.argv) > 1 and sys.argv[1] in ('preveri', 'preracunaj') else None
+    argumenti = sys.argv[2:] if ukaz else sys.argv[1:]
+    datoteka = argumenti[0] if argumenti else 'igre.db'
+    conn = sqlite3.connect(datoteka)
+    if ukaz == 'preveri':
+        for t in pripravi_statistike(conn):
+            razlike = t.preveri()
+            print('{}: {}'.format(t.ime, 'v redu' if not razlike else 'razlike pri {}'.format(razlike)))
+    elif ukaz == 'preracunaj':
+        with conn:
+            for t in pripravi_statistike(conn):
+                t.preracunaj()
+    else:
+        ustvari_bazo_ce_ne_obstaja(conn)
+    conn.close()
@@ -0,0 +1,351 @@
+"""
+Filtriranje iger po lastnostih (fasetah) s števili iger za vsako vrednost.
+Za vsako vrednosti vsake fasete hranimo stisnjeno bitno sliko id-jev iger,
+ki jo imajo. Izbrane igre so presek (med fasetami) unij (znotraj fasete)
+bitnih slik, števila pa velikosti presekov, zato zahteve ne potrebujejo
+poizvedb z GROUP BY. Slike popravimo le za igre, ki se pojavijo v dnevniku
+sprememb (glej spremembe.py).
+"""
+import threading
+
+import spremembe
+from priporocila import razred_cene, razred_ocene, CENE
+
+DEL = 1 << 16  # število zaporednih id-jev v enem delu bitne slike
+GOSTO = 4096  # del z več id-ji hranimo kot celo število, sicer kot množico
+
+# fasete: ime -> (opis, tip vrednosti)
+FASETE = {
+    'platforma': ('Platforma', int),
+    'zaloznik': ('Založnik', int),
+    'razvijalec': ('Razvijalec', int),
+    'leto': ('Leto izdaje', str),
+    'cena': ('Cena', int),
+    'ocena': ('Ocena', int),
+}
+
+
+def _stisni(odmiki):
+    """
+    Vrne del bitne slike z danimi odmiki: množico, če jih je malo,
+    sicer celo število, katerega prižgani biti so odmiki.
+    """
+    if len(odmiki) <= GOSTO:
+        return set(odmiki)
+    biti = bytearray(DEL // 8)
+    for odmik in odmiki:
+        biti[odmik >> 3] |= 1 << (odmik & 7)
+    return int.from_bytes(biti, 'little')
+
+
+def _odmiki(del_):
+    """
+    Vrne urejen seznam odmikov v delu bitne slike.
+    """
+    if isinstance(del_, set):
+        return sorted(del_)
+    odmiki = []
+    for i, bajt in enumerate(del_.to_bytes(DEL // 8, 'little')):
+        if bajt:
+            odmiki.extend(8 * i + j for j in range(8) if bajt >> j & 1)
+    return odmiki
+
+
+def _stevilo(del_):
+    return len(del_) if isinstance(del_, set) else del_.bit_count()
+
+
+def _presek(a, b):
+    if isinstance(a, set):
+        return a & b if isinstance(b, set) else {odmik for odmik in a if b >> odmik & 1}
+    return _presek(b, a) if isinstance(b, set) else a & b
+
+
+def _unija(a, b):
+    if isinstance(a, set) and isinstance(b, set):
+        return a | b
+    if isinstance(a, set):
+        a, b = b, a
+    if isinstance(b, set):
+        b = _stisni(b) if len(b) > GOSTO else sum(1 << odmik for odmik in b)
+    return a | b
+
+
+class Bitmapa:
+    """
+    Stisnjena bitna slika množice id-jev.
+    Id-je razdeli na dele po DEL zaporednih id-jev in hrani le neprazne
+    dele: redke kot množice odmikov, goste kot cela števila.
+    """
+
+    __slots__ = ('deli',)
+
+    def __init__(self, ids=()):
+        """
+        Konstruktor bitne slike.
+        Argumenti:
+        - ids: začetni id-ji
+        """
+        deli = {}
+        for id in ids:
+            deli.setdefault(id // DEL, []).append(id % DEL)
+        self.deli = {kljuc: _stisni(odmiki) for kljuc, odmiki in deli.items()}
+
+    def __len__(self):
+        return sum(map(_stevilo, self.deli.values()))
+
+    def __contains__(self, id):
+        del_ = self.deli.get(id // DEL)
+        if del_ is None:
+            return False
+        return id % DEL in del_ if isinstance(del_, set) else bool(del_ >> (id % DEL) & 1)
+
+    def __iter__(self):
+        for kljuc in sorted(self.deli):
+            zacetek = kljuc * DEL
+            for odmik in _odmiki(self.deli[kljuc]):
+                yield zacetek + odmik
+
+    def __and__(self, druga):
+        rezultat = Bitmapa()
+        for kljuc, del_ in self.deli.items():
+            if kljuc in druga.deli:
+                presek = _presek(del_, druga.deli[kljuc])
+                if presek:
+                    rezultat.deli[kljuc] = presek
+        return rezultat
+
+    def __or__(self, druga):
+        rezultat = self.kopija()
+        for kljuc, del_ in druga.deli.items():
+            if kljuc in rezultat.deli:
+                rezultat.deli[kljuc] = _unija(rezultat.deli[kljuc], del_)
+            else:
+                rezultat.deli[kljuc] = set(del_) if isinstance(del_, set) else del_
+        return rezultat
+
+    def kopija(self):
+        """
+        Vrne kopijo bitne slike, ki si z izvirnikom ne deli množic.
+        """
+        rezultat = Bitmapa()
+        rezultat.deli = {kljuc: set(del_) if isinstance(del_, set) else del_ for kljuc, del_ in self.deli.items()}
+        return rezultat
+
+    def stevilo_preseka(self, druga):
+        """
+        Vrne velikost preseka z drugo bitno sliko, ne da bi ga zgradila.
+        """
+        stevilo = 0
+        for kljuc, del_ in self.deli.items():
+            if kljuc in druga.deli:
+                stevilo += _stevilo(_presek(del_, druga.deli[kljuc]))
+        return stevilo
+
+    def dodaj(self, id):
+        """
+        Doda id v bitno sliko.
+        """
+        kljuc, odmik = divmod(id, DEL)
+        del_ = self.deli.get(kljuc, set())
+        if isinstance(del_, set):
+            del_.add(odmik)
+            if len(del_) > GOSTO:
+                del_ = _stisni(del_)
+        else:
+            del_ |= 1 << odmik
+        self.deli[kljuc] = del_
+
+    def odstrani(self, id):
+        """
+        Odstrani id iz bitne slike.
+        """
+        kljuc, odmik = divmod(id, DEL)
+        del_ = self.deli.get(kljuc)
+        if del_ is None:
+            return
+        if isinstance(del_, set):
+            del_.discard(odmik)
+        else:
+            del_ &= ~(1 << odmik)
+            self.deli[kljuc] = del_
+        if not del_:
+            del self.deli[kljuc]
+
+
+def oznaka(faseta, vrednost):
+    """
+    Vrne opis vrednosti fasete cena ali ocena; druge vrednosti vrne nespremenjene.
+    """
+    if faseta == 'cena':
+        if vrednost == 0:
+            return 'zastonj'
+        if vrednost == len(CENE):
+            return 'nad {} $'.format(CENE[-1])
+        return '{} $ do {} $'.format(CENE[vrednost - 1], CENE[vrednost])
+    if faseta == 'ocena':
+        return '{} do {}'.format(10 * vrednost, 10 * vrednost + 9)
+    return vrednost
+
+
+class Fasete:
+    """
+    Bitne slike iger za vse vrednosti vseh faset.
+    """
+
+    def __init__(self):
+        """
+        Konstruktor praznih faset.
+        """
+        self.slike = {faseta: {} for faseta in FASETE}
+        self.vse = Bitmapa()
+        self.vrednosti = {}  # id igre -> seznam parov (faseta, vrednost)
+        self._kljucavnica = threading.RLock()
+
+    @staticmethod
+    def _vrednosti_igre(razvija, datum_izdaje, cena, ocena):
+        vrednosti = [
+            ('razvijalec', razvija),
+            ('leto', None if datum_izdaje is None else str(datum_izdaje)[:4]),
+            ('cena', razred_cene(cena)),
+            ('ocena', razred_ocene(ocena)),
+        ]
+        return [(faseta, vrednost) for faseta, vrednost in vrednosti if vrednost is not None]
+
+    def nalozi(self, conn):
+        """
+        Zgradi bitne slike iz vseh iger v bazi.
+        """
+        vrednosti = {}
+        for id, *podatki in conn.execute("SELECT id, razvija, datum_izdaje, cena, ocena FROM igra"):
+            vrednosti[id] = self._vrednosti_igre(*podatki)
+        for id, platforma in conn.execute("SELECT ime_igre, platforma FROM podpira"):
+            if id in vrednosti:
+                vrednosti[id].append(('platforma', platforma))
+        for id, podjetje in conn.execute("SELECT ime_igre, podjetje FROM distributira"):
+            if id in vrednosti:
+                vrednosti[id].append(('zaloznik', podjetje))
+        ids = {}
+        for id, pari in vrednosti.items():
+            for par in pari:
+                ids.setdefault(par, []).append(id)
+        slike = {faseta: {} for faseta in FASETE}
+        for (faseta, vrednost), seznam in ids.items():
+            slike[faseta][vrednost] = Bitmapa(seznam)
+        with self._kljucavnica:
+            self.slike = slike
+            self.vse = Bitmapa(vrednosti)
+            self.vrednosti = vrednosti
+
+    def osvezi(self, conn, ids):
+        """
+        Na novo prebere vrednosti faset za igre z danimi id-ji
+        in popravi le njihove bite.
+        """
+        for id in ids:
+            vrstica = conn.execute(
+                "SELECT razvija, datum_izdaje, cena, ocena FROM igra WHERE id = ?", [id]).fetchone()
+            nove = []
+            if vrstica is not None:
+                nove = self._vrednosti_igre(*vrstica)
+                nove += [('platforma', platforma) for platforma, in conn.execute(
+                    "SELECT platforma FROM podpira WHERE ime_igre = ?", [id])]
+                nove += [('zaloznik', podjetje) for podjetje, in conn.execute(
+                    "SELECT podjetje FROM distributira WHERE ime_igre = ?", [id])]
+            with self._kljucavnica:
+                for faseta, vrednost in self.vrednosti.pop(id, []):
+                    self.slike[faseta][vrednost].odstrani(id)
+                    if not self.slike[faseta][vrednost].deli:
+                        del self.slike[faseta][vrednost]
+                self.vse.odstrani(id)
+                if vrstica is not None:
+                    for faseta, vrednost in nove:
+                        self.slike[faseta].setdefault(vrednost, Bitmapa()).dodaj(id)
+                    self.vse.dodaj(id)
+                    self.vrednosti[id] = nove
+
+    def izberi(self, izbira, brez=None):
+        """
+        Vrne bitno sliko iger, ki ustrezajo izbiri.
+        Argumenti:
+        - izbira: slovar, ki faseti priredi seznam izbranih vrednosti;
+          igra mora imeti vsaj eno izbrano vrednost vsake fasete
+        - brez: faseta, ki je pri izbiri ne upoštevamo
+        """
+        with self._kljucavnica:
+            izbrane = self._izberi(izbira, brez)
+            return izbrane.kopija() if izbrane is self.vse else izbrane
+
+    def _izberi(self, izbira, brez):
+        izbrane = self.vse
+        for faseta, vrednosti in izbira.items():
+            if faseta == brez or not vrednosti:
+                continue
+            unija = Bitmapa()
+            for vrednost in vrednosti:
+                if vrednost in self.slike[faseta]:
+                    unija = unija | self.slike[faseta][vrednost]
+            izbrane = izbrane & unija
+        return izbrane
+
+    def stevila(self, izbira):
+        """
+        Za vsako faseto vrne seznam parov (vrednost, število iger),
+        urejen po številu iger. Število pove, koliko iger bi ustrezalo
+        izbiri, če bi izbrali še to vrednost fasete.
+        """
+        stevila = {}
+        with self._kljucavnica:
+            for faseta, slike in self.slike.items():
+                izbrane = self._izberi(izbira, faseta)
+                if izbrane is self.vse:
+                    pari = [(vrednost, len(slika)) for vrednost, slika in slike.items()]
+                else:
+                    pari = [(vrednost, slika.stevilo_preseka(izbrane)) for vrednost, slika in slike.items()]
+                stevila[faseta] = sorted(((v, s) for v, s in pari if s), key=lambda par: (-par[1], str(par[0])))
+        return stevila
+
+
+_fasete = None
+_nalaganje = threading.Lock()
+
+
+def fasete():
+    """
+    Vrne fasete vseh iger. Ob prvem klicu jih zgradi iz baze modela
+    in se prijavi na dnevnik sprememb.
+    """
+    global _fasete
+    with _nalaganje:
+        if _fasete is None:
+            import model
+            od = spremembe.zadnja()
+            nove = Fasete()
+            nove.nalozi(model.bazen.bralec())
+            _fasete = nove
+            spremembe.prijavi(
+                lambda seznam: osvezi({sprememba.kljuc for sprememba in seznam}),
+                tabele=['igra', 'podpira', 'distributira'], od=od, ponastavi=ponastavi)
+    return _fasete
+
+
+def osvezi(ids):
+    """
+    Popravi fasete za igre z danimi id-ji, če so fasete že zgrajene.
+    """
+    if _fasete is not None:
+        import model
+        _fasete.osvezi(model.bazen.bralec(), ids)
+
+
+def ponastavi():
+    """
+    Fasete zgradi na novo iz baze, ko so bile spremembe, ki jih še niso
+    prebrale, že obrezane.
+    """
+    global _fasete
+    if _fasete is not None:
+        import model
+        nove = Fasete()
+        nove.nalozi(model.bazen.bralec())
+        _fasete = nove
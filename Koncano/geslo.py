@@ -1,6 +1,145 @@
+"""
+Zgoščevanje gesel s funkcijo PBKDF2.
+Zgoščevanje traja več deset milisekund, zato ga lahko prestavimo
+v bazen procesov (glej vklopi). Niti, ki streže zahtevo, potem le počaka
+na rezultat, zgoščevanja pa tečejo na vseh jedrih z nižjo prednostjo
+kot izrisovanje strani. Hkrati teče in čaka le omejeno število
+zgoščevanj; ko je vrsta polna, zgosti sproži Zasedeno, da strežnik
+lahko odgovori s 503, namesto da bi prijave zasedle vse niti.
+
+Bazen ima vsak proces strežnika svoj, zato so število procesov in vrsta
+nastavljeni na proces strežnika; privzeto si procesi strežnika jedra
+razdelijo (glej vklopi). Če kakšen proces bazena umre (npr. zaradi
+pomanjkanja pomnilnika), bazen ustvarimo na novo.
+"""
 import os
 import hashlib
 import hmac
+import threading
+
+PONOVITVE = 100000
+PROCESI = os.cpu_count() or 1  # procesi za zgoščevanje v vseh procesih strežnika skupaj
+VRSTA = 16  # toliko zgoščevanj lahko čaka, ko so vsi procesi zasedeni
+PRIJAZNOST = 5  # za toliko procesom znižamo prednost (os.nice)
+
+
+class Zasedeno(Exception):
+    """
+    Vsi procesi za zgoščevanje so zasedeni in vrsta je polna.
+    """
+    pass
+
+
+def _zgosti(geslo, sol):
+    return hashlib.pbkdf2_hmac('sha256', geslo.encode('utf-8'), sol, PONOVITVE)
+
+
+def _zacni_proces():
+    if hasattr(os, 'nice'):
+        os.nice(PRIJAZNOST)
+
+
+class Zgoscevalnik:
+    """
+    Bazen procesov za zgoščevanje gesel z omejeno vrsto.
+    """
+
+    def __init__(self, procesi=PROCESI, vrsta=VRSTA):
+        """
+        Konstruktor zgoščevalnika.
+        Argumenti:
+        - procesi: število procesov
+        - vrsta: največje število zgoščevanj, ki čakajo na prost proces
+        """
+        self.procesi = procesi
+        self._bazen = self._nov_bazen()
+        self._obnova = threading.Lock()
+        self._prosta = threading.BoundedSemaphore(procesi + vrsta)
+        self.zgoscevanja = 0
+        self.zavrnjena = 0
+        self.obnove = 0
+
+    def _nov_bazen(self):
+        # modula za bazen uvozimo šele tu, saj ju brez bazena ne potrebujemo,
+        # njun uvoz pa podaljša zagon vsakega procesa, ki uvozi model
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        # spawn: procesa s strežnikom, ki ima več niti, ne razcepimo
+        return ProcessPoolExecutor(
+            self.procesi, mp_context=multiprocessing.get_context('spawn'), initializer=_zacni_proces)
+
+    def _obnovi(self, pokvarjen):
+        """
+        Pokvarjen bazen (umrl je eden od procesov) zamenja z novim,
+        če ga ni zamenjala že druga nit.
+        """
+        with self._obnova:
+            if self._bazen is pokvarjen:
+                pokvarjen.shutdown(wait=False)
+                self._bazen = self._nov_bazen()
+                self.obnove += 1
+
+    def zgosti(self, geslo, sol):
+        """
+        Vrne zgostitev gesla, izračunano v enem od procesov,
+        ali sproži Zasedeno, če je vrsta polna.
+        """
+        if not self._prosta.acquire(blocking=False):
+            self.zavrnjena += 1
+            raise Zasedeno()
+        from concurrent.futures.process import BrokenProcessPool
+        try:
+            self.zgoscevanja += 1
+            bazen = self._bazen
+            try:
+                return bazen.submit(_zgosti, geslo, sol).result()
+            except BrokenProcessPool:
+                # proces bazena je umrl: bazen ustvarimo na novo in poskusimo še enkrat
+                self._obnovi(bazen)
+                return self._bazen.submit(_zgosti, geslo, sol).result()
+        finally:
+            self._prosta.release()
+
+    def zapri(self):
+        """
+        Počaka na konec tekočih zgoščevanj in ustavi procese.
+        """
+        self._bazen.shutdown()
+
+
+_nastavitve = None
+_zgoscevalnik = None
+_pid = None
+_nalaganje = threading.Lock()
+
+
+def vklopi(procesi=None, vrsta=VRSTA, streznikov=1):
+    """
+    Zgoščevanja prestavi v bazen procesov. Bazen vsak proces strežnika
+    ustvari ob prvem zgoščevanju, zato ga lahko vklopimo pred os.fork.
+    Argumenti:
+    - procesi: število procesov za zgoščevanje v enem procesu strežnika;
+      privzeto PROCESI, razdeljeno med procese strežnika
+    - vrsta: največje število čakajočih zgoščevanj v enem procesu strežnika
+    - streznikov: število procesov strežnika
+    """
+    global _nastavitve
+    if procesi is None:
+        procesi = max(1, PROCESI // streznikov)
+    _nastavitve = {'procesi': procesi, 'vrsta': vrsta}
+
+
+def zgoscevalnik():
+    """
+    Vrne zgoščevalnik trenutnega procesa ali None, če ni vklopljen.
+    """
+    global _zgoscevalnik, _pid
+    with _nalaganje:
+        if _nastavitve is None:
+            return None
+        if _zgoscevalnik is None or _pid != os.getpid():
+            _zgoscevalnik, _pid = Zgoscevalnik(**_nastavitve), os.getpid()
+        return _zgoscevalnik
 
 
 def zgosti(geslo, sol):
@@ -8,8 +147,12 @@ def zgosti(geslo, sol):
     Vrne zgostitev gesla pri podani soli.
     Uporabi funkcijo PBKDF2_HMAC za izpeljavo ključa
     z zgoščevalno funkcijo SHA256 in 100000 ponovitvami.
+    Če je vklopljen bazen procesov, lahko sproži Zasedeno.
     """
-    return hashlib.pbkdf2_hmac('sha256', geslo.encode('utf-8'), sol, 100000)
+    z = zgoscevalnik()
+    if z is None:
+        return _zgosti(geslo, sol)
+    return z.zgosti(geslo, sol)
 
 
 def sifriraj_geslo(geslo):
@@ -29,4 +172,15 @@ def preveri_geslo(geslo, zgostitev, sol):
         return hmac.compare_digest(bytes.fromhex(zgostitev),
                                    zgosti(geslo, bytes.fromhex(sol)))
     except ValueError:
-        return False
\ No newline at end of file
+        return False
+
+
+def porocilo():
+    """
+    Vrne besedilno poročilo o zgoščevanju gesel.
+    """
+    if _zgoscevalnik is None:
+        return 'Zgoščevanje gesel teče v nitih strežnika.\n'
+    z = _zgoscevalnik
+    return 'Zgoščevanje gesel: {} procesov, {} zgoščevanj, {} zavrnjenih, {} obnov bazena.\n'.format(
+        z.procesi, z.zgoscevanja, z.zavrnjena, z.obnove)
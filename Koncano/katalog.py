@@ -0,0 +1,371 @@
+"""
+Katalog iger v pomnilniku.
+Katalog je posnetek tabel igra, podjetje, platforma, podpira in distributira
+z indeksi po id-jih in imenih ter vnaprej urejenimi seznami id-jev za vse
+razvrstitve iger, tudi za vsako platformo posebej. Ko je katalog vklopljen,
+bralne metode modela, označene z iz_kataloga, namesto poizvedb na bazo
+berejo iz njega.
+
+Posnetka po izgradnji ne spreminjamo. Ko se v dnevniku sprememb (glej
+spremembe.py) pojavi sprememba kataloga, osvezi() katalog izklopi, da
+model bere iz baze, nit v ozadju pa zgradi nov posnetek in ga vklopi;
+zahteve, ki so začele s starim posnetkom, ga berejo do konca. Pisanja
+tako ne čakajo na gradnjo, zaporedna pisanja pa sprožijo le eno gradnjo.
+
+Primer:
+    import katalog
+    katalog.vklopi()
+"""
+import bisect
+import functools
+import inspect
+import re
+import threading
+import traceback
+
+import spremembe
+
+# tabele, iz katerih je zgrajen katalog
+TABELE = ['igra', 'podjetje', 'platforma', 'podpira', 'distributira']
+
+# razvrstitve iz model.RAZVRSTITVE, za katere hranimo urejene sezname
+RAZVRSTITVE = ['id', 'ime', 'datum', 'ocena', 'cena']
+
+# pri iskanju so kot pri LIKE v SQLite enake le male in velike črke ASCII
+_MALE = str.maketrans('ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')
+
+
+class Katalog:
+    """
+    Nespremenljiv posnetek kataloga iger.
+    """
+
+    def __init__(self, conn):
+        """
+        Konstruktor kataloga. Vse tabele prebere v eni transakciji,
+        da je posnetek skladen.
+        Argumenti:
+        - conn: povezava na bazo
+        """
+        from model import Igre
+        conn.execute('BEGIN')
+        try:
+            igre = {id: Igre(*vrstica, id=id) for id, *vrstica in conn.execute("""
+                SELECT id, ime_igre, datum_izdaje, cena, vsebuje, razvija, povprecno_igranje, mediana, ocena
+                FROM igra
+                ORDER BY id
+            """)}
+            self.podjetja = {id: vrstica for id, *vrstica in conn.execute(
+                "SELECT id, ime, drzava, datum_ustanovitve, opis FROM podjetje ORDER BY id")}
+            self.platforme = {id: vrstica for id, *vrstica in conn.execute(
+                "SELECT id, ime, tip, datum_izdaje, opis, podjetje FROM platforma ORDER BY id")}
+            podpira = conn.execute("SELECT ime_igre, platforma FROM podpira ORDER BY ime_igre").fetchall()
+            distributira = conn.execute("SELECT ime_igre, podjetje FROM distributira ORDER BY ime_igre").fetchall()
+        finally:
+            conn.execute('COMMIT')
+
+        # igre hranimo kot vrstice, da klicatelji dobijo svoje objekte
+        self.igre = {id: (igra.ime_igre, igra.datum_izdaje, igra.cena, igra.vsebuje, igra.razvija,
+                          igra.povprecno_igranje, igra.mediana, igra.ocena)
+                     for id, igra in igre.items()}
+        self.po_imenu = {}
+        for id, igra in igre.items():
+            self.po_imenu.setdefault(igra.ime_igre, []).append(id)
+        self.podjetje_po_imenu = {vrstica[0]: id for id, vrstica in self.podjetja.items()}
+        self.platforma_po_imenu = {vrstica[0]: id for id, vrstica in self.platforme.items()}
+        self.id_podjetij = list(self.podjetja)
+        self.id_platform = list(self.platforme)
+        self.imena_za_iskanje = [(id, igra.ime_igre.translate(_MALE)) for id, igra in igre.items()]
+
+        # povezovalni tabeli v obe smeri; id-ji so urejeni, ker so bile vrstice
+        self.platforme_igre = {}
+        self.na_platformi = {}
+        for igra, platforma in podpira:
+            if igra in igre:
+                self.platforme_igre.setdefault(igra, []).append(platforma)
+                self.na_platformi.setdefault(platforma, []).append(igra)
+        self.zalozniki_igre = {}
+        self.izdane = {}
+        for igra, podjetje in distributira:
+            if igra in igre:
+                self.zalozniki_igre.setdefault(igra, []).append(podjetje)
+                self.izdane.setdefault(podjetje, []).append(igra)
+        self.razvite = {}
+        for id, igra in igre.items():
+            self.razvite.setdefault(igra.razvija, []).append(id)
+
+        # za vsako razvrstitev par (ids, kljuci): id-ji, naraščajoče urejeni po
+        # ključu razvrstitve (glej Igre.kljuc), in njihovi ključi, po katerih
+        # iščemo začetek strani; seznami platform so podzaporedja seznama vseh iger
+        self.razvrstitve = {}
+        self.razvrstitve_platform = {}
+        for razvrsti in RAZVRSTITVE:
+            kljuci = sorted(igra.kljuc(razvrsti) for igra in igre.values())
+            self.razvrstitve[razvrsti] = [id for _, id in kljuci], kljuci
+            po_platformah = {platforma: [] for platforma in self.na_platformi}
+            for kljuc in kljuci:
+                for platforma in self.platforme_igre.get(kljuc[1], ()):
+                    po_platformah[platforma].append(kljuc)
+            for platforma, kljuci in po_platformah.items():
+                self.razvrstitve_platform[platforma, razvrsti] = [id for _, id in kljuci], kljuci
+        self.brez_cene = sum(1 for igra in igre.values() if igra.cena is None)
+
+    def _igre(self, ids):
+        from model import Igre
+        for id in ids:
+            yield Igre(*self.igre[id], id=id)
+
+    # Igre
+
+    def najnovejse_igre(self):
+        ids, _ = self.razvrstitve['datum']
+        return self._igre(ids[:-11:-1])
+
+    def podatki_o_igri(self, igra):
+        from model import Igre
+        ids = self.po_imenu.get(igra)
+        if ids:
+            zalozniki = {self.podjetja.get(podjetje, (None,))[0]
+                         for id in ids for podjetje in self.zalozniki_igre.get(id, [None])}
+            platforme = {self.platforme.get(platforma, (None,))[0]
+                         for id in ids for platforma in self.platforme_igre.get(id, [None])}
+            ime_igre, datum_izdaje, cena, vsebuje, razvija, povprecno_igranje, mediana, ocena = self.igre[ids[0]]
+            razvijalec = self.podjetja.get(razvija, (None,))[0]
+            yield Igre(ime_igre, datum_izdaje, cena, vsebuje, razvijalec, povprecno_igranje, mediana, ocena,
+                       list(zalozniki), list(platforme), id=ids[0])
+
+    def _stran(self, ids, kljuci, razvrsti, od, koliko):
+        """
+        Vrne stran iger iz seznama, urejenega naraščajoče po ključih razvrstitve;
+        pri padajočih razvrstitvah gre po seznamu od konca.
+        """
+        import model
+        if model.RAZVRSTITVE[razvrsti][2] == 'ASC':
+            zacetek = 0 if od is None else bisect.bisect_right(kljuci, tuple(od))
+            return self._igre(ids[zacetek:zacetek + koliko])
+        konec = len(ids) if od is None else bisect.bisect_left(kljuci, tuple(od))
+        return self._igre(reversed(ids[max(0, konec - koliko):konec]))
+
+    def igre_po_id(self, ids):
+        return self._igre(sorted(id for id in set(ids) if id in self.igre))
+
+    def seznam_iger(self, razvrsti, od, koliko):
+        ids, kljuci = self.razvrstitve[razvrsti]
+        return self._stran(ids, kljuci, razvrsti, od, koliko)
+
+    def povezave_igre(self, id):
+        return sorted(self.platforme_igre.get(id, [])), sorted(self.zalozniki_igre.get(id, []))
+
+    def poisci(self, niz):
+        niz = niz.translate(_MALE)
+        if '%' in niz or '_' in niz:
+            vzorec = re.compile('.*'.join('.'.join(map(re.escape, del_.split('_'))) for del_ in niz.split('%')),
+                                re.DOTALL)
+            return self._igre(id for id, ime in self.imena_za_iskanje if vzorec.search(ime))
+        return self._igre(id for id, ime in self.imena_za_iskanje if niz in ime)
+
+    def glej_vse_igre(self):
+        return self._igre(self.igre)
+
+    def glej_vse_igre_imena(self):
+        return self._igre(self.razvrstitve['ime'][0])
+
+    def glej_vse_igre_datum(self):
+        return self._igre(reversed(self.razvrstitve['datum'][0]))
+
+    def glej_vse_igre_cena(self):
+        ids, _ = self.razvrstitve['cena']
+        return self._igre(ids[self.brez_cene:] + ids[:self.brez_cene])
+
+    def glej_vse_igre_ocena(self):
+        return self._igre(reversed(self.razvrstitve['ocena'][0]))
+
+    def imena_iger(self):
+        return [self.igre[id][0] for id in self.razvrstitve['ime'][0]]
+
+    def stevilo_iger(self):
+        return len(self.igre)
+
+    # Podjetja
+
+    def podatki_o_podjetju(self, podjetje):
+        from model import Podjetje
+        id = self.podjetje_po_imenu.get(podjetje)
+        if id is not None:
+            yield Podjetje(*self.podjetja[id], id)
+
+    def podjetje_po_id(self, id):
+        from model import Podjetje
+        if id in self.podjetja:
+            yield Podjetje(*self.podjetja[id], id)
+
+    def seznam_podjetij(self, od, koliko):
+        from model import Podjetje
+        zacetek = bisect.bisect_right(self.id_podjetij, od)
+        for id in self.id_podjetij[zacetek:zacetek + koliko]:
+            yield Podjetje(*self.podjetja[id], id)
+
+    def razvite_igre(self, podjetje, od, koliko):
+        ids = self.razvite.get(podjetje, [])
+        zacetek = bisect.bisect_right(ids, od)
+        return self._igre(ids[zacetek:zacetek + koliko])
+
+    def izdane_igre(self, podjetje, od, koliko):
+        ids = self.izdane.get(podjetje, [])
+        zacetek = bisect.bisect_right(ids, od)
+        return self._igre(ids[zacetek:zacetek + koliko])
+
+    def stevilo_iger_podjetja(self, podjetje):
+        return len(self.razvite.get(podjetje, [])), len(self.izdane.get(podjetje, []))
+
+    def imena_podjetij_po_id(self, ids):
+        return {id: self.podjetja[id][0] for id in ids if id in self.podjetja}
+
+    def imena_podjetij(self):
+        return list(self.podjetje_po_imenu)
+
+    def stevilo_podjetij(self):
+        return len(self.podjetja)
+
+    # Platforme
+
+    def podatki_o_platformi(self, platforma):
+        from model import Platforma
+        id = self.platforma_po_imenu.get(platforma)
+        if id is not None:
+            yield Platforma(*self.platforme[id], id)
+
+    def platforma_po_id(self, id):
+        from model import Platforma
+        if id in self.platforme:
+            yield Platforma(*self.platforme[id], id)
+
+    def seznam_platform(self, od, koliko):
+        from model import Platforma
+        zacetek = bisect.bisect_right(self.id_platform, od)
+        for id in self.id_platform[zacetek:zacetek + koliko]:
+            yield Platforma(*self.platforme[id], id)
+
+    def igre_platforme(self, platforma, razvrsti, od, koliko):
+        ids, kljuci = self.razvrstitve_platform.get((platforma, razvrsti), ([], []))
+        return self._stran(ids, kljuci, razvrsti, od, koliko)
+
+    def stevilo_iger_platforme(self, platforma):
+        return len(self.na_platformi.get(platforma, []))
+
+    def imena_platform_po_id(self, ids):
+        return {id: self.platforme[id][0] for id in ids if id in self.platforme}
+
+    def imena_platform(self):
+        return list(self.platforma_po_imenu)
+
+    def stevilo_platform(self):
+        return len(self.platforme)
+
+
+_katalog = None  # trenutni posnetek ali None, če katalog ni vklopljen ali se gradi na novo
+_vklopljen = False
+_rod = 0  # poveča se ob vsaki spremembi tabel kataloga
+_graditelj = None  # nit, ki gradi nov posnetek, ali None
+_odjemalec = None
+_gradnja = threading.Lock()
+
+
+def _zgradi():
+    import model
+    return Katalog(model.bazen.bralec())
+
+
+def vklopi():
+    """
+    Zgradi katalog iz baze modela, ga vklopi in se prijavi na dnevnik sprememb.
+    """
+    global _katalog, _odjemalec, _vklopljen
+    # odjemalca prijavimo pred gradnjo, da ne zamudimo sprememb med njo
+    if _odjemalec is None:
+        _odjemalec = spremembe.prijavi(lambda seznam: osvezi(), tabele=TABELE, ponastavi=osvezi)
+    with _gradnja:
+        _vklopljen = True
+        rod = _rod
+    katalog = _zgradi()
+    with _gradnja:
+        # če se je baza med gradnjo spremenila, nov posnetek že gradi osvezi
+        if rod == _rod and _vklopljen:
+            _katalog = katalog
+    return katalog
+
+
+def izklopi():
+    """
+    Izklopi katalog; model spet bere iz baze.
+    """
+    global _katalog, _odjemalec, _vklopljen
+    with _gradnja:
+        _vklopljen = False
+        _katalog = None
+        odjemalec, _odjemalec = _odjemalec, None
+    if odjemalec is not None:
+        spremembe.odjavi(odjemalec)
+
+
+def osvezi():
+    """
+    Če je katalog vklopljen, ga zaradi spremembe baze začasno izklopi
+    (model bere iz baze) in nit v ozadju zgradi nov posnetek.
+    """
+    global _katalog, _rod, _graditelj
+    with _gradnja:
+        if not _vklopljen:
+            return
+        _rod += 1
+        _katalog = None
+        if _graditelj is None:
+            _graditelj = threading.Thread(target=_gradi, name='katalog', daemon=True)
+            _graditelj.start()
+
+
+def _gradi():
+    """
+    Gradi posnetke, dokler ne zgradi takega, med gradnjo katerega se baza ni
+    spremenila, in ga vklopi. Tako več zaporednih pisanj (npr. paketi uvoza)
+    sproži le eno ali dve gradnji. Če gradnja spodleti, katalog ostane
+    izklopljen do naslednje spremembe.
+    """
+    global _katalog, _graditelj
+    katalog = rod = None
+    while True:
+        with _gradnja:
+            if katalog is not None and rod == _rod and _vklopljen:
+                _katalog = katalog
+            if _katalog is not None or not _vklopljen:
+                _graditelj = None
+                return
+            rod = _rod
+        try:
+            katalog = _zgradi()
+        except Exception:
+            traceback.print_exc()
+            with _gradnja:
+                _graditelj = None
+            return
+
+
+def iz_kataloga(ime):
+    """
+    Okrasek bralne metode modela. Če je katalog vklopljen, namesto metode
+    pokliče metodo kataloga z danim imenom in ji poda vse argumente,
+    tudi privzete.
+    """
+    def okrasek(metoda):
+        podpis = inspect.signature(metoda)
+
+        @functools.wraps(metoda)
+        def ovoj(*args, **kwargs):
+            katalog = _katalog
+            if katalog is None:
+                return metoda(*args, **kwargs)
+            argumenti = podpis.bind(*args, **kwargs)
+            argumenti.apply_defaults()
+            return getattr(katalog, ime)(*argumenti.args)
+        return ovoj
+    return okrasek
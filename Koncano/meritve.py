@@ -0,0 +1,649 @@
+"""
+Meritve hitrosti in porabe pomnilnika.
+Uporaba:
+    python meritve.py zapisi [stevilo_vrstic]
+    python meritve.py niti [stevilo_poizvedb]
+    python meritve.py zagon [ponovitve]
+    python meritve.py paket [stevilo_iger] [velikost_paketa]
+    python meritve.py nadzor [stevilo_poizvedb]
+    python meritve.py priporocila [stevilo_iger]
+    python meritve.py priklic [vzorec]
+    python meritve.py streznik [trajanje] [odjemalci]
+    python meritve.py stiskanje [ponovitve]
+    python meritve.py pretok
+    python meritve.py prijave [trajanje] [odjemalci]
+    python meritve.py seje [ponovitve]
+    python meritve.py omejevanje [trajanje] [napadalci]
+"""
+import collections
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from urllib.parse import urlencode
+
+
+def _izmeri(funkcija):
+    """
+    Požene funkcijo in vrne porabljen čas v sekundah
+    ter največjo porabo pomnilnika v bajtih.
+    """
+    tracemalloc.start()
+    zacetek = time.perf_counter()
+    rezultat = funkcija()
+    cas = time.perf_counter() - zacetek
+    _, vrh = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del rezultat
+    return cas, vrh
+
+
+class _IgreSSlovarjem:
+    """
+    Prejšnja oblika razreda Igre (brez __slots__), za primerjavo.
+    """
+
+    def __init__(self, ime_igre, datum_izdaje, cena, vsebuje, razvija, povprecno_igranje
+        , mediana, ocena, *ostalo, id=None):
+        self.id = id
+        self.ime_igre = ime_igre
+        self.datum_izdaje = datum_izdaje
+        self.cena = cena
+        self.vsebuje = vsebuje
+        self.razvija = razvija
+        self.povprecno_igranje = povprecno_igranje
+        self.mediana = mediana
+        self.ocena = ocena
+        self.ostalo = ostalo
+
+
+def meritev_zapisov(stevilo_vrstic=10 ** 6):
+    """
+    Primerja čas gradnje in porabo pomnilnika seznama iger
+    za razred s slovarjem atributov in razred z __slots__.
+    """
+    from model import Igre
+
+    vrstice = [
+        ('Igra {}'.format(i), '2020-1-1', 9.99, '0 .. 20,000', i % 1000, 10, 8, 75)
+        for i in range(stevilo_vrstic)
+    ]
+
+    def staro():
+        return [_IgreSSlovarjem(ime_igre, datum_izdaje, cena, ocena, *ostalo)
+                for ime_igre, datum_izdaje, cena, ocena, *ostalo in vrstice]
+
+    def novo():
+        return [Igre(*vrstica) for vrstica in vrstice]
+
+    for ime, funkcija in [('slovar', staro), ('__slots__', novo)]:
+        cas, vrh = _izmeri(funkcija)
+        print('{:>10}: {:8.3f} s, {:8.1f} MB za {} vrstic'.format(
+            ime, cas, vrh / 2 ** 20, stevilo_vrstic))
+
+
+def meritev_niti(stevilo_poizvedb=2000):
+    """
+    Izmeri prepustnost branja podatkov o igrah pri različnem številu niti.
+    Vsaka nit uporablja svojo povezavo iz bazena.
+    """
+    from model import Igre, bazen
+
+    imena = [vrstica[0] for vrstica in bazen.bralec().execute('SELECT ime_igre FROM igra')]
+    random.seed(0)
+    izbrana = [random.choice(imena) for _ in range(stevilo_poizvedb)]
+
+    for stevilo_niti in [1, 2, 4, 8]:
+        def delavec(zacetek):
+            for ime in izbrana[zacetek::stevilo_niti]:
+                list(Igre.podatki_o_igri(ime))
+
+        niti = [threading.Thread(target=delavec, args=(i,)) for i in range(stevilo_niti)]
+        zacetek = time.perf_counter()
+        for nit in niti:
+            nit.start()
+        for nit in niti:
+            nit.join()
+        cas = time.perf_counter() - zacetek
+        print('{:>2} niti: {:8.1f} poizvedb/s'.format(stevilo_niti, stevilo_poizvedb / cas))
+
+
+def meritev_zagona(ponovitve=10):
+    """
+    Izmeri, koliko časa potrebuje nov proces, da uvozi spletni vmesnik
+    in prevede predloge, torej da je pripravljen na prve zahteve.
+    Čas zagona samega tolmača ni vštet. Posebej izpiše čas uvoza bottle,
+    na katerega nimamo vpliva.
+    """
+    program = (
+        'import time\n'
+        'zacetek = time.perf_counter()\n'
+        'import bottle\n'
+        'vmes = time.perf_counter()\n'
+        'import spletni_vmesnik\n'
+        'uvoz = time.perf_counter()\n'
+        'spletni_vmesnik.ogrej()\n'
+        'konec = time.perf_counter()\n'
+        'print(vmes - zacetek, uvoz - vmes, konec - uvoz)\n'
+    )
+    casi = []
+    for _ in range(ponovitve):
+        izpis = subprocess.run([sys.executable, '-c', program], capture_output=True, text=True, check=True)
+        casi.append([float(cas) for cas in izpis.stdout.split()])
+    casi.sort(key=sum)
+    bottle, uvoz, ogrevanje = casi[len(casi) // 2]
+    print('uvoz: {:.1f} ms (od tega bottle {:.1f} ms), predloge: {:.1f} ms, skupaj: {:.1f} ms (mediana {} zagonov)'.format(
+        1000 * (bottle + uvoz), 1000 * bottle, 1000 * ogrevanje, 1000 * (bottle + uvoz + ogrevanje), ponovitve))
+
+
+def _kopija_baze(mapa):
+    """
+    Skopira igre.db v podano mapo in nanjo preusmeri model,
+    da meritve pisanja ne spreminjajo prave baze.
+    """
+    import model
+    from povezave import Bazen
+
+    pot = os.path.join(mapa, 'igre.db')
+    with model.bazen.pisi() as conn:
+        conn.execute('PRAGMA wal_checkpoint')
+    shutil.copy('igre.db', pot)
+    model.bazen = Bazen(pot)
+    return model
+
+
+def _nove_igre(stevilo_iger, oznaka):
+    """
+    Vrne seznam novih iger z dvema založnikoma in dvema platformama.
+    """
+    from model import Igre
+
+    return [
+        Igre('{} {}'.format(oznaka, i), '2021-1-1', 9.99, '0 .. 20,000', 'Valve', 10, 8, 75,
+             ['Valve', 'Ubisoft'], ['PC', 'PS4'])
+        for i in range(stevilo_iger)
+    ]
+
+
+def meritev_paketa(stevilo_iger=2000, velikost_paketa=0):
+    """
+    Primerja hitrost dodajanja iger eno po eno (Igre.dodaj_v_bazo)
+    in v paketih (Igre.dodaj_vec_v_bazo).
+    """
+    with tempfile.TemporaryDirectory() as mapa:
+        model = _kopija_baze(mapa)
+
+        zacetek = time.perf_counter()
+        for igra in _nove_igre(stevilo_iger, 'Posamezna'):
+            # dodaj_v_bazo sprejme le enega založnika in eno platformo
+            igra.ostalo = ('Valve', 'PC')
+            igra.dodaj_v_bazo()
+            igra.id = None
+            igra.ostalo = ('Ubisoft', 'PS4')
+            igra.dodajdistributerja()
+            igra.id = None
+            igra.dodajplatformo()
+        cas = time.perf_counter() - zacetek
+        print('  posamezno: {:10.1f} iger/s'.format(stevilo_iger / cas))
+
+        zacetek = time.perf_counter()
+        model.Igre.dodaj_vec_v_bazo(_nove_igre(stevilo_iger, 'Paket'), velikost_paketa or None)
+        cas = time.perf_counter() - zacetek
+        print('     paketi: {:10.1f} iger/s (velikost paketa: {})'.format(
+            stevilo_iger / cas, velikost_paketa or 'vse'))
+
+
+def meritev_nadzora(stevilo_poizvedb=5000):
+    """
+    Primerja prepustnost branja podatkov o igrah
+    brez nadzora poizvedb in z vklopljenim nadzorom.
+    """
+    import nadzor
+    from model import Igre, bazen
+
+    imena = [vrstica[0] for vrstica in bazen.bralec().execute('SELECT ime_igre FROM igra')]
+    random.seed(0)
+    izbrana = [random.choice(imena) for _ in range(stevilo_poizvedb)]
+
+    for ime in ['izklopljen', 'vklopljen']:
+        if ime == 'vklopljen':
+            nadzor.vklopi(bazen)
+        zacetek = time.perf_counter()
+        for igra in izbrana:
+            list(Igre.podatki_o_igri(igra))
+        cas = time.perf_counter() - zacetek
+        print('{:>10}: {:8.1f} poizvedb/s'.format(ime, stevilo_poizvedb / cas))
+    nadzor.izklopi(bazen)
+
+
+def _nakljucne_znacilke(stevilo_iger):
+    """
+    Vrne naključne značilke iger s podobno porazdelitvijo kot v pravi bazi:
+    približno 20 iger na razvijalca in založnika, ena do tri platforme
+    od enajstih ter razredi cene, ocene in prodaje.
+    """
+    random.seed(0)
+    podjetja = max(stevilo_iger // 20, 1)
+    igre = {}
+    for igra in range(stevilo_iger):
+        z = {('razvija', random.randrange(podjetja)), ('zaloznik', random.randrange(podjetja)),
+             ('cena', random.randrange(6)), ('vsebuje', min(int(random.expovariate(1)), 12))}
+        if random.random() < 0.1:
+            z.add(('ocena', random.randrange(2, 10)))
+        for platforma in random.sample(range(11), random.randint(1, 3)):
+            z.add(('platforma', platforma))
+        igre[igra] = z
+    stevilke = {}
+    return {igra: frozenset(stevilke.setdefault(znacilka, len(stevilke)) for znacilka in z)
+            for igra, z in igre.items()}
+
+
+def meritev_priporocil(stevilo_iger=10 ** 5):
+    """
+    Izmeri čas izračuna podobnih iger za naključen katalog dane velikosti.
+    """
+    import priporocila
+
+    igre = _nakljucne_znacilke(stevilo_iger)
+    zacetek = time.perf_counter()
+    for _ in priporocila.najblizje(igre):
+        pass
+    cas = time.perf_counter() - zacetek
+    print('{} iger: {:.1f} s ({:.0f} µs na igro)'.format(stevilo_iger, cas, 10 ** 6 * cas / stevilo_iger))
+
+
+
+def meritev_priklica(vzorec=300):
+    """
+    Na pravi bazi primerja približne podobne igre (priporocila.najblizje)
+    z natančnimi za naključen vzorec iger. Priklic je delež približnih
+    iger, ki so vsaj tako podobne kot k-ta natančna (enako podobne igre so
+    zamenljive), razmerje pa razmerje vsot podobnosti.
+    """
+    import sqlite3
+    import priporocila
+
+    conn = sqlite3.connect('igre.db')
+    igre = priporocila.znacilke(conn)
+    conn.close()
+    random.seed(0)
+    izbrane = set(random.sample(sorted(igre), min(vzorec, len(igre))))
+    priblizne = {igra: podobne for igra, podobne in priporocila.najblizje(igre) if igra in izbrane}
+    utezi = priporocila._utezi(igre)
+    priklic = razmerje = 0
+    for igra in izbrane:
+        natancne = priporocila.natancno(igre, igra, utezi=utezi)
+        if not natancne:
+            priklic, razmerje = priklic + 1, razmerje + 1
+            continue
+        meja = natancne[-1][0] - 1e-12
+        priklic += sum(1 for podobnost, _ in priblizne[igra] if podobnost >= meja) / len(natancne)
+        razmerje += sum(podobnost for podobnost, _ in priblizne[igra]) / (
+            sum(podobnost for podobnost, _ in natancne) or 1)
+    print('{} iger v vzorcu: priklic {:.3f}, razmerje podobnosti {:.3f}'.format(
+        len(izbrane), priklic / len(izbrane), razmerje / len(izbrane)))
+
+
+# strani, ki jih pri meritvi strežnika po vrsti zahtevajo odjemalci
+STRANI = [
+    '/',
+    '/Half-Life%202/',
+    '/podjetje/Valve/',
+    '/platforme/PC/?razvrsti=ocena',
+    '/isci/?iskalni_niz=war',
+]
+
+# strežniki za meritev: ime -> program, ki zažene strežnik na vratih {vrata}
+STREZNIKI = {
+    # kot "python spletni_vmesnik.py" brez nastavitev, le brez niti,
+    # ki ob spremembah datotek ponovno naloži strežnik
+    'razvoj (wsgiref, debug)': (
+        'import bottle, spletni_vmesnik\n'
+        'spletni_vmesnik.ogrej()\n'
+        'bottle.run(port={vrata}, debug=True, quiet=True)\n'
+    ),
+    'niti (8 niti)': (
+        'import spletni_vmesnik\n'
+        'spletni_vmesnik.ogrej()\n'
+        'spletni_vmesnik.zazeni({{"nacin": "niti", "niti": 8, "vrata": {vrata}}})\n'
+    ),
+    'procesi (2 x 4 niti)': (
+        'import spletni_vmesnik\n'
+        'spletni_vmesnik.ogrej()\n'
+        'spletni_vmesnik.zazeni({{"nacin": "procesi", "procesi": 2, "niti": 4, "vrata": {vrata}}})\n'
+    ),
+}
+
+
+def _prosta_vrata():
+    import socket
+    with socket.socket() as vticnica:
+        vticnica.bind(('127.0.0.1', 0))
+        return vticnica.getsockname()[1]
+
+
+def _obremeni(vrata, trajanje, odjemalci):
+    """
+    Odjemalci v ločenih nitih dano število sekund zahtevajo strani STRANI.
+    Vrne število uspešnih zahtev na sekundo in število napak.
+    """
+    import http.client
+    stevila = [0] * odjemalci
+    napake = [0] * odjemalci
+    konec = time.perf_counter() + trajanje
+
+    def odjemalec(i):
+        while time.perf_counter() < konec:
+            povezava = http.client.HTTPConnection('127.0.0.1', vrata, timeout=30)
+            try:
+                povezava.request('GET', STRANI[stevila[i] % len(STRANI)])
+                odgovor = povezava.getresponse()
+                odgovor.read()
+                if odgovor.status == 200:
+                    stevila[i] += 1
+                else:
+                    napake[i] += 1
+            except OSError:
+                napake[i] += 1
+            finally:
+                povezava.close()
+
+    niti = [threading.Thread(target=odjemalec, args=(i,)) for i in range(odjemalci)]
+    for nit in niti:
+        nit.start()
+    for nit in niti:
+        nit.join()
+    return sum(stevila) / trajanje, sum(napake)
+
+
+def meritev_streznika(trajanje=5, odjemalci=8):
+    """
+    Za vsak strežnik iz STREZNIKI izmeri, koliko zahtev na sekundo
+    postreže hkratnim odjemalcem.
+    """
+    import socket
+    for ime, program in STREZNIKI.items():
+        vrata = _prosta_vrata()
+        proces = subprocess.Popen([sys.executable, '-c', program.format(vrata=vrata)],
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            for _ in range(100):
+                try:
+                    socket.create_connection(('127.0.0.1', vrata), timeout=1).close()
+                    break
+                except OSError:
+                    time.sleep(0.1)
+            _obremeni(vrata, 1, odjemalci)  # ogrevanje
+            na_sekundo, napake = _obremeni(vrata, trajanje, odjemalci)
+            print('{:<25} {:8.1f} zahtev/s, napak: {}'.format(ime, na_sekundo, napake))
+        finally:
+            proces.terminate()
+            proces.wait()
+
+
+SEZNAMI = [
+    '/glej_vse_igre/',
+    '/glej_vse_igre/po_imenih/',
+    '/glej_vse_igre/po_datumu/',
+    '/glej_vse_igre/po_ceni/',
+    '/glej_vse_igre/po_oceni/',
+    '/',
+]
+
+
+def meritev_stiskanja(ponovitve=3):
+    """
+    Za strani iz SEZNAMI izmeri bajte na povezavi in procesorski čas
+    na zahtevo brez stiskanja, s stiskanjem gzip in s stiskanjem
+    ob vklopljenem predpomnilniku strani, ki hrani stisnjene strani.
+    """
+    import io
+    import bottle
+    import predpomnilnik
+    import spletni_vmesnik
+    import stiskanje
+    from wsgiref.util import setup_testing_defaults
+    gzip = stiskanje.Stiskanje(bottle.default_app())
+    aplikacije = [
+        ('brez stiskanja', bottle.default_app()),
+        ('gzip', gzip),
+        ('gzip, raven 1', stiskanje.Stiskanje(bottle.default_app(), raven=1)),
+        ('gzip, predpomnilnik', gzip),
+    ]
+
+    def zahteva(app, pot):
+        environ = {'PATH_INFO': pot, 'HTTP_ACCEPT_ENCODING': 'gzip', 'wsgi.input': io.BytesIO()}
+        setup_testing_defaults(environ)
+        telo = app(environ, lambda status, glave, exc_info=None: None)
+        return sum(map(len, telo))
+
+    for ime, app in aplikacije:
+        if ime == 'gzip, predpomnilnik':
+            predpomnilnik.vklopi(stiskanje=gzip)
+        for pot in SEZNAMI:
+            zahteva(app, pot)  # ogrevanje
+            zacetek = time.process_time()
+            bajti = sum(zahteva(app, pot) for _ in range(ponovitve))
+            cas = (time.process_time() - zacetek) / ponovitve
+            print('{:<28} {:<20} {:>10} B {:8.1f} ms'.format(pot, ime, bajti // ponovitve, 1000 * cas))
+
+
+def meritev_pretoka():
+    """
+    Za strani s seznami izmeri čas do prvega bajta in največjo porabo
+    pomnilnika, če odgovor pošiljamo po kosih (pretočno) in če ga pred
+    pošiljanjem sestavimo v celoti (kot prej bottle.template).
+    """
+    import io
+    import bottle
+    import spletni_vmesnik
+    from wsgiref.util import setup_testing_defaults
+
+    def zahteva(pot, poizvedba):
+        environ = {'PATH_INFO': pot, 'QUERY_STRING': poizvedba, 'wsgi.input': io.BytesIO()}
+        setup_testing_defaults(environ)
+        return iter(bottle.default_app()(environ, lambda status, glave, exc_info=None: None))
+
+    def pretocno(pot, poizvedba):
+        for kos in zahteva(pot, poizvedba):
+            pass
+
+    def v_celoti(pot, poizvedba):
+        return b''.join(zahteva(pot, poizvedba))
+
+    for pot, poizvedba in [('/glej_vse_igre/po_imenih/', ''), ('/isci/', 'iskalni_niz=a')]:
+        zahteva(pot, poizvedba)  # ogrevanje
+        zacetek = time.perf_counter()
+        kosi = zahteva(pot, poizvedba)
+        next(kosi)
+        prvi = time.perf_counter() - zacetek
+        for kos in kosi:
+            pass
+        cas = time.perf_counter() - zacetek
+        print('{}{}: prvi bajt po {:.1f} ms, celotna stran po {:.1f} ms'.format(
+            pot, poizvedba and '?' + poizvedba, 1000 * prvi, 1000 * cas))
+        for ime, funkcija in [('pretočno', pretocno), ('v celoti', v_celoti)]:
+            _, vrh = _izmeri(lambda: funkcija(pot, poizvedba))
+            print('    {:<10} največ {:6.1f} MB pomnilnika'.format(ime, vrh / 2**20))
+
+
+def meritev_prijav(trajanje=3, odjemalci=8):
+    """
+    Izmeri, koliko prijav (zgoščevanj gesel) na sekundo zmore strežnik,
+    če gesla zgoščujejo niti same ali bazen z različnim številom procesov.
+    Med prijavami glavna nit ponavlja delo, podobno izrisu strani,
+    in meri, koliko časa traja.
+    """
+    import statistics
+    import geslo
+
+    def stran():
+        zacetek = time.perf_counter()
+        sum(i * i for i in range(200000))
+        return time.perf_counter() - zacetek
+
+    jedra = os.cpu_count() or 1
+    print('{} jeder, {} odjemalcev'.format(jedra, odjemalci))
+    prazno = statistics.median(stran() for _ in range(20))
+    print('{:<12} stran {:6.1f} ms'.format('brez prijav', 1000 * prazno))
+    for procesi in [None] + sorted({1, 2, jedra // 2 or 1, jedra}):
+        zgoscevalnik = None
+        zgosti = geslo._zgosti
+        if procesi is not None:
+            zgoscevalnik = geslo.Zgoscevalnik(procesi, vrsta=odjemalci)
+            zgosti = zgoscevalnik.zgosti
+            # ogrevanje: zagon procesov
+            for nit in [threading.Thread(target=zgosti, args=('geslo', b'sol')) for _ in range(procesi)]:
+                nit.start()
+                nit.join()
+        stevilo = [0, 0]
+        konec = time.perf_counter() + trajanje
+
+        def odjemalec():
+            while time.perf_counter() < konec:
+                try:
+                    zgosti('geslo', os.urandom(32))
+                    stevilo[0] += 1
+                except geslo.Zasedeno:
+                    stevilo[1] += 1
+
+        niti = [threading.Thread(target=odjemalec) for _ in range(odjemalci)]
+        zacetek = time.perf_counter()
+        for nit in niti:
+            nit.start()
+        casi = []
+        while time.perf_counter() < konec:
+            casi.append(stran())
+        for nit in niti:
+            nit.join()
+        cas = time.perf_counter() - zacetek
+        if zgoscevalnik is not None:
+            zgoscevalnik.zapri()
+        print('{:<12} {:7.1f} prijav/s, {} zavrnjenih, stran {:6.1f} ms'.format(
+            'v nitih' if procesi is None else '{} procesi'.format(procesi),
+            stevilo[0] / cas, stevilo[1], 1000 * statistics.median(casi)))
+
+
+def meritev_sej(ponovitve=20000):
+    """
+    Izmeri čas preverjanja prijave na zahtevo: prej je vsaka stran
+    trikrat prebrala piškotek, ki ga podpiše bottle (vloga za predpomnilnik,
+    zahtevaj_prijavo in ime v predlogi), zdaj žeton seje preverimo enkrat.
+    """
+    import bottle
+    import seja
+    skrivnost = 'skrivnost' * 4
+    bottle.response.bind()
+    bottle.response.set_cookie('uporabnik', 'admin', path='/', secret=skrivnost)
+    stari = dict(bottle.response.headerlist)['Set-Cookie'].split(';')[0]
+    nov = seja.PISKOTEK + '=' + seja.zeton(1, 'admin', skrivnost)
+
+    def bottle_piskotek():
+        for _ in range(3):
+            bottle.request.get_cookie('uporabnik', secret=skrivnost)
+
+    def zeton_seje():
+        for _ in range(3):
+            seja.trenutna(skrivnost)
+
+    for ime, piskotek, preveri in [('piškotek bottle', stari, bottle_piskotek), ('žeton seje', nov, zeton_seje)]:
+        zacetek = time.perf_counter()
+        for _ in range(ponovitve):
+            bottle.request.bind({'HTTP_COOKIE': piskotek})
+            preveri()
+        cas = (time.perf_counter() - zacetek) / ponovitve
+        print('{:<16} {:3} B, {:6.1f} µs na zahtevo'.format(ime, len(piskotek), 10 ** 6 * cas))
+
+
+def meritev_omejevanja(trajanje=3, napadalci=8):
+    """
+    Med napadom, ko napadalci z enega naslova IP ugibajo geslo uporabnika
+    admin, izmeri čas prijav drugih uporabnikov z drugih naslovov, brez
+    omejevanja poskusov in z njim. Napadalec med zahtevami počaka 10 ms
+    (kot bi čakal na omrežje), sicer bi le tekmoval za GIL.
+    """
+    import io
+    import statistics
+    import bottle
+    import omejevanje
+    import spletni_vmesnik
+    from wsgiref.util import setup_testing_defaults
+
+    def prijava(ip, ime, geslo):
+        telo = urlencode({'uporabnisko_ime': ime, 'geslo': geslo}).encode()
+        environ = {'PATH_INFO': '/prijava/', 'REQUEST_METHOD': 'POST', 'REMOTE_ADDR': ip,
+                   'CONTENT_TYPE': 'application/x-www-form-urlencoded',
+                   'CONTENT_LENGTH': str(len(telo)), 'wsgi.input': io.BytesIO(telo)}
+        setup_testing_defaults(environ)
+        stanje = []
+        b''.join(bottle.default_app()(environ, lambda status, glave, exc_info=None: stanje.append(status)))
+        return stanje[0]
+
+    with tempfile.TemporaryDirectory() as mapa:
+        model = _kopija_baze(mapa)
+        uporabniki = ['gost{}'.format(i) for i in range(20)]
+        for uporabnik in uporabniki:
+            model.Uporabnik(uporabnik).dodaj_v_bazo(uporabnik)
+
+        def prijave(casi, stanja):
+            for i, uporabnik in enumerate(uporabniki):
+                zacetek = time.perf_counter()
+                stanja[prijava('10.0.1.{}'.format(i), uporabnik, uporabnik)] += 1
+                casi.append(time.perf_counter() - zacetek)
+
+        casi = []
+        prijave(casi, collections.Counter())
+        prazno = statistics.median(casi)
+        print('{:<16} prijava {:6.1f} ms'.format('brez napada', 1000 * prazno))
+        for ime, vklopljeno in [('brez omejevanja', False), ('z omejevanjem', True)]:
+            if vklopljeno:
+                omejevanje.vklopi()
+            napadi = collections.Counter()
+            konec = time.perf_counter() + trajanje
+
+            def napadalec():
+                while time.perf_counter() < konec:
+                    napadi[prijava('10.0.0.1', 'admin', str(random.random()))] += 1
+                    time.sleep(0.01)
+
+            niti = [threading.Thread(target=napadalec) for _ in range(napadalci)]
+            for nit in niti:
+                nit.start()
+            casi, stanja = [], collections.Counter()
+            zacetek = time.perf_counter()
+            while time.perf_counter() < konec:
+                prijave(casi, stanja)
+            cas = time.perf_counter() - zacetek
+            for nit in niti:
+                nit.join()
+            print('{:<16} prijava {:6.1f} ms, {:5.1f} prijav/s {}, napadi: {}'.format(
+                ime, 1000 * statistics.median(casi), len(casi) / cas, dict(stanja), dict(napadi)))
+
+
+MERITVE = {
+    'zapisi': meritev_zapisov,
+    'niti': meritev_niti,
+    'zagon': meritev_zagona,
+    'paket': meritev_paketa,
+    'nadzor': meritev_nadzora,
+    'priporocila': meritev_priporocil,
+    'priklic': meritev_priklica,
+    'streznik': meritev_streznika,
+    'stiskanje': meritev_stiskanja,
+    'pretok': meritev_pretoka,
+    'prijave': meritev_prijav,
+    'seje': meritev_sej,
+    'omejevanje': meritev_omejevanja,
+}
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] not in MERITVE:
+        print(__doc__)
+        sys.exit(1)
+    MERITVE[sys.argv[1]](*map(int, sys.argv[2:]))
@@ -1,12 +1,84 @@
 import baza
-import sqlite3
+import katalog
+import spremembe
 from geslo import sifriraj_geslo, preveri_geslo
+from povezave import Bazen
 
-conn = sqlite3.connect('igre.db')
-baza.ustvari_bazo_ce_ne_obstaja(conn)
-conn.execute('PRAGMA foreign_keys = ON')
+# Povezave se odprejo šele ob prvi poizvedbi.
+# Bazo ustvarimo posebej, z ukazom "python baza.py".
+bazen = Bazen('igre.db')
 
-uporabnik, podjetje, igra, platforma, distributira, podpira = baza.pripravi_tabele(conn)
+STRAN = 50  # privzeto število iger na eni strani seznama
+
+# Razvrstitve seznamov iger: ime -> (atribut igre, izraz v SQL, smer, tip vrednosti).
+# Manjkajoče cene in ocene štejejo kot -1, da lahko igre po njih
+# listamo po straneh (pogoj "za ključem zadnje igre").
+RAZVRSTITVE = {
+    'id': ('id', 'igra.id', 'ASC', int),
+    'ime': ('ime_igre', 'igra.ime_igre', 'ASC', str),
+    'datum': ('datum_izdaje', 'igra.datum_izdaje', 'DESC', str),
+    'ocena': ('ocena', 'ifnull(igra.ocena, -1)', 'DESC', float),
+    'cena': ('cena', 'ifnull(igra.cena, -1)', 'ASC', float),
+}
+
+# Delež iger na platformi, nad katerim seznam iger platforme beremo
+# po indeksu razvrstitve, sicer pa po indeksu podpira_platforma.
+GOSTA_PLATFORMA = 1 / 20
+
+
+def _stevilo(vrednost):
+    """
+    Vrne vrednost številskega stolpca za zapis v bazo: neizpolnjeno
+    polje obrazca (prazen niz) zapišemo kot NULL.
+    """
+    return None if vrednost == '' else vrednost
+
+
+def _seznam_imen(imena):
+    """
+    Vrne seznam različnih imen iz podanega imena ali seznama imen.
+    """
+    if imena is None:
+        return []
+    if isinstance(imena, str):
+        return [imena]
+    return list(dict.fromkeys(imena))
+
+
+def _stran_po(razvrsti, od):
+    """
+    Vrne pogoj, ki izbere igre za ključem od, in vrstni red za dano razvrstitev.
+    Pogoj uporablja parametra :vrednost in :id.
+    Argumenti:
+    - razvrsti: ime razvrstitve iz RAZVRSTITVE
+    - od: par (vrednost, id) zadnje igre na prejšnji strani ali None
+    """
+    _, izraz, smer, _ = RAZVRSTITVE[razvrsti]
+    primerjava = '>' if smer == 'ASC' else '<'
+    if razvrsti == 'id':
+        vrstni_red = 'igra.id {}'.format(smer)
+        pogoj = 'igra.id {} :id'.format(primerjava)
+    else:
+        vrstni_red = '{0} {1}, igra.id {1}'.format(izraz, smer)
+        # tako zapisan pogoj uporabi indeks razvrstitve, primerjava parov pa ne
+        pogoj = '{0} {1}= :vrednost AND ({0} {1} :vrednost OR igra.id {1} :id)'.format(izraz, primerjava)
+    if od is None:
+        pogoj = '1'
+    return pogoj, vrstni_red
+
+
+def _id_po_imenih(conn, tabela, imena, velikost=500):
+    """
+    Vrne slovar, ki imenom iz podane tabele priredi njihove id-je.
+    Imena poišče v skupinah, da ne preseže omejitve števila parametrov.
+    """
+    imena = [ime for ime in imena if ime is not None]
+    id_po_imenih = {}
+    for zacetek in range(0, len(imena), velikost):
+        skupina = imena[zacetek:zacetek + velikost]
+        sql = "SELECT ime, id FROM {} WHERE ime IN ({})".format(tabela, ", ".join("?" * len(skupina)))
+        id_po_imenih.update(conn.execute(sql, skupina))
+    return id_po_imenih
 
 
 class LoginError(Exception):
@@ -21,6 +93,8 @@ class Uporabnik:
     Razred za uporabnika.
     """
 
+    __slots__ = ('id', 'ime')
+
     def __init__(self, ime, *, id=None):
         """
         Konstruktor uporabnika.
@@ -45,7 +119,7 @@ class Uporabnik:
             WHERE ime = ?
         """
         try:
-            id, zgostitev, sol = conn.execute(sql, [ime]).fetchone()
+            id, zgostitev, sol = bazen.bralec().execute(sql, [ime]).fetchone()
             if preveri_geslo(geslo, zgostitev, sol):
                 return Uporabnik(ime, id=id)
         except TypeError:
@@ -58,15 +132,21 @@ class Uporabnik:
         """
         assert self.id is None
         zgostitev, sol = sifriraj_geslo(geslo)
-        with conn:
-            self.id = uporabnik.dodaj_vrstico(ime=self.ime, zgostitev=zgostitev, sol=sol)
+        with bazen.pisi() as conn:
+            self.id = baza.Uporabnik(conn).dodaj_vrstico(ime=self.ime, zgostitev=zgostitev, sol=sol)
+        spremembe.obdelaj()
 
 
 class Igre:
     """
     Razred za igre.
+    Namesto slovarja atributov uporablja __slots__, saj seznami iger
+    ustvarijo po en objekt za vsako vrstico v tabeli.
     """
 
+    __slots__ = ('id', 'ime_igre', 'datum_izdaje', 'cena', 'vsebuje', 'razvija',
+                 'povprecno_igranje', 'mediana', 'ocena', 'ostalo')
+
     def __init__(self, ime_igre, datum_izdaje, cena, vsebuje, razvija, povprecno_igranje
         , mediana, ocena, *ostalo, id=None):
         """
@@ -83,7 +163,19 @@ class Igre:
         self.ocena = ocena
         self.ostalo = ostalo
 
+    def kljuc(self, razvrsti):
+        """
+        Vrne par (vrednost, id), po katerem je igra urejena v dani razvrstitvi.
+        Manjkajoče število (None ali prazen niz iz obrazca) šteje kot -1.
+        """
+        atribut, _, _, tip = RAZVRSTITVE[razvrsti]
+        vrednost = getattr(self, atribut)
+        if vrednost is None or (vrednost == '' and tip is not str):
+            return -1, self.id
+        return tip(vrednost), self.id
+
     @staticmethod
+    @katalog.iz_kataloga('najnovejse_igre')
     def najnovejse_igre():
         """
         Vrne najboljših 10 filmov v danem letu.
@@ -94,10 +186,11 @@ class Igre:
             ORDER BY datum_izdaje DESC
             LIMIT 10
         """
-        for ime_igre, datum_izdaje, *ostalo in conn.execute(sql):
-            yield Igre(ime_igre, datum_izdaje, *ostalo)
+        for vrstica in bazen.bralec().execute(sql):
+            yield Igre(*vrstica)
 
     @staticmethod
+    @katalog.iz_kataloga('podatki_o_igri')
     def podatki_o_igri(igra):
         """
         Vrne vse podatke o igri.
@@ -114,7 +207,7 @@ class Igre:
                       LEFT JOIN podjetje AS razvijalec ON (igra.razvija = razvijalec.id)
             WHERE igra.ime_igre == ?
         """
-        a = [vrsta for vrsta in conn.execute(sql, [igra]).fetchall()]
+        a = [vrsta for vrsta in bazen.bralec().execute(sql, [igra]).fetchall()]
         if len(a) != 0:
             tabela = list(a[0][:8])
             for i in range(len(a)):
@@ -125,19 +218,90 @@ class Igre:
             yield Igre(tabela[0], tabela[1], tabela[2], tabela[3], tabela[4], tabela[5], tabela[6], tabela[7], tabela[8], tabela[9])
 
     @staticmethod
+    @katalog.iz_kataloga('igre_po_id')
+    def igre_po_id(ids):
+        """
+        Vrne igre z danimi id-ji, urejene po id-ju.
+        """
+        sql = """
+            SELECT ime_igre, datum_izdaje, cena, vsebuje, razvija, povprecno_igranje, mediana, ocena, id
+            FROM igra
+            WHERE id IN ({})
+            ORDER BY id
+        """.format(", ".join("?" * len(ids)))
+        for *vrstica, id in bazen.bralec().execute(sql, list(ids)):
+            yield Igre(*vrstica, id=id)
+
+    @staticmethod
+    def podobne_igre(igra):
+        """
+        Vrne igre, podobne igri z danim imenom, od najpodobnejše naprej.
+        Podobne igre so vnaprej izračunane (glej priporocila.py).
+        """
+        sql = """
+            SELECT igra.ime_igre, igra.datum_izdaje, igra.cena, igra.vsebuje, igra.razvija,
+                   igra.povprecno_igranje, igra.mediana, igra.ocena, igra.id
+            FROM podobne_igre
+            JOIN igra ON (igra.id = podobne_igre.podobna)
+            WHERE podobne_igre.igra = (SELECT id FROM igra WHERE ime_igre = ?)
+            ORDER BY podobne_igre.mesto
+        """
+        for *vrstica, id in bazen.bralec().execute(sql, [igra]):
+            yield Igre(*vrstica, id=id)
+
+    @staticmethod
+    @katalog.iz_kataloga('poisci')
     def poisci(niz):
         """
         Vrne vse igre, ki v imenu vsebujejo dani niz.
         """
         sql = """
-            SELECT ime_igre, datum_izdaje, cena, vsebuje, razvija, povprecno_igranje, mediana, ocena
+            SELECT id, ime_igre, datum_izdaje, cena, vsebuje, razvija, povprecno_igranje, mediana, ocena
             FROM igra
             WHERE ime_igre LIKE ?
         """
-        for ime_igre, *ostalo in conn.execute(sql, ['%' + niz + '%']):
-            yield Igre(ime_igre, *ostalo)
+        for id, *vrstica in bazen.bralec().execute(sql, ['%' + niz + '%']):
+            yield Igre(*vrstica, id=id)
+
+    @staticmethod
+    @katalog.iz_kataloga('seznam_iger')
+    def seznam(razvrsti='id', od=None, koliko=STRAN):
+        """
+        Vrne stran vseh iger v dani razvrstitvi.
+        Poizvedba prebere le igre na strani (indeks razvrstitve).
+        Argumenti:
+        - razvrsti: ime razvrstitve iz RAZVRSTITVE
+        - od: par (vrednost, id) zadnje igre na prejšnji strani ali None
+        - koliko: največje število vrnjenih iger
+        """
+        pogoj, vrstni_red = _stran_po(razvrsti, od)
+        sql = """
+            SELECT id, ime_igre, datum_izdaje, cena, vsebuje, razvija, povprecno_igranje, mediana, ocena
+            FROM igra
+            WHERE {}
+            ORDER BY {}
+            LIMIT :koliko
+        """.format(pogoj, vrstni_red)
+        vrednost, id = od if od is not None else (None, None)
+        for id, *vrstica in bazen.bralec().execute(sql, {'vrednost': vrednost, 'id': id, 'koliko': koliko}):
+            yield Igre(*vrstica, id=id)
 
     @staticmethod
+    @katalog.iz_kataloga('povezave_igre')
+    def povezave(id):
+        """
+        Vrne par urejenih seznamov: id-je platform, ki podpirajo igro
+        z danim id-jem, in id-je podjetij, ki so jo izdala.
+        """
+        conn = bazen.bralec()
+        platforme = [platforma for platforma, in conn.execute(
+            "SELECT platforma FROM podpira WHERE ime_igre = ? ORDER BY platforma", [id])]
+        zalozniki = [podjetje for podjetje, in conn.execute(
+            "SELECT podjetje FROM distributira WHERE ime_igre = ? ORDER BY podjetje", [id])]
+        return platforme, zalozniki
+
+    @staticmethod
+    @katalog.iz_kataloga('glej_vse_igre')
     def glej_vse_igre():
         """
         Vrne vse podatke o igri.
@@ -146,10 +310,11 @@ class Igre:
                 SELECT ime_igre, datum_izdaje, cena, vsebuje, razvija, povprecno_igranje, mediana, ocena
                 FROM igra DESC
             """
-        for ime_igre, datum_izdaje, cena, ocena, *ostalo  in conn.execute(sql):
-            yield Igre(ime_igre, datum_izdaje, cena, ocena, *ostalo)
+        for vrstica in bazen.bralec().execute(sql):
+            yield Igre(*vrstica)
 
     @staticmethod
+    @katalog.iz_kataloga('glej_vse_igre_imena')
     def glej_vse_igre_imena():
         """
         Vrne vse podatke o igri razvrščeno po imenu.
@@ -159,10 +324,11 @@ class Igre:
                 FROM igra
                 ORDER BY ime_igre
             """
-        for ime_igre, datum_izdaje, cena, ocena, *ostalo  in conn.execute(sql):
-            yield Igre(ime_igre, datum_izdaje, cena, ocena, *ostalo)
+        for vrstica in bazen.bralec().execute(sql):
+            yield Igre(*vrstica)
 
     @staticmethod
+    @katalog.iz_kataloga('glej_vse_igre_datum')
     def glej_vse_igre_datum():
         """
         Vrne vse podatke o igri po datumu.
@@ -172,11 +338,12 @@ class Igre:
                 FROM igra
                 ORDER BY datum_izdaje DESC
             """
-        for ime_igre, datum_izdaje, cena, ocena, *ostalo  in conn.execute(sql):
-            yield Igre(ime_igre, datum_izdaje, cena, ocena, *ostalo)
+        for vrstica in bazen.bralec().execute(sql):
+            yield Igre(*vrstica)
     
     
     @staticmethod
+    @katalog.iz_kataloga('glej_vse_igre_cena')
     def glej_vse_igre_cena():
         """
         Vrne vse podatke o igri po ceni.
@@ -186,10 +353,11 @@ class Igre:
                 FROM igra
                 ORDER BY cena ASC NULLS LAST
             """
-        for ime_igre, datum_izdaje, cena, ocena, *ostalo  in conn.execute(sql):
-            yield Igre(ime_igre, datum_izdaje, cena, ocena, *ostalo)
+        for vrstica in bazen.bralec().execute(sql):
+            yield Igre(*vrstica)
 
     @staticmethod
+    @katalog.iz_kataloga('glej_vse_igre_ocena')
     def glej_vse_igre_ocena():
         """
         Vrne vse podatke o igri po oceni.
@@ -199,10 +367,11 @@ class Igre:
                 FROM igra
                 ORDER BY ocena DESC NULLS LAST
             """
-        for ime_igre, datum_izdaje, cena, ocena, *ostalo  in conn.execute(sql):
-            yield Igre(ime_igre, datum_izdaje, cena, ocena, *ostalo)
+        for vrstica in bazen.bralec().execute(sql):
+            yield Igre(*vrstica)
 
     @staticmethod
+    @katalog.iz_kataloga('imena_iger')
     def imena_iger():
         """
         Vrne vsa imena video iger v bazi.
@@ -211,23 +380,36 @@ class Igre:
                 SELECT ime_igre
                 FROM igra
             """
-        a = [vrsta[0] for vrsta in conn.execute(sql).fetchall()]
+        a = [vrsta[0] for vrsta in bazen.bralec().execute(sql).fetchall()]
         return a
 
+    @staticmethod
+    @katalog.iz_kataloga('stevilo_iger')
+    def stevilo_iger():
+        """
+        Vrne število video iger v bazi.
+        """
+        sql = """
+                SELECT COUNT(*)
+                FROM igra
+            """
+        return bazen.bralec().execute(sql).fetchone()[0]
+
 
     def dodaj_v_bazo(self):
         """
         V bazo doda igro.
         """
         assert self.id is None
-        with conn:
-            id = igra.dodaj_vrstico(ime_igre=self.ime_igre, datum_izdaje=self.datum_izdaje, cena=self.cena,vsebuje=self.vsebuje,
-            razvija=self.razvija,povprecno_igranje=self.povprecno_igranje, mediana=self.mediana, ocena=self.ocena)
+        with bazen.pisi() as conn:
+            id = baza.Igra(conn).dodaj_vrstico(ime_igre=self.ime_igre, datum_izdaje=self.datum_izdaje, cena=_stevilo(self.cena),vsebuje=self.vsebuje,
+            razvija=self.razvija,povprecno_igranje=_stevilo(self.povprecno_igranje), mediana=_stevilo(self.mediana), ocena=_stevilo(self.ocena))
 
-            distributira.dodaj_vrstico(ime_igre=id, podjetje=self.ostalo[0])
-            podpira.dodaj_vrstico(ime_igre=id, platforma=self.ostalo[1])
+            baza.Distributira(conn).dodaj_vrstico(ime_igre=id, podjetje=self.ostalo[0])
+            baza.Podpira(conn).dodaj_vrstico(ime_igre=id, platforma=self.ostalo[1])
 
             self.id = id
+        spremembe.obdelaj()
     
     def dodajplatformo(self):
         '''
@@ -239,11 +421,12 @@ class Igre:
             FROM igra
             WHERE ime_igre = ?
             """
-        id = conn.execute(sql, [self.ime_igre]).fetchall()
         assert self.id is None
-        with conn:
-            podpira.dodaj_vrstico(ime_igre=id[0][0], platforma = self.ostalo[1])
+        with bazen.pisi() as conn:
+            id = conn.execute(sql, [self.ime_igre]).fetchall()
+            baza.Podpira(conn).dodaj_vrstico(ime_igre=id[0][0], platforma = self.ostalo[1])
             self.id = id[0][0]
+        spremembe.obdelaj()
 
     def dodajdistributerja(self):
         '''
@@ -255,11 +438,12 @@ class Igre:
             FROM igra
             WHERE ime_igre = ?
             """
-        id = conn.execute(sql, [self.ime_igre]).fetchall()
         assert self.id is None
-        with conn:
-            distributira.dodaj_vrstico(ime_igre=id[0][0], podjetje = self.ostalo[0])
+        with bazen.pisi() as conn:
+            id = conn.execute(sql, [self.ime_igre]).fetchall()
+            baza.Distributira(conn).dodaj_vrstico(ime_igre=id[0][0], podjetje = self.ostalo[0])
             self.id = id[0][0]
+        spremembe.obdelaj()
     
     def spremeni_podatke(self):
         '''
@@ -270,8 +454,60 @@ class Igre:
                 SET datum_izdaje = ?, cena = ?, vsebuje = ?, povprecno_igranje = ?, mediana = ?, ocena = ?
                 WHERE ime_igre = ?
             """
-        conn.execute(sql, [self.datum_izdaje, self.cena, self.vsebuje, self.povprecno_igranje, self.mediana, self.ocena, self.ime_igre])
-        conn.commit()
+        with bazen.pisi() as conn:
+            conn.execute(sql, [self.datum_izdaje, _stevilo(self.cena), self.vsebuje, _stevilo(self.povprecno_igranje),
+                               _stevilo(self.mediana), _stevilo(self.ocena), self.ime_igre])
+        spremembe.obdelaj()
+
+    @staticmethod
+    def dodaj_vec_v_bazo(igre, velikost_paketa=None):
+        """
+        V bazo doda več iger skupaj z njihovimi založniki in platformami.
+        Imena razvijalcev, založnikov in platform razreši naenkrat,
+        transakcijo pa potrdi enkrat za vsak paket iger.
+        Argumenti:
+        - igre: igre, pri katerih je ostalo[0] ime ali seznam imen založnikov,
+          ostalo[1] pa ime ali seznam imen platform
+        - velikost_paketa: število iger v eni transakciji (None pomeni vse naenkrat)
+        Če paket ne uspe, so igre iz že potrjenih paketov ostale v bazi.
+        Vrne število dodanih iger.
+        """
+        igre = list(igre)
+        zalozniki = [_seznam_imen(igra.ostalo[0] if len(igra.ostalo) > 0 else None) for igra in igre]
+        platforme = [_seznam_imen(igra.ostalo[1] if len(igra.ostalo) > 1 else None) for igra in igre]
+        with bazen.pisi() as conn:
+            podjetja = _id_po_imenih(conn, 'podjetje',
+                {igra.razvija for igra in igre} | {ime for imena in zalozniki for ime in imena})
+            platforme_id = _id_po_imenih(conn, 'platforma', {ime for imena in platforme for ime in imena})
+
+        sql = """
+            INSERT INTO igra (ime_igre, datum_izdaje, cena, vsebuje, razvija, povprecno_igranje, mediana, ocena)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """
+        velikost_paketa = velikost_paketa or len(igre) or 1
+        for zacetek in range(0, len(igre), velikost_paketa):
+            konec = zacetek + velikost_paketa
+            id_iger = []
+            distributira = []
+            podpira = []
+            with bazen.pisi() as conn:
+                for igra, imena_zaloznikov, imena_platform in zip(
+                        igre[zacetek:konec], zalozniki[zacetek:konec], platforme[zacetek:konec]):
+                    assert igra.id is None
+                    id = conn.execute(sql, [
+                        igra.ime_igre, igra.datum_izdaje, _stevilo(igra.cena), igra.vsebuje,
+                        podjetja.get(igra.razvija, igra.razvija),
+                        _stevilo(igra.povprecno_igranje), _stevilo(igra.mediana), _stevilo(igra.ocena)]).lastrowid
+                    distributira.extend((podjetja.get(ime, ime), id) for ime in imena_zaloznikov)
+                    podpira.extend((id, platforme_id.get(ime, ime)) for ime in imena_platform)
+                    id_iger.append(id)
+                conn.executemany('INSERT INTO distributira (podjetje, ime_igre) VALUES (?, ?)', distributira)
+                conn.executemany('INSERT INTO podpira (ime_igre, platforma) VALUES (?, ?)', podpira)
+            # id-je nastavimo šele, ko je paket potrjen
+            for igra, id in zip(igre[zacetek:konec], id_iger):
+                igra.id = id
+            spremembe.obdelaj()
+        return len(igre)
 
 
 class Podjetje:
@@ -279,6 +515,8 @@ class Podjetje:
     Razred za podjetja.
     """
 
+    __slots__ = ('id', 'ime', 'drzava', 'datum_ustanovitve', 'opis')
+
     def __init__(self, ime, drzava, datum_ustanovitve, opis, id=None):
         """
         Konstruktor podjetja.
@@ -293,19 +531,122 @@ class Podjetje:
         return self.ime
 
     @staticmethod
+    @katalog.iz_kataloga('podatki_o_podjetju')
     def podatki_o_podjetju(podjetje):
         """
         Vrne vse podatke o podjetju.
         """
         sql = """
-            SELECT ime, drzava, datum_ustanovitve, opis
+            SELECT ime, drzava, datum_ustanovitve, opis, id
             FROM podjetje
             WHERE ime == ?
         """
-        for ime, drzava, datum_ustanovitve, opis in conn.execute(sql, [podjetje]):
-            yield Podjetje(ime, drzava, datum_ustanovitve, opis)
+        for ime, drzava, datum_ustanovitve, opis, id in bazen.bralec().execute(sql, [podjetje]):
+            yield Podjetje(ime, drzava, datum_ustanovitve, opis, id)
+
+    @staticmethod
+    @katalog.iz_kataloga('podjetje_po_id')
+    def po_id(id):
+        """
+        Vrne podjetje z danim id-jem (če obstaja).
+        """
+        sql = """
+            SELECT ime, drzava, datum_ustanovitve, opis, id
+            FROM podjetje
+            WHERE id = ?
+        """
+        for vrstica in bazen.bralec().execute(sql, [id]):
+            yield Podjetje(*vrstica)
+
+    @staticmethod
+    @katalog.iz_kataloga('seznam_podjetij')
+    def seznam(od=-1, koliko=STRAN):
+        """
+        Vrne stran podjetij, urejenih po id-ju.
+        Argumenti:
+        - od: id zadnjega podjetja na prejšnji strani
+        - koliko: največje število vrnjenih podjetij
+        """
+        sql = """
+            SELECT ime, drzava, datum_ustanovitve, opis, id
+            FROM podjetje
+            WHERE id > ?
+            ORDER BY id
+            LIMIT ?
+        """
+        for vrstica in bazen.bralec().execute(sql, [od, koliko]):
+            yield Podjetje(*vrstica)
+
+    @staticmethod
+    @katalog.iz_kataloga('razvite_igre')
+    def razvite_igre(podjetje, od=0, koliko=STRAN):
+        """
+        Vrne stran iger, ki jih je razvilo podjetje, urejenih po id-ju.
+        Poizvedba prebere le igre na strani (indeks igra_razvija).
+        Argumenti:
+        - podjetje: id podjetja
+        - od: id zadnje igre na prejšnji strani
+        - koliko: največje število vrnjenih iger
+        """
+        sql = """
+            SELECT id, ime_igre, datum_izdaje, cena, vsebuje, razvija, povprecno_igranje, mediana, ocena
+            FROM igra
+            WHERE razvija = ? AND id > ?
+            ORDER BY id
+            LIMIT ?
+        """
+        for id, *vrstica in bazen.bralec().execute(sql, [podjetje, od, koliko]):
+            yield Igre(*vrstica, id=id)
+
+    @staticmethod
+    @katalog.iz_kataloga('izdane_igre')
+    def izdane_igre(podjetje, od=0, koliko=STRAN):
+        """
+        Vrne stran iger, ki jih je izdalo podjetje, urejenih po id-ju.
+        Poizvedba prebere le igre na strani (indeks distributira_podjetje).
+        Argumenti:
+        - podjetje: id podjetja
+        - od: id zadnje igre na prejšnji strani
+        - koliko: največje število vrnjenih iger
+        """
+        sql = """
+            SELECT igra.id, igra.ime_igre, igra.datum_izdaje, igra.cena, igra.vsebuje, igra.razvija,
+                   igra.povprecno_igranje, igra.mediana, igra.ocena
+            FROM distributira
+            JOIN igra ON (igra.id = distributira.ime_igre)
+            WHERE distributira.podjetje = ? AND distributira.ime_igre > ?
+            ORDER BY distributira.ime_igre
+            LIMIT ?
+        """
+        for id, *vrstica in bazen.bralec().execute(sql, [podjetje, od, koliko]):
+            yield Igre(*vrstica, id=id)
 
     @staticmethod
+    @katalog.iz_kataloga('stevilo_iger_podjetja')
+    def stevilo_iger(podjetje):
+        """
+        Vrne število iger, ki jih je podjetje razvilo, in število iger,
+        ki jih je izdalo. Prvo prebere iz statistike razvijalcev,
+        drugo prešteje v indeksu distributira_podjetje.
+        """
+        sql = """
+            SELECT (SELECT stevilo_iger FROM statistika_razvijalcev WHERE razvija = :podjetje),
+                   (SELECT COUNT(*) FROM distributira WHERE podjetje = :podjetje)
+        """
+        razvite, izdane = bazen.bralec().execute(sql, {'podjetje': podjetje}).fetchone()
+        return razvite or 0, izdane
+
+    @staticmethod
+    @katalog.iz_kataloga('imena_podjetij_po_id')
+    def imena_po_id(ids):
+        """
+        Vrne slovar, ki id-jem podjetij priredi njihova imena.
+        """
+        sql = "SELECT id, ime FROM podjetje WHERE id IN ({})".format(", ".join("?" * len(ids)))
+        return dict(bazen.bralec().execute(sql, list(ids)))
+
+    @staticmethod
+    @katalog.iz_kataloga('imena_podjetij')
     def imena_podjetij():
         """
         Vrne vsa imena podjetij v bazi.
@@ -314,27 +655,43 @@ class Podjetje:
                 SELECT ime
                 FROM podjetje
             """
-        a = [vrsta[0] for vrsta in conn.execute(sql).fetchall()]
+        a = [vrsta[0] for vrsta in bazen.bralec().execute(sql).fetchall()]
         return a
 
+    @staticmethod
+    @katalog.iz_kataloga('stevilo_podjetij')
+    def stevilo_podjetij():
+        """
+        Vrne število podjetij v bazi.
+        """
+        sql = """
+                SELECT COUNT(*)
+                FROM podjetje
+            """
+        return bazen.bralec().execute(sql).fetchone()[0]
+
     def dodaj_v_bazo(self):
         """
         V bazo doda podjetje.
         """
         assert self.id is None
-        with conn:
-            self.id = podjetje.dodaj_vrstico(
+        with bazen.pisi() as conn:
+            self.id = baza.Podjetje(conn).dodaj_vrstico(
                 ime=self.ime, drzava=self.drzava, datum_ustanovitve=self.datum_ustanovitve, opis=self.opis)
+        spremembe.obdelaj()
 
 class Platforma:
     """
     Razred za platformo.
     """
 
-    def __init__(self, ime, tip, datum_izdaje, opis, podjetje):
+    __slots__ = ('id', 'ime', 'tip', 'datum_izdaje', 'opis', 'podjetje')
+
+    def __init__(self, ime, tip, datum_izdaje, opis, podjetje, id=None):
         """
         Konstruktor platformo.
         """
+        self.id = id
         self.ime = ime
         self.tip = tip
         self.datum_izdaje = datum_izdaje
@@ -342,19 +699,136 @@ class Platforma:
         self.podjetje = podjetje
 
     @staticmethod
+    @katalog.iz_kataloga('podatki_o_platformi')
     def podatki_o_platformi(platforma):
         """
         Vrne vse podatke o platformi.
         """
         sql = """
-            SELECT ime, tip, datum_izdaje, opis, podjetje
+            SELECT ime, tip, datum_izdaje, opis, podjetje, id
             FROM platforma
             WHERE ime == ?
         """
-        for ime, tip, datum_izdaje, opis, podjetje in conn.execute(sql, [platforma]):
-            yield Platforma(ime, tip, datum_izdaje, opis, podjetje)
+        for ime, tip, datum_izdaje, opis, podjetje, id in bazen.bralec().execute(sql, [platforma]):
+            yield Platforma(ime, tip, datum_izdaje, opis, podjetje, id)
 
     @staticmethod
+    @katalog.iz_kataloga('platforma_po_id')
+    def po_id(id):
+        """
+        Vrne platformo z danim id-jem (če obstaja).
+        """
+        sql = """
+            SELECT ime, tip, datum_izdaje, opis, podjetje, id
+            FROM platforma
+            WHERE id = ?
+        """
+        for vrstica in bazen.bralec().execute(sql, [id]):
+            yield Platforma(*vrstica)
+
+    @staticmethod
+    @katalog.iz_kataloga('seznam_platform')
+    def seznam(od=-1, koliko=STRAN):
+        """
+        Vrne stran platform, urejenih po id-ju.
+        Argumenti:
+        - od: id zadnje platforme na prejšnji strani
+        - koliko: največje število vrnjenih platform
+        """
+        sql = """
+            SELECT ime, tip, datum_izdaje, opis, podjetje, id
+            FROM platforma
+            WHERE id > ?
+            ORDER BY id
+            LIMIT ?
+        """
+        for vrstica in bazen.bralec().execute(sql, [od, koliko]):
+            yield Platforma(*vrstica)
+
+    @staticmethod
+    @katalog.iz_kataloga('igre_platforme')
+    def igre(platforma, razvrsti='id', od=None, koliko=STRAN):
+        """
+        Vrne stran iger na platformi v dani razvrstitvi.
+        Po id-ju igre beremo le iz indeksa podpira_platforma. Pri drugih
+        razvrstitvah za platforme z velikim deležem iger beremo indeks
+        razvrstitve in za vsako igro preverimo, ali je na platformi;
+        za manjše platforme preberemo vse njihove igre in jih uredimo.
+        Argumenti:
+        - platforma: id platforme
+        - razvrsti: ime razvrstitve iz RAZVRSTITVE
+        - od: par (vrednost, id) zadnje igre na prejšnji strani ali None
+        - koliko: največje število vrnjenih iger
+        """
+        conn = bazen.bralec()
+        pogoj, vrstni_red = _stran_po(razvrsti, od)
+        stolpci = """
+            igra.id, igra.ime_igre, igra.datum_izdaje, igra.cena, igra.vsebuje, igra.razvija,
+            igra.povprecno_igranje, igra.mediana, igra.ocena
+        """
+        if razvrsti == 'id':
+            sql = """
+                SELECT {}
+                FROM podpira
+                JOIN igra ON (igra.id = podpira.ime_igre)
+                WHERE podpira.platforma = :platforma AND {}
+                ORDER BY podpira.ime_igre
+                LIMIT :koliko
+            """.format(stolpci, pogoj.replace('igra.id', 'podpira.ime_igre'))
+        else:
+            na_platformi, vseh = conn.execute("""
+                SELECT (SELECT stevilo_iger FROM statistika_platform WHERE platforma = ?),
+                       (SELECT max(id) FROM igra)
+            """, [platforma]).fetchone()
+            if (na_platformi or 0) >= GOSTA_PLATFORMA * (vseh or 0):
+                sql = """
+                    SELECT {}
+                    FROM igra
+                    WHERE {} AND EXISTS (
+                        SELECT 1 FROM podpira WHERE podpira.ime_igre = igra.id AND podpira.platforma = :platforma
+                    )
+                    ORDER BY {}
+                    LIMIT :koliko
+                """.format(stolpci, pogoj, vrstni_red)
+            else:
+                sql = """
+                    SELECT {}
+                    FROM podpira
+                    CROSS JOIN igra ON (igra.id = podpira.ime_igre)
+                    WHERE podpira.platforma = :platforma AND {}
+                    ORDER BY {}
+                    LIMIT :koliko
+                """.format(stolpci, pogoj, vrstni_red)
+        vrednost, id = od if od is not None else (None, None)
+        parametri = {'platforma': platforma, 'vrednost': vrednost, 'id': id, 'koliko': koliko}
+        for id, *vrstica in conn.execute(sql, parametri):
+            yield Igre(*vrstica, id=id)
+
+    @staticmethod
+    @katalog.iz_kataloga('stevilo_iger_platforme')
+    def stevilo_iger(platforma):
+        """
+        Vrne število iger na platformi iz statistike platform.
+        """
+        sql = """
+            SELECT stevilo_iger
+            FROM statistika_platform
+            WHERE platforma = ?
+        """
+        vrstica = bazen.bralec().execute(sql, [platforma]).fetchone()
+        return vrstica[0] if vrstica else 0
+
+    @staticmethod
+    @katalog.iz_kataloga('imena_platform_po_id')
+    def imena_po_id(ids):
+        """
+        Vrne slovar, ki id-jem platform priredi njihova imena.
+        """
+        sql = "SELECT id, ime FROM platforma WHERE id IN ({})".format(", ".join("?" * len(ids)))
+        return dict(bazen.bralec().execute(sql, list(ids)))
+
+    @staticmethod
+    @katalog.iz_kataloga('imena_platform')
     def imena_platform():
         """
         Vrne vsa imena platform v bazi.
@@ -363,5 +837,75 @@ class Platforma:
                 SELECT ime
                 FROM platforma
             """
-        a = [vrsta[0] for vrsta in conn.execute(sql).fetchall()]
-        return a
\ No newline at end of file
+        a = [vrsta[0] for vrsta in bazen.bralec().execute(sql).fetchall()]
+        return a
+
+    @staticmethod
+    @katalog.iz_kataloga('stevilo_platform')
+    def stevilo_platform():
+        """
+        Vrne število platform v bazi.
+        """
+        sql = """
+                SELECT COUNT(*)
+                FROM platforma
+            """
+        return bazen.bralec().execute(sql).fetchone()[0]
+
+
+class Statistika:
+    """
+    Razred za povzetek iger v eni skupini (razvijalcu, platformi ali letu).
+    Podatke bere iz tabel statistike, ki jih sproti posodabljajo prožilci.
+    """
+
+    __slots__ = ('skupina', 'stevilo_iger', 'povprecna_ocena', 'najnizja_ocena', 'najvisja_ocena')
+
+    def __init__(self, skupina, stevilo_iger, povprecna_ocena, najnizja_ocena, najvisja_ocena):
+        """
+        Konstruktor statistike.
+        """
+        self.skupina = skupina
+        self.stevilo_iger = stevilo_iger
+        self.povprecna_ocena = povprecna_ocena
+        self.najnizja_ocena = najnizja_ocena
+        self.najvisja_ocena = najvisja_ocena
+
+    @staticmethod
+    def po_razvijalcih():
+        """
+        Vrne statistiko iger za vsakega razvijalca.
+        """
+        sql = """
+            SELECT podjetje.ime, stevilo_iger, vsota_ocen / stevilo_ocen, najnizja_ocena, najvisja_ocena
+            FROM statistika_razvijalcev JOIN podjetje ON (podjetje.id = statistika_razvijalcev.razvija)
+            ORDER BY stevilo_iger DESC
+        """
+        for vrstica in bazen.bralec().execute(sql):
+            yield Statistika(*vrstica)
+
+    @staticmethod
+    def po_platformah():
+        """
+        Vrne statistiko iger za vsako platformo.
+        """
+        sql = """
+            SELECT platforma.ime, stevilo_iger, vsota_ocen / stevilo_ocen, najnizja_ocena, najvisja_ocena
+            FROM statistika_platform JOIN platforma ON (platforma.id = statistika_platform.platforma)
+            ORDER BY stevilo_iger DESC
+        """
+        for vrstica in bazen.bralec().execute(sql):
+            yield Statistika(*vrstica)
+
+    @staticmethod
+    def po_letih():
+        """
+        Vrne statistiko iger za vsako leto izdaje.
+        """
+        sql = """
+            SELECT leto, stevilo_iger, vsota_ocen / stevilo_ocen, najnizja_ocena, najvisja_ocena
+            FROM statistika_let
+            ORDER BY leto DESC
+        """
+        for vrstica in bazen.bralec().execute(sql):
+            yield Statistika(*vrstica)
\ No newline at end of file
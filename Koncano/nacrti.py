@@ -0,0 +1,332 @@
+"""
+Pregled načrtov poizvedb modela.
+Na kopiji baze požene vse metode modela, zabeleži vsak stavek, ki ga
+izvedejo, in zanj preveri EXPLAIN QUERY PLAN. Enako preveri stavke
+v prožilcih baze, ki jih pisanja modela izvedejo posredno. Stavek je
+sporen, če pregleda celotno tabelo ali indeks (SCAN ali SEARCH brez
+USING) ali rezultat ureja v začasnem B-drevesu (USE TEMP B-TREE
+FOR ORDER BY). Sporni stavki
+primerov, ki niso v DOVOLJENO, so napaka in program vrne izhodno kodo 1,
+zato ga poženemo pred vsako namestitvijo.
+Uporaba:
+    python nacrti.py [datoteka]
+"""
+import inspect
+import itertools
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+from contextlib import contextmanager
+
+import model
+import spremembe
+from povezave import Bazen
+
+PREGLED = 'SCAN'  # pregled celotne tabele ali indeksa
+UREJANJE = 'TEMP B-TREE'  # urejanje rezultata v začasnem B-drevesu
+
+# Primeri, pri katerih so sporni načrti pričakovani: vrste dovoljenih težav in razlog.
+# Primere strani seznamov ločimo po razvrstitvi in strani (prva ali naslednja),
+# da dovoljen načrt ene različice ne skrije spornega načrta druge.
+DOVOLJENO = {
+    'Igre.najnovejse_igre': ({PREGLED}, 'LIMIT 10 po indeksu igra_datum_izdaje'),
+    'Igre.poisci': ({PREGLED}, 'LIKE z % na začetku ne more uporabiti indeksa'),
+    'Igre.glej_vse_igre': ({PREGLED}, 'stran vrne vse igre'),
+    'Igre.glej_vse_igre_imena': ({PREGLED}, 'stran vrne vse igre'),
+    'Igre.glej_vse_igre_datum': ({PREGLED}, 'stran vrne vse igre'),
+    'Igre.glej_vse_igre_cena': ({PREGLED, UREJANJE}, 'stran vrne vse igre, NULLS LAST ne ustreza indeksu'),
+    'Igre.glej_vse_igre_ocena': ({PREGLED, UREJANJE}, 'stran vrne vse igre, NULLS LAST ne ustreza indeksu'),
+    'Igre.imena_iger': ({PREGLED}, 'seznam vseh imen za preverjanje obrazcev'),
+    'Igre.stevilo_iger': ({PREGLED}, 'COUNT(*) prešteje najmanjši indeks'),
+    'Igre.seznam(id, prva)': ({PREGLED}, 'prva stran gre po indeksu razvrstitve z LIMIT'),
+    'Igre.seznam(ime, prva)': ({PREGLED}, 'prva stran gre po indeksu razvrstitve z LIMIT'),
+    'Igre.seznam(datum, prva)': ({PREGLED}, 'prva stran gre po indeksu razvrstitve z LIMIT'),
+    'Igre.seznam(ocena, prva)': ({PREGLED}, 'prva stran gre po indeksu razvrstitve z LIMIT'),
+    'Igre.seznam(cena, prva)': ({PREGLED}, 'prva stran gre po indeksu razvrstitve z LIMIT'),
+    'Podjetje.imena_podjetij': ({PREGLED}, 'seznam vseh imen za preverjanje obrazcev'),
+    'Podjetje.stevilo_podjetij': ({PREGLED}, 'COUNT(*) prešteje najmanjši indeks'),
+    'Platforma.imena_platform': ({PREGLED}, 'majhna tabela'),
+    'Platforma.stevilo_platform': ({PREGLED}, 'majhna tabela'),
+    'Platforma.igre(gosta, ime, prva)': ({PREGLED}, 'indeks razvrstitve z LIMIT, igre platforme so pogoste'),
+    'Platforma.igre(gosta, datum, prva)': ({PREGLED}, 'indeks razvrstitve z LIMIT, igre platforme so pogoste'),
+    'Platforma.igre(gosta, ocena, prva)': ({PREGLED}, 'indeks razvrstitve z LIMIT, igre platforme so pogoste'),
+    'Platforma.igre(gosta, cena, prva)': ({PREGLED}, 'indeks razvrstitve z LIMIT, igre platforme so pogoste'),
+    'Platforma.igre(redka, ime, prva)': ({UREJANJE}, 'uredi le igre platforme z majhnim deležem iger'),
+    'Platforma.igre(redka, ime, naslednja)': ({UREJANJE}, 'uredi le igre platforme z majhnim deležem iger'),
+    'Platforma.igre(redka, datum, prva)': ({UREJANJE}, 'uredi le igre platforme z majhnim deležem iger'),
+    'Platforma.igre(redka, datum, naslednja)': ({UREJANJE}, 'uredi le igre platforme z majhnim deležem iger'),
+    'Platforma.igre(redka, ocena, prva)': ({UREJANJE}, 'uredi le igre platforme z majhnim deležem iger'),
+    'Platforma.igre(redka, ocena, naslednja)': ({UREJANJE}, 'uredi le igre platforme z majhnim deležem iger'),
+    'Platforma.igre(redka, cena, prva)': ({UREJANJE}, 'uredi le igre platforme z majhnim deležem iger'),
+    'Platforma.igre(redka, cena, naslednja)': ({UREJANJE}, 'uredi le igre platforme z majhnim deležem iger'),
+    'Statistika.po_razvijalcih': ({PREGLED, UREJANJE}, 'povzetek po vseh razvijalcih'),
+    'Statistika.po_platformah': ({PREGLED, UREJANJE}, 'majhna tabela'),
+    'Statistika.po_letih': ({PREGLED}, 'majhna tabela, indeks ključa'),
+}
+
+
+class _Belezenje:
+    """
+    Ovoj povezave, ki beleži izvedene stavke in njihove parametre.
+    """
+
+    def __init__(self, conn, stavki):
+        self._conn = conn
+        self._stavki = stavki
+
+    def execute(self, sql, parametri=()):
+        self._stavki.append((sql, parametri))
+        return self._conn.execute(sql, parametri)
+
+    def executemany(self, sql, seznam_parametrov):
+        seznam_parametrov = list(seznam_parametrov)
+        if seznam_parametrov:
+            self._stavki.append((sql, seznam_parametrov[0]))
+        return self._conn.executemany(sql, seznam_parametrov)
+
+    def __getattr__(self, ime):
+        return getattr(self._conn, ime)
+
+
+class BelezeciBazen(Bazen):
+    """
+    Bazen povezav, ki beleži vse stavke, izvedene prek njegovih povezav.
+    """
+
+    def __init__(self, datoteka):
+        super().__init__(datoteka)
+        self.stavki = []
+
+    def bralec(self):
+        return _Belezenje(super().bralec(), self.stavki)
+
+    @contextmanager
+    def pisi(self):
+        with super().pisi() as conn:
+            yield _Belezenje(conn, self.stavki)
+
+
+@contextmanager
+def _gostota(delez):
+    """
+    Začasno nastavi mejo, nad katero je platforma gosta.
+    """
+    prejsnja = model.GOSTA_PLATFORMA
+    model.GOSTA_PLATFORMA = delez
+    try:
+        yield
+    finally:
+        model.GOSTA_PLATFORMA = prejsnja
+
+
+def _primeri(conn):
+    """
+    Vrne seznam parov (ime primera, funkcija), ki skupaj
+    izvedejo vse poizvedbe modela z značilnimi argumenti iz baze.
+    """
+    igra, = conn.execute("SELECT ime_igre FROM igra WHERE razvija IS NOT NULL LIMIT 1").fetchone()
+    podjetje, = conn.execute("""
+        SELECT podjetje.ime FROM distributira JOIN podjetje ON (podjetje.id = distributira.podjetje)
+        GROUP BY podjetje.id ORDER BY COUNT(*) DESC LIMIT 1
+    """).fetchone()
+    platforma, druga_platforma = [vrstica[0] for vrstica in conn.execute(
+        "SELECT ime FROM platforma ORDER BY id LIMIT 2")]
+    drugo_podjetje, = conn.execute("SELECT ime FROM podjetje WHERE ime != ? LIMIT 1", [podjetje]).fetchone()
+    id_podjetja, = conn.execute("SELECT id FROM podjetje WHERE ime = ?", [podjetje]).fetchone()
+    id_platforme, = conn.execute("SELECT id FROM platforma WHERE ime = ?", [platforma]).fetchone()
+
+    def nova_igra(ime, zaloznik=podjetje, platforma=platforma):
+        return model.Igre(ime, '2021-1-1', 9.99, '0 .. 20,000', podjetje, 10, 8, 75, zaloznik, platforma)
+
+    def igre_platforme(razvrsti, od, delez):
+        with _gostota(delez):
+            return list(model.Platforma.igre(id_platforme, razvrsti, od))
+
+    primeri = [
+        ('Uporabnik.dodaj_v_bazo', lambda: model.Uporabnik('nacrti').dodaj_v_bazo('geslo')),
+        ('Uporabnik.prijava', lambda: model.Uporabnik.prijava('nacrti', 'geslo')),
+        ('Igre.najnovejse_igre', model.Igre.najnovejse_igre),
+        ('Igre.podatki_o_igri', lambda: model.Igre.podatki_o_igri(igra)),
+        ('Igre.podobne_igre', lambda: model.Igre.podobne_igre(igra)),
+        ('Igre.poisci', lambda: model.Igre.poisci('war')),
+        ('Igre.glej_vse_igre', model.Igre.glej_vse_igre),
+        ('Igre.glej_vse_igre_imena', model.Igre.glej_vse_igre_imena),
+        ('Igre.glej_vse_igre_datum', model.Igre.glej_vse_igre_datum),
+        ('Igre.glej_vse_igre_cena', model.Igre.glej_vse_igre_cena),
+        ('Igre.glej_vse_igre_ocena', model.Igre.glej_vse_igre_ocena),
+        ('Igre.imena_iger', model.Igre.imena_iger),
+        ('Igre.stevilo_iger', model.Igre.stevilo_iger),
+        ('Igre.igre_po_id', lambda: model.Igre.igre_po_id([1, 2, 3])),
+        ('Igre.povezave', lambda: model.Igre.povezave(1)),
+        ('Igre.dodaj_v_bazo', lambda: nova_igra('Nacrti 1').dodaj_v_bazo()),
+        ('Igre.dodajplatformo', lambda: nova_igra('Nacrti 1', platforma=druga_platforma).dodajplatformo()),
+        ('Igre.dodajdistributerja', lambda: nova_igra('Nacrti 1', zaloznik=drugo_podjetje).dodajdistributerja()),
+        ('Igre.spremeni_podatke', lambda: nova_igra('Nacrti 1').spremeni_podatke()),
+        ('Igre.dodaj_vec_v_bazo', lambda: model.Igre.dodaj_vec_v_bazo(
+            [nova_igra('Nacrti 2'), nova_igra('Nacrti 3')])),
+        ('Podjetje.podatki_o_podjetju', lambda: model.Podjetje.podatki_o_podjetju(podjetje)),
+        ('Podjetje.razvite_igre', lambda: model.Podjetje.razvite_igre(id_podjetja)),
+        ('Podjetje.razvite_igre(naslednja)', lambda: model.Podjetje.razvite_igre(id_podjetja, 1000)),
+        ('Podjetje.izdane_igre', lambda: model.Podjetje.izdane_igre(id_podjetja)),
+        ('Podjetje.izdane_igre(naslednja)', lambda: model.Podjetje.izdane_igre(id_podjetja, 1000)),
+        ('Podjetje.stevilo_iger', lambda: model.Podjetje.stevilo_iger(id_podjetja)),
+        ('Podjetje.imena_po_id', lambda: model.Podjetje.imena_po_id([id_podjetja])),
+        ('Podjetje.imena_podjetij', model.Podjetje.imena_podjetij),
+        ('Podjetje.stevilo_podjetij', model.Podjetje.stevilo_podjetij),
+        ('Podjetje.po_id', lambda: list(model.Podjetje.po_id(id_podjetja))),
+        ('Podjetje.seznam', lambda: list(model.Podjetje.seznam(id_podjetja))),
+        ('Podjetje.dodaj_v_bazo', lambda: model.Podjetje('Nacrti', None, None, None).dodaj_v_bazo()),
+        ('Platforma.podatki_o_platformi', lambda: model.Platforma.podatki_o_platformi(platforma)),
+        ('Platforma.imena_platform', model.Platforma.imena_platform),
+        ('Platforma.stevilo_platform', model.Platforma.stevilo_platform),
+        ('Platforma.stevilo_iger', lambda: model.Platforma.stevilo_iger(id_platforme)),
+        ('Platforma.imena_po_id', lambda: model.Platforma.imena_po_id([id_platforme])),
+        ('Platforma.po_id', lambda: list(model.Platforma.po_id(id_platforme))),
+        ('Platforma.seznam', lambda: list(model.Platforma.seznam(id_platforme))),
+        ('Statistika.po_razvijalcih', model.Statistika.po_razvijalcih),
+        ('Statistika.po_platformah', model.Statistika.po_platformah),
+        ('Statistika.po_letih', model.Statistika.po_letih),
+        ('spremembe.zadnja', spremembe.zadnja),
+        ('spremembe.preberi', lambda: spremembe.preberi(0, 100)),
+    ]
+    for razvrsti, (_, _, _, tip) in model.RAZVRSTITVE.items():
+        naslednja = (tip(50) if tip is not str else 'M', 1000)
+        for stran, od in [('prva', None), ('naslednja', naslednja)]:
+            primeri.append(('Igre.seznam({}, {})'.format(razvrsti, stran),
+                            lambda razvrsti=razvrsti, od=od: list(model.Igre.seznam(razvrsti, od))))
+            if razvrsti == 'id':
+                primeri.append(('Platforma.igre(id, {})'.format(stran), lambda od=od: igre_platforme('id', od, 0)))
+                continue
+            for gostota, delez in [('gosta', 0), ('redka', 1)]:
+                primeri.append(('Platforma.igre({}, {}, {})'.format(gostota, razvrsti, stran),
+                                lambda razvrsti=razvrsti, od=od, delez=delez: igre_platforme(razvrsti, od, delez)))
+    return primeri
+
+
+def _stavki_primerov(primeri, bazen):
+    """
+    Za vsak primer vrne par (ime primera, seznam parov (stavek, parametri)),
+    ki jih je primer izvedel prek danega bazena.
+    """
+    for ime, funkcija in primeri:
+        bazen.stavki.clear()
+        rezultat = funkcija()
+        if inspect.isgenerator(rezultat):
+            list(rezultat)
+        yield ime, list(bazen.stavki)
+
+
+def _stavki_prozilcev(conn):
+    """
+    Za vsak prožilec v bazi vrne par (ime primera, seznam parov (stavek, parametri))
+    s stavki iz njegovega telesa. Stolpce OLD in NEW zamenjamo s parametri,
+    saj EXPLAIN QUERY PLAN stavka, ki sproži prožilec, telesa prožilca ne opiše.
+    """
+    sql = "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' ORDER BY name"
+    for ime, prozilec in conn.execute(sql).fetchall():
+        telo = prozilec[prozilec.upper().index('BEGIN') + len('BEGIN'):prozilec.upper().rindex('END')]
+        stavki = []
+        stavek = ''
+        for kos in telo.split(';'):
+            stavek += kos + ';'
+            if not sqlite3.complete_statement(stavek):
+                continue
+            if stavek.strip(' \t\r\n;'):
+                stavek = re.sub(r'\b(OLD|NEW)\.(\w+)', r':\1_\2', stavek)
+                stavki.append((stavek, {parameter: None for parameter in re.findall(r':(\w+)', stavek)}))
+            stavek = ''
+        yield 'prozilec.' + ime, stavki
+
+
+def _pregleda(conn, sql, parametri, tabela):
+    """
+    Ali stavek pregleda vse vrstice dane tabele. Načrt kaže le SEARCH tabela
+    (brez USING) za pregled tabele z agregatom MIN ali MAX, pa tudi za iskanje
+    najmanjšega ali največjega rowid, ki prebere eno samo vrstico. Ločimo ju
+    po programu: pri slednjem se zanka po kazalcu na tabelo konča z Goto
+    takoj za prvo vrstico, pred ukazom Next oziroma Prev.
+    """
+    koren = conn.execute("SELECT rootpage FROM sqlite_master WHERE type = 'table' AND name = ?",
+                         [tabela]).fetchone()
+    if koren is None:
+        return True
+    program = conn.execute('EXPLAIN ' + sql, parametri).fetchall()
+    kazalci = {vrstica[2] for vrstica in program if vrstica[1] == 'OpenRead' and vrstica[3] == koren[0]}
+    return any(vrstica[1] in ('Next', 'Prev') and vrstica[2] in kazalci and program[i - 1][1] != 'Goto'
+               for i, vrstica in enumerate(program))
+
+
+def sporno(nacrt, pregleda=None):
+    """
+    Vrne seznam parov (vrsta težave, vrstica načrta) za sporne vrstice načrta.
+    SEARCH brez USING pomeni, da SQLite vrstice išče brez indeksa; tudi to je
+    pregled celotne tabele, razen če funkcija pregleda za ime tabele vrne False.
+    """
+    napake = []
+    for opis in nacrt:
+        if opis.startswith(PREGLED + ' ') and opis != 'SCAN CONSTANT ROW':
+            napake.append((PREGLED, opis))
+        elif opis.startswith('SEARCH ') and ' USING ' not in opis:
+            if pregleda is None or pregleda(opis.split()[1]):
+                napake.append((PREGLED, opis))
+        elif UREJANJE in opis and 'ORDER BY' in opis:
+            napake.append((UREJANJE, opis))
+    return napake
+
+
+def preveri(datoteka):
+    """
+    Preveri načrte vseh poizvedb modela in stavkov prožilcev na kopiji dane baze.
+    Vrne seznam trojic (ime primera, stavek, sporne vrstice načrta)
+    za sporne stavke, ki niso dovoljeni, in izpiše povzetek.
+    """
+    napake = []
+    with tempfile.TemporaryDirectory() as mapa:
+        pot = os.path.join(mapa, 'igre.db')
+        izvor = sqlite3.connect(datoteka)
+        kopija = sqlite3.connect(pot)
+        izvor.backup(kopija)
+        izvor.close()
+
+        prejsnji = model.bazen
+        bazen = model.bazen = BelezeciBazen(pot)
+        try:
+            stevilo = 0
+            nepotrebna = set(DOVOLJENO)
+            for ime, stavki in itertools.chain(_stavki_primerov(_primeri(kopija), bazen),
+                                               _stavki_prozilcev(kopija)):
+                videni = set()
+                for sql, parametri in stavki:
+                    if sql in videni:
+                        continue
+                    videni.add(sql)
+                    stevilo += 1
+                    nacrt = [vrstica[3] for vrstica in bazen.pisalec.execute('EXPLAIN QUERY PLAN ' + sql, parametri)]
+                    sporne = sporno(nacrt, lambda tabela: _pregleda(bazen.pisalec, sql, parametri, tabela))
+                    dovoljene = DOVOLJENO.get(ime, (set(), None))[0]
+                    tezave = [opis for vrsta, opis in sporne if vrsta not in dovoljene]
+                    if len(tezave) < len(sporne):
+                        nepotrebna.discard(ime)
+                    if tezave:
+                        napake.append((ime, ' '.join(sql.split()), tezave))
+        finally:
+            model.bazen = prejsnji
+            kopija.close()
+
+    for ime, sql, tezave in napake:
+        print('{}: {}'.format(ime, '; '.join(tezave)))
+        print('    {}'.format(sql))
+    for ime in sorted(nepotrebna):
+        print('{}: dovoljenje ni več potrebno ({})'.format(ime, DOVOLJENO[ime][1]))
+    print('{} stavkov, {} nedovoljenih spornih načrtov'.format(stevilo, len(napake)))
+    return napake
+
+
+if __name__ == '__main__':
+    datoteka = sys.argv[1] if len(sys.argv) > 1 else 'igre.db'
+    if not os.path.exists(datoteka):
+        print('Baza {} ne obstaja. Ustvari jo z ukazom "python baza.py".'.format(datoteka))
+        sys.exit(1)
+    sys.exit(1 if preveri(datoteka) else 0)
@@ -0,0 +1,265 @@
+"""
+Nadzor poizvedb na bazo.
+Ko je nadzor vklopljen, bazen povezav vrača ovite povezave, ki za vsak
+stavek beležijo število klicev, število vrnjenih vrstic in porazdelitev
+trajanja, počasne stavke pa skupaj s parametri shranijo v dnevnik.
+Izklopljen nadzor ne stane nič, saj bazen tedaj vrača običajne povezave.
+
+Primer:
+    import nadzor
+    nadzor.vklopi(prag=0.1)
+    ...
+    print(nadzor.porocilo())
+"""
+import bisect
+import collections
+import sys
+import threading
+import time
+
+# zgornje meje razredov porazdelitve trajanja v sekundah
+MEJE = [0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0]
+PRAG = 0.1  # stavki, daljši od tega (v sekundah), gredo v dnevnik počasnih
+DNEVNIK = 100  # največje število zapisov v dnevniku počasnih stavkov
+
+
+class Stavek:
+    """
+    Zbrani podatki o enem stavku.
+    """
+
+    __slots__ = ('sql', 'ime', 'klici', 'vrstice', 'skupaj', 'najdaljsi', 'razredi')
+
+    def __init__(self, sql, ime):
+        """
+        Konstruktor stavka.
+        Argumenti:
+        - sql: besedilo stavka s strnjenimi presledki
+        - ime: funkcija, ki je stavek prva izvedla
+        """
+        self.sql = sql
+        self.ime = ime
+        self.klici = 0
+        self.vrstice = 0
+        self.skupaj = 0.0
+        self.najdaljsi = 0.0
+        self.razredi = [0] * (len(MEJE) + 1)
+
+    def percentil(self, delez):
+        """
+        Vrne zgornjo mejo razreda, v katerega pade dani delež klicev,
+        ali None, če je ta razred neomejen.
+        """
+        meja = delez * self.klici
+        vsota = 0
+        for i, stevilo in enumerate(self.razredi):
+            vsota += stevilo
+            if vsota >= meja:
+                return MEJE[i] if i < len(MEJE) else None
+        return None
+
+
+class Nadzor:
+    """
+    Zbiralnik podatkov o stavkih, ki jih izvedejo povezave enega bazena.
+    """
+
+    def __init__(self, prag=PRAG, dnevnik=DNEVNIK):
+        """
+        Konstruktor nadzora.
+        Argumenti:
+        - prag: trajanje v sekundah, nad katerim gre stavek v dnevnik počasnih
+        - dnevnik: največje število zapisov v dnevniku počasnih stavkov
+        """
+        self.prag = prag
+        self.stavki = {}
+        self.pocasni = collections.deque(maxlen=dnevnik)
+        self._kljucavnica = threading.Lock()
+
+    def ovij(self, conn):
+        """
+        Vrne povezavo, ki beleži izvedene stavke.
+        """
+        return _Povezava(conn, self)
+
+    def zabelezi(self, sql, parametri, trajanje, vrstice, ime):
+        """
+        Zabeleži en zaključen stavek.
+        """
+        with self._kljucavnica:
+            stavek = self.stavki.get(sql)
+            if stavek is None:
+                stavek = self.stavki[sql] = Stavek(' '.join(sql.split()), ime)
+            stavek.klici += 1
+            stavek.vrstice += vrstice
+            stavek.skupaj += trajanje
+            stavek.najdaljsi = max(stavek.najdaljsi, trajanje)
+            stavek.razredi[bisect.bisect_left(MEJE, trajanje)] += 1
+            if trajanje >= self.prag:
+                self.pocasni.append((time.time(), trajanje, stavek.ime, stavek.sql, parametri))
+
+    def posnetek(self):
+        """
+        Vrne kopijo zbranih podatkov: seznam stavkov, urejenih po skupnem
+        trajanju, in seznam zapisov (čas, trajanje, ime, sql, parametri)
+        iz dnevnika počasnih stavkov.
+        """
+        with self._kljucavnica:
+            stavki = []
+            for stavek in self.stavki.values():
+                kopija = Stavek(stavek.sql, stavek.ime)
+                kopija.klici, kopija.vrstice = stavek.klici, stavek.vrstice
+                kopija.skupaj, kopija.najdaljsi = stavek.skupaj, stavek.najdaljsi
+                kopija.razredi = list(stavek.razredi)
+                stavki.append(kopija)
+            pocasni = list(self.pocasni)
+        stavki.sort(key=lambda stavek: stavek.skupaj, reverse=True)
+        return stavki, pocasni
+
+    def ponastavi(self):
+        """
+        Pozabi vse zbrane podatke.
+        """
+        with self._kljucavnica:
+            self.stavki.clear()
+            self.pocasni.clear()
+
+
+class _Kazalec:
+    """
+    Ovoj kazalca, ki meri čas branja vrstic in jih šteje.
+    Stavek zabeleži, ko so prebrane vse vrstice ali ko kazalec ni več v uporabi.
+    """
+
+    def __init__(self, kazalec, nadzor, sql, parametri, trajanje, ime):
+        self._kazalec = kazalec
+        self._nadzor = nadzor
+        self._sql = sql
+        self._parametri = parametri
+        self._trajanje = trajanje
+        self._ime = ime
+        self._vrstice = 0
+        self._zakljucen = False
+
+    def _zakljuci(self):
+        if not self._zakljucen:
+            self._zakljucen = True
+            self._nadzor.zabelezi(self._sql, self._parametri, self._trajanje, self._vrstice, self._ime)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        zacetek = time.perf_counter()
+        try:
+            vrstica = next(self._kazalec)
+        except StopIteration:
+            self._trajanje += time.perf_counter() - zacetek
+            self._zakljuci()
+            raise
+        self._trajanje += time.perf_counter() - zacetek
+        self._vrstice += 1
+        return vrstica
+
+    def fetchone(self):
+        zacetek = time.perf_counter()
+        vrstica = self._kazalec.fetchone()
+        self._trajanje += time.perf_counter() - zacetek
+        if vrstica is not None:
+            self._vrstice += 1
+        return vrstica
+
+    def fetchall(self):
+        zacetek = time.perf_counter()
+        vrstice = self._kazalec.fetchall()
+        self._trajanje += time.perf_counter() - zacetek
+        self._vrstice += len(vrstice)
+        self._zakljuci()
+        return vrstice
+
+    def __getattr__(self, ime):
+        return getattr(self._kazalec, ime)
+
+    def __del__(self):
+        self._zakljuci()
+
+
+class _Povezava:
+    """
+    Ovoj povezave, katere stavki se beležijo v nadzoru.
+    """
+
+    def __init__(self, conn, nadzor):
+        self._conn = conn
+        self._nadzor = nadzor
+
+    def execute(self, sql, parametri=()):
+        ime = sys._getframe(1).f_code.co_qualname
+        zacetek = time.perf_counter()
+        kazalec = self._conn.execute(sql, parametri)
+        trajanje = time.perf_counter() - zacetek
+        return _Kazalec(kazalec, self._nadzor, sql, parametri, trajanje, ime)
+
+    def executemany(self, sql, seznam_parametrov):
+        ime = sys._getframe(1).f_code.co_qualname
+        seznam_parametrov = list(seznam_parametrov)
+        zacetek = time.perf_counter()
+        kazalec = self._conn.executemany(sql, seznam_parametrov)
+        trajanje = time.perf_counter() - zacetek
+        self._nadzor.zabelezi(sql, '{} naborov'.format(len(seznam_parametrov)), trajanje, kazalec.rowcount, ime)
+        return kazalec
+
+    def __getattr__(self, ime):
+        return getattr(self._conn, ime)
+
+
+def vklopi(bazen=None, prag=PRAG, dnevnik=DNEVNIK):
+    """
+    Vklopi nadzor za dani bazen (privzeto model.bazen) in vrne nadzor.
+    """
+    if bazen is None:
+        import model
+        bazen = model.bazen
+    bazen.nadzor = Nadzor(prag, dnevnik)
+    return bazen.nadzor
+
+
+def izklopi(bazen=None):
+    """
+    Izklopi nadzor za dani bazen (privzeto model.bazen).
+    Že odprte ovite povezave beležijo še naprej.
+    """
+    if bazen is None:
+        import model
+        bazen = model.bazen
+    bazen.nadzor = None
+
+
+def _ms(sekunde):
+    return '>{:g}'.format(1000 * MEJE[-1]) if sekunde is None else '{:g}'.format(1000 * sekunde)
+
+
+def porocilo(bazen=None):
+    """
+    Vrne besedilno poročilo o zbranih podatkih za dani bazen (privzeto model.bazen).
+    """
+    if bazen is None:
+        import model
+        bazen = model.bazen
+    if bazen.nadzor is None:
+        return 'Nadzor poizvedb ni vklopljen.\n'
+    stavki, pocasni = bazen.nadzor.posnetek()
+    vrstice = ['{:>8} {:>9} {:>10} {:>8} {:>8} {:>9}  {}'.format(
+        'klici', 'vrstice', 'skupaj ms', 'p50 ms', 'p99 ms', 'najd. ms', 'funkcija / stavek')]
+    for stavek in stavki:
+        vrstice.append('{:>8} {:>9} {:>10.1f} {:>8} {:>8} {:>9.1f}  {}'.format(
+            stavek.klici, stavek.vrstice, 1000 * stavek.skupaj, _ms(stavek.percentil(0.5)),
+            _ms(stavek.percentil(0.99)), 1000 * stavek.najdaljsi, stavek.ime))
+        vrstice.append('{:>59}{}'.format('', stavek.sql[:200]))
+    vrstice.append('')
+    vrstice.append('Počasni stavki (nad {:g} ms):'.format(1000 * bazen.nadzor.prag))
+    for cas, trajanje, ime, sql, parametri in reversed(pocasni):
+        vrstice.append('{} {:9.1f} ms  {}  {!r}'.format(
+            time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(cas)), 1000 * trajanje, ime, parametri))
+        vrstice.append('    {}'.format(sql[:200]))
+    return '\n'.join(vrstice) + '\n'
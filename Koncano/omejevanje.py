@@ -0,0 +1,138 @@
+"""
+Omejevanje poskusov prijave in vpisa.
+Vsak poskus stane zgoščevanje gesla (glej geslo.py), zato nekaj odjemalcev,
+ki pošiljajo poskuse v zanki, lahko zasede ves procesor. Pred zgoščevanjem
+zato vsak poskus vzame žeton iz vedra naslova IP odjemalca in vedra
+uporabniškega imena. Vedro ima največ zmogljivost žetonov in se polni
+s hitrostjo žetonov na sekundo; ko je prazno, poskus zavrnemo brez
+zgoščevanja, odjemalec pa izve, čez koliko sekund lahko poskusi znova.
+
+Vedra hranimo v slovarju omejene velikosti. Polno vedro je enako vedru,
+ki ga ni, zato vedra, ki se do konca napolnijo, sproti brišemo, ko je
+slovar poln, pa najprej izpade najdlje nerabljeno vedro. Vsak proces
+strežnika ima svoja vedra.
+"""
+import collections
+import math
+import threading
+import time
+
+HITROST_IP = 1.0  # žetoni na sekundo za en naslov IP
+ZMOGLJIVOST_IP = 20  # toliko poskusov lahko naslov IP naredi naenkrat
+HITROST_IMENA = 0.2  # žetoni na sekundo za eno uporabniško ime
+ZMOGLJIVOST_IMENA = 5  # toliko poskusov lahko ime dobi naenkrat
+NAJVEC = 10000  # največje število veder v enem omejevalniku
+
+
+class Omejeno(Exception):
+    """
+    Poskusov je preveč; cakaj pove, čez koliko sekund lahko poskusimo znova.
+    """
+
+    def __init__(self, cakaj):
+        super().__init__(cakaj)
+        self.cakaj = cakaj
+
+
+class Omejevalnik:
+    """
+    Vedra z žetoni za poljubne ključe, npr. naslove IP.
+    """
+
+    def __init__(self, hitrost, zmogljivost, najvec=NAJVEC):
+        """
+        Konstruktor omejevalnika.
+        Argumenti:
+        - hitrost: število žetonov, ki jih vedro dobi v sekundi
+        - zmogljivost: največje število žetonov v vedru
+        - najvec: največje število veder
+        """
+        self.hitrost = hitrost
+        self.zmogljivost = zmogljivost
+        self.najvec = najvec
+        self._vedra = collections.OrderedDict()  # ključ -> (žetoni, čas), najdlje nerabljena prva
+        self._zaklep = threading.Lock()
+        self.dovoljeni = 0
+        self.zavrnjeni = 0
+
+    def _zetoni(self, kljuc, zdaj):
+        zetoni, cas = self._vedra.get(kljuc, (self.zmogljivost, zdaj))
+        return min(self.zmogljivost, zetoni + (zdaj - cas) * self.hitrost)
+
+    def _pocisti(self, zdaj):
+        """
+        Izbriše najdlje nerabljena vedra, ki so že polna, in vedra
+        čez največje število.
+        """
+        while self._vedra:
+            kljuc = next(iter(self._vedra))
+            if len(self._vedra) <= self.najvec and self._zetoni(kljuc, zdaj) < self.zmogljivost:
+                break
+            del self._vedra[kljuc]
+
+    def vzemi(self, kljuc, zdaj=None):
+        """
+        Iz vedra ključa vzame žeton in vrne 0
+        ali pa vrne število sekund, čez katere bo žeton na voljo.
+        """
+        zdaj = time.monotonic() if zdaj is None else zdaj
+        with self._zaklep:
+            zetoni = self._zetoni(kljuc, zdaj)
+            if zetoni < 1:
+                self.zavrnjeni += 1
+                return (1 - zetoni) / self.hitrost
+            self.dovoljeni += 1
+            self._vedra[kljuc] = (zetoni - 1, zdaj)
+            self._vedra.move_to_end(kljuc)
+            self._pocisti(zdaj)
+            return 0
+
+    def __len__(self):
+        return len(self._vedra)
+
+
+_po_ip = None
+_po_imenu = None
+
+
+def vklopi(hitrost_ip=HITROST_IP, zmogljivost_ip=ZMOGLJIVOST_IP,
+           hitrost_imena=HITROST_IMENA, zmogljivost_imena=ZMOGLJIVOST_IMENA, najvec=NAJVEC):
+    """
+    Vklopi omejevanje poskusov po naslovih IP in uporabniških imenih.
+    """
+    global _po_ip, _po_imenu
+    _po_ip = Omejevalnik(hitrost_ip, zmogljivost_ip, najvec)
+    _po_imenu = Omejevalnik(hitrost_imena, zmogljivost_imena, najvec)
+
+
+def preveri(ip, ime):
+    """
+    Zabeleži poskus z naslova ip za uporabniško ime
+    ali sproži Omejeno, če je poskusov preveč.
+    Žeton imena vzamemo le, če ga je dal naslov IP, zato poskusi
+    z naslova, ki je že zavrnjen, ne praznijo vedra imena.
+    """
+    if _po_ip is None:
+        return
+    cakaj = _po_ip.vzemi(ip) or _po_imenu.vzemi(ime)
+    if cakaj:
+        raise Omejeno(cakaj)
+
+
+def sekunde(cakaj):
+    """
+    Vrne čas čakanja, zaokrožen navzgor na cele sekunde, za glavo Retry-After.
+    """
+    return max(1, math.ceil(cakaj))
+
+
+def porocilo():
+    """
+    Vrne besedilno poročilo o omejevanju poskusov prijave.
+    """
+    if _po_ip is None:
+        return 'Omejevanje prijav ni vklopljeno.\n'
+    return ('Omejevanje prijav: po naslovih IP {} dovoljenih, {} zavrnjenih ({} veder), '
+            'po imenih {} dovoljenih, {} zavrnjenih ({} veder).\n').format(
+        _po_ip.dovoljeni, _po_ip.zavrnjeni, len(_po_ip),
+        _po_imenu.dovoljeni, _po_imenu.zavrnjeni, len(_po_imenu))
@@ -0,0 +1,83 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from urllib.request import pathname2url
+
+CAKANJE = 5.0  # koliko sekund povezava čaka na zaklenjeno bazo
+
+
+class Bazen:
+    """
+    Bazen povezav na SQLite bazo.
+    Vsaka nit dobi svojo povezavo samo za branje, vsa pisanja pa gredo
+    skozi eno samo povezavo za pisanje, ki jo varuje ključavnica.
+    Baza teče v načinu WAL, zato bralci ne čakajo na pisalca.
+    Če je nastavljen nadzor (glej nadzor.py), bazen vrača povezave,
+    ki beležijo izvedene stavke.
+    """
+
+    def __init__(self, datoteka, cakanje=CAKANJE):
+        """
+        Konstruktor bazena.
+        Argumenti:
+        - datoteka: pot do datoteke z bazo
+        - cakanje: čas v sekundah, ko povezava čaka na zaklenjeno bazo
+        """
+        self.datoteka = datoteka
+        self.cakanje = cakanje
+        self._lokalno = threading.local()
+        self._kljucavnica = threading.RLock()
+        self._pisalec = None
+        self.nadzor = None
+
+    @property
+    def pisalec(self):
+        """
+        Povezava za pisanje. Ob prvi uporabi jo odpre
+        in bazo preklopi v način WAL.
+        Baze ne ustvari; če ta ne obstaja, sproži FileNotFoundError.
+        """
+        with self._kljucavnica:
+            if self._pisalec is None:
+                if not os.path.exists(self.datoteka):
+                    raise FileNotFoundError(
+                        'Baza {} ne obstaja. Ustvari jo z ukazom "python baza.py".'.format(self.datoteka))
+                conn = sqlite3.connect(self.datoteka, timeout=self.cakanje, check_same_thread=False)
+                conn.execute('PRAGMA journal_mode = WAL')
+                conn.execute('PRAGMA foreign_keys = ON')
+                self._pisalec = conn
+            return self._pisalec
+
+    def bralec(self):
+        """
+        Vrne povezavo samo za branje, ki pripada trenutni niti.
+        """
+        conn = getattr(self._lokalno, 'conn', None)
+        if conn is None:
+            self.pisalec  # poskrbi, da baza obstaja in je v načinu WAL
+            uri = 'file:{}?mode=ro'.format(pathname2url(os.path.abspath(self.datoteka)))
+            conn = sqlite3.connect(uri, uri=True, timeout=self.cakanje)
+            self._lokalno.conn = conn
+        return conn if self.nadzor is None else self.nadzor.ovij(conn)
+
+    def ponastavi(self):
+        """
+        Pozabi vse odprte povezave, ne da bi jih zaprl.
+        Kliče se v novem procesu po os.fork, saj povezav SQLite
+        ne smemo uporabljati v več procesih.
+        """
+        self._lokalno = threading.local()
+        self._kljucavnica = threading.RLock()
+        self._pisalec = None
+
+    @contextmanager
+    def pisi(self):
+        """
+        Zaklene povezavo za pisanje in jo vrne znotraj transakcije.
+        Ob uspešnem koncu bloka se transakcija potrdi, sicer razveljavi.
+        """
+        with self._kljucavnica:
+            conn = self.pisalec
+            with conn:
+                yield conn if self.nadzor is None else self.nadzor.ovij(conn)
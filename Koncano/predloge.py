@@ -0,0 +1,32 @@
+"""
+Predpomnilnik prevedenih predlog.
+Predloge hranimo tam, kjer jih hrani bottle.template, zato jih ta najde
+že prevedene, ne glede na to, ali smo jih naložili sami ali jih je on.
+"""
+import bottle
+
+
+def predloga(ime):
+    """
+    Vrne predlogo z danim imenom iz predpomnilnika predlog ali jo naloži
+    in shrani vanj. Pri razhroščevanju jo kot bottle.template naloži vsakič.
+    """
+    # Opomba: ključ (id(TEMPLATE_PATH), ime) v bottle.TEMPLATES je notranja
+    # zgradba predpomnilnika v bottle.template (različica 0.13), ne javni vmesnik.
+    # Če se ob novi različici bottle spremeni, predloge ne bodo več skupne.
+    kljuc = (id(bottle.TEMPLATE_PATH), ime)
+    nalozena = None if bottle.DEBUG else bottle.TEMPLATES.get(kljuc)
+    if nalozena is None:
+        nalozena = bottle.SimpleTemplate(name=ime, lookup=bottle.TEMPLATE_PATH)
+        bottle.TEMPLATES[kljuc] = nalozena
+    return nalozena
+
+
+def prevedi(ime):
+    """
+    Vrne predlogo z danim imenom, ki jo po potrebi tudi prevede.
+    """
+    nalozena = predloga(ime)
+    # SimpleTemplate predlogo prevede ob prvem branju lastnosti co
+    _ = nalozena.co
+    return nalozena
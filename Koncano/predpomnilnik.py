@@ -0,0 +1,206 @@
+"""
+Predpomnilnik izrisanih strani, vtičnik za bottle.
+Predpomni odgovore poti, ki imajo različico (glej razlicice.pogojno).
+Ključ je pravilo poti, njeni argumenti, poizvedba in vloga uporabnika, zato
+vsi anonimni obiskovalci oziroma vsi administratorji dobijo isto stran.
+Zadetek ne bere iz baze in ne izrisuje predloge. Če je vklopljeno
+stiskanje (glej stiskanje.py), poleg strani hrani še njene stisnjene
+inačice, da zadetkov ni treba vsakič stiskati.
+
+Vnos velja, dokler se ne spremeni različica njegove strani, zato pisanje
+razveljavi le strani prizadetih iger in sezname, strani drugih iger pa
+ostanejo. Ko vsebina preseže dovoljeno velikost, predpomnilnik zavrže
+najdlje neuporabljene strani.
+
+Primer:
+    import predpomnilnik
+    predpomnilnik.vklopi(velikost=64 * 2**20, vloga=lambda: 'anonimni')
+"""
+import collections
+import functools
+import threading
+import types
+
+import bottle
+import razlicice
+
+VELIKOST = 64 * 2**20  # največja skupna velikost shranjenih strani v bajtih
+
+
+class PredpomnilnikStrani:
+    """
+    Vtičnik za bottle, ki hrani izrisane strani.
+    """
+
+    name = 'predpomnilnik'
+    api = 2
+
+    def __init__(self, velikost=VELIKOST, vloga=lambda: 'anonimni', stiskanje=None):
+        """
+        Konstruktor predpomnilnika.
+        Argumenti:
+        - velikost: največja skupna velikost shranjenih strani v bajtih
+        - vloga: funkcija, ki vrne vlogo uporabnika trenutne zahteve
+          ali None, če njegovih strani ne predpomnimo
+        - stiskanje: vmesni sloj stiskanja.Stiskanje ali None
+        """
+        self.velikost = velikost
+        self.vloga = vloga
+        self.stiskanje = stiskanje
+        # ključ -> [različica, vsebina, slovar stisnjenih inačic po kodiranjih, vrsta vsebine]
+        self.strani = collections.OrderedDict()
+        self.zasedeno = 0
+        self.zadetki = 0
+        self.zgresitve = 0
+        self.zavrzene = 0
+        self._kljucavnica = threading.Lock()
+
+    def apply(self, callback, route):
+        razlicica = getattr(route.callback, 'razlicica', None)
+        if razlicica is None or route.method != 'GET':
+            return callback
+
+        @functools.wraps(callback)
+        def ovoj(*args, **kwargs):
+            vloga = self.vloga()
+            if vloga is None:
+                return callback(*args, **kwargs)
+            trenutna = razlicica(*args, **kwargs)
+            kljuc = (route.rule, tuple(sorted(kwargs.items())), bottle.request.query_string, vloga)
+            zadetek = self.poisci(kljuc, trenutna)
+            if zadetek is not None:
+                vsebina, bottle.response.content_type = zadetek
+                return razlicice.odgovor(trenutna) or self._stisnjena(kljuc, trenutna, vsebina)
+            vsebina = callback(*args, **kwargs)
+            if bottle.response.status_code != 200:
+                return vsebina
+            vrsta = bottle.response.content_type
+            if isinstance(vsebina, str):
+                vsebina = vsebina.encode(bottle.response.charset)
+                if self.shrani(kljuc, trenutna, vsebina, vrsta):
+                    return self._stisnjena(kljuc, trenutna, vsebina)
+            elif isinstance(vsebina, types.GeneratorType):
+                return self._shrani_sproti(kljuc, trenutna, vsebina, bottle.response.charset, vrsta)
+            return vsebina
+        return ovoj
+
+    def _shrani_sproti(self, kljuc, razlicica, kosi, kodiranje, vrsta):
+        """
+        Sproti vrača kose pretočne strani (glej pretocno.py) in stran shrani,
+        ko je izrisana do konca.
+        """
+        deli, velikost = [], 0
+        for kos in kosi:
+            if isinstance(kos, str):
+                kos = kos.encode(kodiranje)
+            if deli is not None:
+                deli.append(kos)
+                velikost += len(kos)
+                if 4 * velikost > self.velikost:
+                    deli = None
+            yield kos
+        if deli is not None:
+            self.shrani(kljuc, razlicica, b''.join(deli), vrsta)
+
+    def _stisnjena(self, kljuc, razlicica, vsebina):
+        """
+        Vrne shranjeno stran, stisnjeno s kodiranjem, ki ga sprejme odjemalec,
+        in nastavi glavo Content-Encoding. Stisnjeno inačico ob prvi uporabi
+        shrani poleg strani. Če stiskanje ni vklopljeno, vrne vsebino.
+        """
+        if self.stiskanje is None or len(vsebina) < self.stiskanje.prag:
+            return vsebina
+        kodiranje = self.stiskanje.kodiranje(bottle.request.environ)
+        if kodiranje is None:
+            return vsebina
+        with self._kljucavnica:
+            vnos = self.strani.get(kljuc)
+            stisnjena = vnos[2].get(kodiranje) if vnos is not None and vnos[0] == razlicica else None
+        if stisnjena is None:
+            stisnjena = self.stiskanje.stisni(vsebina, kodiranje)
+            with self._kljucavnica:
+                vnos = self.strani.get(kljuc)
+                if vnos is not None and vnos[0] == razlicica and kodiranje not in vnos[2]:
+                    vnos[2][kodiranje] = stisnjena
+                    self.zasedeno += len(stisnjena)
+                    self._zavrzi()
+        bottle.response.set_header('Content-Encoding', kodiranje)
+        return stisnjena
+
+    def poisci(self, kljuc, razlicica):
+        """
+        Vrne par (vsebina, vrsta vsebine) shranjene strani z danim ključem,
+        če je v dani različici, sicer None.
+        """
+        with self._kljucavnica:
+            vnos = self.strani.get(kljuc)
+            if vnos is None or vnos[0] != razlicica:
+                self.zgresitve += 1
+                return None
+            self.strani.move_to_end(kljuc)
+            self.zadetki += 1
+            return vnos[1], vnos[3]
+
+    @staticmethod
+    def _velikost(vnos):
+        return len(vnos[1]) + sum(map(len, vnos[2].values()))
+
+    def shrani(self, kljuc, razlicica, vsebina, vrsta='text/html; charset=UTF-8'):
+        """
+        Shrani vsebino strani in po potrebi zavrže najdlje neuporabljene strani.
+        Strani, večjih od četrtine predpomnilnika, ne shrani.
+        Vrne, ali je stran shranila.
+        """
+        if 4 * len(vsebina) > self.velikost:
+            return False
+        with self._kljucavnica:
+            stari = self.strani.pop(kljuc, None)
+            if stari is not None:
+                self.zasedeno -= self._velikost(stari)
+            self.strani[kljuc] = [razlicica, vsebina, {}, vrsta]
+            self.zasedeno += len(vsebina)
+            self._zavrzi()
+        return True
+
+    def _zavrzi(self):
+        """
+        Zavrže najdlje neuporabljene strani, dokler ne zasedajo največ dovoljene
+        velikosti. Kliče se z zaklenjeno ključavnico.
+        """
+        while self.zasedeno > self.velikost:
+            _, vnos = self.strani.popitem(last=False)
+            self.zasedeno -= self._velikost(vnos)
+            self.zavrzene += 1
+
+    def izprazni(self):
+        """
+        Zavrže vse shranjene strani.
+        """
+        with self._kljucavnica:
+            self.strani.clear()
+            self.zasedeno = 0
+
+
+_predpomnilnik = None
+
+
+def vklopi(velikost=VELIKOST, vloga=lambda: 'anonimni', stiskanje=None, app=None):
+    """
+    Namesti predpomnilnik strani v aplikacijo (privzeto bottle.default_app())
+    in ga vrne.
+    """
+    global _predpomnilnik
+    _predpomnilnik = PredpomnilnikStrani(velikost, vloga, stiskanje)
+    (app or bottle.default_app()).install(_predpomnilnik)
+    return _predpomnilnik
+
+
+def porocilo():
+    """
+    Vrne besedilno poročilo o predpomnilniku strani.
+    """
+    if _predpomnilnik is None:
+        return 'Predpomnilnik strani ni vklopljen.\n'
+    p = _predpomnilnik
+    return 'Predpomnilnik strani: {} strani, {:.1f} od {:.1f} MB, {} zadetkov, {} zgrešitev, {} zavrženih.\n'.format(
+        len(p.strani), p.zasedeno / 2**20, p.velikost / 2**20, p.zadetki, p.zgresitve, p.zavrzene)
@@ -0,0 +1,52 @@
+"""
+Pretočno izrisovanje strani s seznami.
+Stran izrišemo iz dveh predlog: predloga strani ima namesto vrstic oznako
+{{!vrstice}}, predloga vrstic pa izriše kos vrstic iz seznama igre.
+izrisi() vrne generator, ki najprej da glavo strani (vse pred oznako),
+nato vrstice po kosih, kakor jih daje generator modela, in na koncu nogo
+strani. Odjemalec tako prve bajte dobi takoj, strežnik pa ne hrani cele
+strani. Če noga strani vsebuje {{stevilo}}, tam izpišemo število vrstic.
+
+Primer:
+    return pretocno.izrisi('html/iskanje.html', 'html/vrstice_iskanja.html',
+                           Igre.poisci(niz), iskalni_niz=niz)
+"""
+import itertools
+
+import bottle
+
+import predloge
+
+KOS = 500  # število vrstic v enem kosu
+
+# oznaki, ki ju predloga strani izpiše namesto vrstic in njihovega števila
+VRSTICE = '\x00vrstice\x00'
+STEVILO = '\x00stevilo\x00'
+
+
+def izrisi(predloga, predloga_vrstic, igre, kos=KOS, **kwargs):
+    """
+    Izriše stran in vrne generator njenih kosov.
+    Argumenti:
+    - predloga: ime predloge strani z oznako {{!vrstice}}
+    - predloga_vrstic: ime predloge, ki izriše vrstice iz seznama igre
+    - igre: igre (ali drugi zapisi), po katerih gremo le enkrat
+    - kos: število vrstic v enem kosu
+    - ostali argumenti gredo obema predlogama
+    """
+    stran = bottle.template(predloga, vrstice=VRSTICE, stevilo=STEVILO, **kwargs)
+    glava, noga = stran.split(VRSTICE)
+    igre = iter(igre)
+
+    def kosi():
+        yield glava
+        vrstice = predloge.predloga(predloga_vrstic)
+        stevilo = 0
+        while True:
+            seznam = list(itertools.islice(igre, kos))
+            if not seznam:
+                break
+            stevilo += len(seznam)
+            yield vrstice.render(igre=seznam, **kwargs)
+        yield noga.replace(STEVILO, str(stevilo))
+    return kosi()
@@ -0,0 +1,190 @@
+"""
+Priporočila "podobne igre".
+Vsako igro opišemo z množico značilk: platforme, založniki, razvijalec,
+cenovni razred, razred ocene in razred prodaje. Značilke utežimo z idf,
+zato skupen razvijalec šteje veliko več kot skupna platforma, podobnost
+dveh iger pa je kosinus med njunima utežanima vektorjema.
+Za vsako igro približno izračunamo k najpodobnejših iger in jih shranimo
+v tabelo podobne_igre, zato je branje priporočil en sam pregled indeksa.
+
+Vseh parov iger ne primerjamo, zato rezultat ni nujno natančen. Kandidati
+za igro so igre, ki imajo z njo skupno katero od redkih značilk (te so
+v največ OMEJITEV igrah), in k iger z enakimi pogostimi značilkami
+(platforme, razredi ...) z najmanjšo normo; med igrami iz te skupine brez
+skupnih redkih značilk so to ravno najpodobnejše. Igre iz drugih skupin
+brez skupnih redkih značilk preverimo le, če kandidatov ni dovolj, zato
+lahko kakšno od njih zgrešimo. Natančnost v primerjavi s pregledom vseh
+iger (funkcija natancno) izmeri "python meritve.py priklic"; na pravi bazi
+je priklic na vzorcu 300 iger 1,00.
+
+Uporaba:
+    python priporocila.py [k] [datoteka]
+"""
+import bisect
+import heapq
+import math
+import sys
+import time
+from collections import defaultdict
+
+K = 10  # število shranjenih podobnih iger za vsako igro
+OMEJITEV = 200  # značilka, ki jo ima več iger, je pogosta
+CENE = [0.01, 5, 10, 20, 40]  # meje cenovnih razredov (pod 0.01 je igra zastonj)
+
+
+def _stevilo(vrednost):
+    """
+    Vrne vrednost kot število ali None, če ni znana (None, prazen niz
+    iz obrazca ali besedilo, ki ni število).
+    """
+    try:
+        return float(vrednost)
+    except (TypeError, ValueError):
+        return None
+
+
+def razred_cene(cena):
+    """
+    Vrne cenovni razred ali None, če cena ni znana.
+    """
+    cena = _stevilo(cena)
+    return None if cena is None else bisect.bisect_right(CENE, cena)
+
+
+def razred_ocene(ocena):
+    """
+    Vrne razred ocene (desetice) ali None, če ocena ni znana.
+    """
+    ocena = _stevilo(ocena)
+    return None if ocena is None else int(ocena // 10)
+
+
+def znacilke(conn):
+    """
+    Prebere značilke vseh iger iz baze.
+    Vrne slovar, ki id-ju igre priredi množico značilk,
+    predstavljenih s celimi števili.
+    """
+    stevilke = {}
+    igre = {}
+
+    def dodaj(igra, znacilka):
+        if znacilka[1] is not None:
+            igre[igra].add(stevilke.setdefault(znacilka, len(stevilke)))
+
+    for id, razvija, cena, ocena, vsebuje in conn.execute(
+            "SELECT id, razvija, cena, ocena, vsebuje FROM igra"):
+        igre[id] = set()
+        dodaj(id, ('razvija', razvija))
+        dodaj(id, ('cena', razred_cene(cena)))
+        dodaj(id, ('ocena', razred_ocene(ocena)))
+        dodaj(id, ('vsebuje', vsebuje))
+    for igra, platforma in conn.execute("SELECT ime_igre, platforma FROM podpira"):
+        if igra in igre:
+            dodaj(igra, ('platforma', platforma))
+    for igra, podjetje in conn.execute("SELECT ime_igre, podjetje FROM distributira"):
+        if igra in igre:
+            dodaj(igra, ('zaloznik', podjetje))
+    return {igra: frozenset(z) for igra, z in igre.items()}
+
+
+def _utezi(igre):
+    """
+    Vrne obrnjen indeks (značilka -> seznam iger), kvadrate uteži idf
+    značilk in norme vektorjev iger.
+    """
+    seznami = defaultdict(list)
+    for igra, z in igre.items():
+        for znacilka in z:
+            seznami[znacilka].append(igra)
+    vseh = len(igre)
+    utezi = {znacilka: math.log(vseh / len(seznam)) ** 2 for znacilka, seznam in seznami.items()}
+    norme = {igra: math.sqrt(sum(map(utezi.__getitem__, z))) or 1.0 for igra, z in igre.items()}
+    return seznami, utezi, norme
+
+
+def natancno(igre, igra, k=K, utezi=None):
+    """
+    Vrne k najpodobnejših iger dani igri kot seznam parov (podobnost, igra)
+    s pregledom vseh iger. Počasno; služi za preverjanje funkcije najblizje.
+    Argumenti:
+    - igre: slovar, ki igri priredi množico značilk (glej znacilke)
+    - igra: id igre
+    - k: največje število podobnih iger
+    - utezi: rezultat _utezi(igre), če ga že imamo
+    """
+    _, utezi, norme = utezi or _utezi(igre)
+    z, norma = igre[igra], norme[igra]
+    return heapq.nlargest(k, (
+        (sum(map(utezi.__getitem__, z & igre[druga])) / (norma * norme[druga]), druga)
+        for druga in igre if druga != igra
+    ))
+
+
+def najblizje(igre, k=K, omejitev=OMEJITEV):
+    """
+    Za vsako igro vrne par (igra, seznam parov (podobnost, podobna igra)),
+    urejen od najpodobnejše igre naprej. Seznam je približek k najpodobnejših
+    iger (glej opis modula).
+    Argumenti:
+    - igre: slovar, ki igri priredi množico značilk (glej znacilke)
+    - k: največje število podobnih iger
+    - omejitev: meja med redkimi in pogostimi značilkami
+    """
+    # obrnjen indeks, kvadrati uteži idf in norme vektorjev
+    seznami, utezi, norme = _utezi(igre)
+
+    # igre, združene po pogostih značilkah in urejene po normi
+    redke = {znacilka for znacilka, seznam in seznami.items() if len(seznam) <= omejitev}
+    skupine = defaultdict(list)
+    for igra, z in igre.items():
+        skupine[z - redke].append(igra)
+    for skupina in skupine.values():
+        skupina.sort(key=norme.__getitem__)
+
+    for igra, z in igre.items():
+        pogoste = z - redke
+        kandidati = set()
+        for znacilka in z & redke:
+            kandidati.update(seznami[znacilka])
+        kandidati.update(skupine[pogoste][:k + 1])
+        if len(kandidati) <= k:
+            for znacilka in pogoste:
+                kandidati.update(seznami[znacilka][:omejitev])
+        kandidati.discard(igra)
+        norma = norme[igra]
+        podobnosti = (
+            (sum(map(utezi.__getitem__, z & igre[druga])) / (norma * norme[druga]), druga)
+            for druga in kandidati
+        )
+        yield igra, heapq.nlargest(k, podobnosti)
+
+
+def shrani(conn, k=K):
+    """
+    Na novo izračuna podobne igre za vse igre in jih shrani v tabelo podobne_igre.
+    Vrne število iger.
+    """
+    igre = znacilke(conn)
+    conn.execute("DELETE FROM podobne_igre")
+    conn.executemany(
+        "INSERT INTO podobne_igre (igra, mesto, podobna, podobnost) VALUES (?, ?, ?, ?)",
+        ((igra, mesto, podobna, podobnost)
+         for igra, podobne in najblizje(igre, k)
+         for mesto, (podobnost, podobna) in enumerate(podobne)))
+    # tabela podobne_igre nima sprožilcev, zato spremembo zabeležimo sami (glej razlicice.py)
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'spremembe'").fetchone():
+        conn.execute("INSERT INTO spremembe (tabela, kljuc, operacija) VALUES ('podobne_igre', 0, 'spremeni')")
+    return len(igre)
+
+
+if __name__ == '__main__':
+    import sqlite3
+    k = int(sys.argv[1]) if len(sys.argv) > 1 else K
+    datoteka = sys.argv[2] if len(sys.argv) > 2 else 'igre.db'
+    conn = sqlite3.connect(datoteka)
+    zacetek = time.perf_counter()
+    with conn:
+        stevilo = shrani(conn, k)
+    print('Podobne igre za {} iger izračunane v {:.1f} s.'.format(stevilo, time.perf_counter() - zacetek))
+    conn.close()
@@ -0,0 +1,240 @@
+"""
+Pogojne zahteve GET.
+Strani dobijo različico iz dnevnika sprememb (glej spremembe.py): seznami,
+statistike in fasete zaporedno številko zadnje spremembe kataloga, strani
+iger, podjetij in platform pa zadnje spremembe, ki je zadela posamezno
+igro, podjetje oziroma platformo. Podjetje zadene sprememba njegovih
+podatkov, iger, ki jih je razvilo ali izdalo, in njegovih izdaj, platformo
+pa sprememba njenih podatkov, iger na njej in njihovih platform. Iz različice in
+piškotka uporabnika (od njega so odvisne strani) sestavimo ETag, iz časa,
+ko je proces spremembo opazil, pa Last-Modified. Če ima odjemalec stran
+že v zadnji različici, okrasek pogojno vrne 304, še preden pokliče model.
+"""
+import functools
+import hashlib
+import threading
+import time
+
+import bottle
+import spremembe
+
+# tabele, katerih spremembe vplivajo na strani
+TABELE = ['igra', 'podjetje', 'platforma', 'podpira', 'distributira', 'podobne_igre']
+# ETag se spremeni ob vsakem zagonu, saj so se lahko spremenile predloge
+ZAGON = '{:x}'.format(int(time.time()))
+PAKET = 500  # število iger v eni poizvedbi po podjetjih in platformah spremenjenih iger
+
+
+class Razlicice:
+    """
+    Različice strani, ki jih posodabljajo spremembe iz dnevnika.
+    Različica je par (zaporedna številka spremembe, čas, ko smo jo opazili).
+    """
+
+    def __init__(self, zaporedna):
+        """
+        Konstruktor različic.
+        Argumenti:
+        - zaporedna: številka zadnje spremembe v dnevniku ob zagonu
+        """
+        zacetna = (zaporedna, time.time())
+        self.katalog = zacetna
+        self.vse_igre = zacetna  # zadnja sprememba, ki vpliva na vse strani iger
+        self.igre = {}  # ime igre -> različica
+        self.imena = {}  # id igre -> ime igre
+        self.vsa_podjetja = zacetna  # zadnja sprememba, ki vpliva na vse strani podjetij
+        self.podjetja = {}  # id podjetja -> različica
+        self.vse_platforme = zacetna  # zadnja sprememba, ki vpliva na vse strani platform
+        self.platforme = {}  # id platforme -> različica
+
+    def _imena(self, id):
+        """
+        Vrne množico imen, pod katerimi je igra z danim id-jem bila ali je zdaj.
+        """
+        import model
+        imena = {ime for ime, in model.bazen.bralec().execute("SELECT ime_igre FROM igra WHERE id = ?", [id])}
+        if id in self.imena:
+            imena.add(self.imena[id])
+        for ime in imena:
+            self.imena[id] = ime
+        return imena
+
+    def _podjetja_in_platforme(self, igre):
+        """
+        Posodobi različice podjetij in platform iger, ki so se spremenile.
+        Argumenti:
+        - igre: slovar, ki id-ju igre priredi različico njene zadnje spremembe
+        """
+        import model
+        conn = model.bazen.bralec()
+        ids = list(igre)
+        najdene = set()
+        for i in range(0, len(ids), PAKET):
+            paket = ids[i:i + PAKET]
+            mesta = ', '.join('?' * len(paket))
+            for id, razvija in conn.execute("SELECT id, razvija FROM igra WHERE id IN ({})".format(mesta), paket):
+                najdene.add(id)
+                self.podjetja[razvija] = max(self.podjetja.get(razvija, igre[id]), igre[id])
+            for id, podjetje in conn.execute(
+                    "SELECT ime_igre, podjetje FROM distributira WHERE ime_igre IN ({})".format(mesta), paket):
+                self.podjetja[podjetje] = max(self.podjetja.get(podjetje, igre[id]), igre[id])
+            for id, platforma in conn.execute(
+                    "SELECT ime_igre, platforma FROM podpira WHERE ime_igre IN ({})".format(mesta), paket):
+                self.platforme[platforma] = max(self.platforme.get(platforma, igre[id]), igre[id])
+        for id in igre.keys() - najdene:
+            # izbrisana igra: ne vemo več, katera podjetja in platforme jo prikazujejo
+            self.vsa_podjetja = max(self.vsa_podjetja, igre[id])
+            self.vse_platforme = max(self.vse_platforme, igre[id])
+
+    def obdelaj(self, seznam):
+        """
+        Posodobi različice za dani seznam sprememb.
+        """
+        cas = time.time()
+        spremenjene = {}  # id igre -> različica zadnje spremembe igre
+        for sprememba in seznam:
+            razlicica = (sprememba.zaporedna, cas)
+            if sprememba.tabela != 'podobne_igre':
+                self.katalog = razlicica
+            if sprememba.tabela == 'igra':
+                spremenjene[sprememba.kljuc] = razlicica
+            elif sprememba.tabela == 'podjetje':
+                self.podjetja[sprememba.kljuc] = razlicica
+            elif sprememba.tabela == 'platforma':
+                self.platforme[sprememba.kljuc] = razlicica
+            elif sprememba.tabela == 'distributira':
+                self.podjetja[sprememba.drugi_kljuc] = razlicica
+            elif sprememba.tabela == 'podpira':
+                self.platforme[sprememba.drugi_kljuc] = razlicica
+            if sprememba.tabela in ('igra', 'podpira', 'distributira'):
+                imena = self._imena(sprememba.kljuc)
+                if not imena or sprememba.tabela == 'igra' and (sprememba.operacija == 'izbrisi' or len(imena) > 1):
+                    # izbrisana ali preimenovana igra je lahko med podobnimi igrami
+                    self.vse_igre = razlicica
+                for ime in imena:
+                    self.igre[ime] = razlicica
+            elif sprememba.tabela == 'podobne_igre' or sprememba.operacija != 'dodaj':
+                # nove podobne igre ali spremenjeno podjetje oziroma platforma
+                self.vse_igre = razlicica
+        if spremenjene:
+            self._podjetja_in_platforme(spremenjene)
+
+    def ponastavi(self):
+        """
+        Spremeni različice vseh strani, ko so bile spremembe, ki jih še nismo
+        prebrali, že obrezane, saj ne vemo, katere strani so spremenile.
+        """
+        razlicica = (spremembe.zadnja(), time.time())
+        self.katalog = razlicica
+        self.vse_igre = razlicica
+        self.vsa_podjetja = razlicica
+        self.vse_platforme = razlicica
+
+    def igra(self, ime):
+        """
+        Vrne različico strani igre z danim imenom.
+        """
+        return max(self.igre.get(ime, self.vse_igre), self.vse_igre)
+
+    def _id(self, tabela, ime):
+        """
+        Vrne id podjetja ali platforme z danim imenom ali None, če ne obstaja.
+        """
+        import model
+        vrstica = model.bazen.bralec().execute("SELECT id FROM {} WHERE ime = ?".format(tabela), [ime]).fetchone()
+        return None if vrstica is None else vrstica[0]
+
+    def podjetje(self, id=None, ime=None):
+        """
+        Vrne različico strani podjetja z danim id-jem ali imenom.
+        """
+        if id is None:
+            id = self._id('podjetje', ime)
+        return max(self.podjetja.get(id, self.vsa_podjetja), self.vsa_podjetja)
+
+    def platforma(self, id=None, ime=None):
+        """
+        Vrne različico strani platforme z danim id-jem ali imenom.
+        """
+        if id is None:
+            id = self._id('platforma', ime)
+        return max(self.platforme.get(id, self.vse_platforme), self.vse_platforme)
+
+
+_razlicice = None
+_nalaganje = threading.Lock()
+
+
+def razlicice():
+    """
+    Vrne različice strani. Ob prvem klicu se prijavi na dnevnik sprememb
+    kot zadnji odjemalec, da se različica spremeni šele, ko so spremembe
+    vidne v vseh predpomnilnikih, iz katerih strani berejo.
+    """
+    global _razlicice
+    with _nalaganje:
+        if _razlicice is None:
+            od = spremembe.zadnja()
+            _razlicice = Razlicice(od)
+            spremembe.prijavi(_razlicice.obdelaj, tabele=TABELE, od=od, zadnji=True,
+                              ponastavi=_razlicice.ponastavi)
+    return _razlicice
+
+
+def _nespremenjena(etag, cas):
+    """
+    Ali ima odjemalec glede na glavi If-None-Match in If-Modified-Since
+    stran že v dani različici.
+    """
+    oznake = bottle.request.headers.get('If-None-Match')
+    if oznake is not None:
+        oznake = {oznaka.strip() for oznaka in oznake.split(',')}
+        return '*' in oznake or etag in oznake or etag[2:] in oznake
+    datum = bottle.request.headers.get('If-Modified-Since')
+    if datum:
+        datum = bottle.parse_date(datum.split(';')[0].strip())
+        return datum is not None and datum >= int(cas)
+    return False
+
+
+def odgovor(razlicica):
+    """
+    Odgovoru doda glave ETag in Last-Modified za dano različico strani.
+    Če ima odjemalec stran že v tej različici, vrne odgovor 304, sicer None.
+    """
+    zaporedna, cas = razlicica
+    uporabnik = hashlib.sha1((bottle.request.get_cookie('seja') or '').encode()).hexdigest()[:10]
+    etag = 'W/"{}-{}-{}"'.format(ZAGON, zaporedna, uporabnik)
+    glave = {
+        'ETag': etag,
+        'Last-Modified': bottle.http_date(int(cas)),
+        'Cache-Control': 'private, no-cache',
+        'Vary': 'Cookie',
+    }
+    if _nespremenjena(etag, cas):
+        return bottle.HTTPResponse(status=304, **glave)
+    for ime, vrednost in glave.items():
+        bottle.response.set_header(ime, vrednost)
+    return None
+
+
+def _katalog(*args, **kwargs):
+    return razlicice().katalog
+
+
+def pogojno(razlicica=_katalog):
+    """
+    Okrasek poti, ki strani doda glavi ETag in Last-Modified
+    ter na pogojne zahteve odgovori s 304.
+    Funkcijo različice shrani v atribut razlicica ovite poti.
+    Argumenti:
+    - razlicica: funkcija, ki iz argumentov poti vrne različico strani;
+      privzeto je to različica celotnega kataloga
+    """
+    def okrasek(funkcija):
+        @functools.wraps(funkcija)
+        def ovoj(*args, **kwargs):
+            return odgovor(razlicica(*args, **kwargs)) or funkcija(*args, **kwargs)
+        ovoj.razlicica = razlicica
+        return ovoj
+    return okrasek
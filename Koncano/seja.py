@@ -0,0 +1,109 @@
+"""
+Seje prijavljenih uporabnikov.
+Sejo hrani piškotek seja s kratkim podpisanim žetonom oblike
+    uid.ime.izdano.podpis
+kjer je ime kodirano z base64, izdano čas prijave v sekundah, podpis pa
+prvih 16 bajtov HMAC-SHA256 ostalega dela žetona. Žeton ne vsebuje
+objekta pickle (kot piškotki, ki jih podpiše bottle), zato ga preberemo
+brez nalaganja kode, podpis pa primerjamo s hmac.compare_digest.
+Žeton preverimo le enkrat na zahtevo: sejo shranimo v environ zahteve,
+kjer jo najdejo vsi nadaljnji klici funkcije trenutna.
+"""
+import base64
+import functools
+import hashlib
+import hmac
+import time
+
+import bottle
+
+PISKOTEK = 'seja'
+TRAJANJE = 30 * 24 * 3600  # po toliko sekundah od prijave seja poteče
+PODPIS = 16  # število bajtov podpisa v žetonu
+KLJUC = 'baza.seja'  # ključ v environ, pod katerim hranimo sejo zahteve
+
+
+class Seja:
+    """
+    Seja prijavljenega uporabnika.
+    """
+    __slots__ = ('uid', 'ime', 'izdano')
+
+    def __init__(self, uid, ime, izdano):
+        """
+        Konstruktor seje.
+        Argumenti:
+        - uid: id uporabnika
+        - ime: uporabniško ime
+        - izdano: čas prijave v sekundah
+        """
+        self.uid = uid
+        self.ime = ime
+        self.izdano = izdano
+
+
+@functools.lru_cache(maxsize=4)
+def _podpisnik(skrivnost):
+    return hmac.new(skrivnost.encode('utf-8'), digestmod=hashlib.sha256)
+
+
+def _podpis(vsebina, skrivnost):
+    podpisnik = _podpisnik(skrivnost).copy()
+    podpisnik.update(vsebina)
+    return base64.urlsafe_b64encode(podpisnik.digest()[:PODPIS]).rstrip(b'=')
+
+
+def zeton(uid, ime, skrivnost, izdano=None):
+    """
+    Vrne podpisan žeton seje uporabnika z danim id-jem in imenom.
+    """
+    ime = base64.urlsafe_b64encode(ime.encode('utf-8')).rstrip(b'=').decode('ascii')
+    vsebina = '{}.{}.{}'.format(uid, ime, int(time.time() if izdano is None else izdano)).encode('ascii')
+    return (vsebina + b'.' + _podpis(vsebina, skrivnost)).decode('ascii')
+
+
+def preberi(niz, skrivnost, trajanje=TRAJANJE):
+    """
+    Vrne sejo iz žetona ali None, če žeton ni veljaven ali je potekel.
+    """
+    if not niz:
+        return None
+    try:
+        vsebina, podpis = niz.encode('ascii').rsplit(b'.', 1)
+        if not hmac.compare_digest(podpis, _podpis(vsebina, skrivnost)):
+            return None
+        uid, ime, izdano = vsebina.split(b'.')
+        ime = base64.urlsafe_b64decode(ime + b'=' * (-len(ime) % 4)).decode('utf-8')
+        uid, izdano = int(uid), int(izdano)
+    except ValueError:
+        return None
+    if izdano + trajanje < time.time():
+        return None
+    return Seja(uid, ime, izdano)
+
+
+def trenutna(skrivnost):
+    """
+    Vrne sejo trenutne zahteve ali None, če uporabnik ni prijavljen.
+    Žeton preverimo ob prvem klicu, nato sejo vzamemo iz environ.
+    """
+    environ = bottle.request.environ
+    if KLJUC not in environ:
+        environ[KLJUC] = preberi(bottle.request.cookies.get(PISKOTEK), skrivnost)
+    return environ[KLJUC]
+
+
+def prijavi(uid, ime, skrivnost):
+    """
+    Odgovoru doda piškotek s sejo danega uporabnika.
+    """
+    bottle.response.set_cookie(PISKOTEK, zeton(uid, ime, skrivnost), path='/', httponly=True)
+    bottle.request.environ[KLJUC] = Seja(uid, ime, int(time.time()))
+
+
+def odjavi():
+    """
+    Odgovoru doda brisanje piškotka s sejo.
+    """
+    bottle.response.delete_cookie(PISKOTEK, path='/')
+    bottle.request.environ[KLJUC] = None
@@ -1,37 +1,252 @@
 import json
+import os
 import random
 import bottle
+import geslo
+import katalog
+import omejevanje
+import predloge
+import pretocno
+import razlicice
+import seja
+import spremembe
+import sredstva
+import stiskanje
+from urllib.parse import urlencode
 from sqlite3 import IntegrityError
-from model import LoginError,  Uporabnik, Igre, Podjetje, Platforma
+from geslo import Zasedeno
+from omejevanje import Omejeno
+from model import LoginError,  Uporabnik, Igre, Podjetje, Platforma, Statistika, STRAN, RAZVRSTITVE
 
 
 NASTAVITVE = 'nastavitve.json' 
-# Želi odpreti nastavitve.json, če ne obstajajao ga naredi
-try: 
-    with open(NASTAVITVE) as f:
-        nastavitve = json.load(f)
-        SKRIVNOST = nastavitve['skrivnost']
-except FileNotFoundError:
-    SKRIVNOST = "".join(chr(random.randrange(32, 128)) for _ in range(32))
-    with open(NASTAVITVE, "w") as f:
-        json.dump({'skrivnost': SKRIVNOST}, f)
+_nastavitve = None
+
+
+def nastavitve():
+    """
+    Vrne slovar nastavitev.
+    Ob prvem klicu prebere nastavitve.json, če ne obstaja, ga naredi.
+    """
+    global _nastavitve
+    if _nastavitve is None:
+        try:
+            with open(NASTAVITVE) as f:
+                _nastavitve = json.load(f)
+        except FileNotFoundError:
+            skrivnost = "".join(chr(random.randrange(32, 128)) for _ in range(32))
+            _nastavitve = {'skrivnost': skrivnost}
+            with open(NASTAVITVE, "w") as f:
+                json.dump(_nastavitve, f)
+    return _nastavitve
+
+
+def skrivnost():
+    """
+    Vrne skrivnost za podpisovanje piškotkov.
+    """
+    return nastavitve()['skrivnost']
+
+
+def uporabnisko_ime():
+    """
+    Vrne ime prijavljenega uporabnika ali None (glej seja.py).
+    """
+    trenutna = seja.trenutna(skrivnost())
+    return None if trenutna is None else trenutna.ime
+
+
+def ogrej():
+    """
+    Vnaprej prevede vse predloge iz mape html,
+    da prve zahteve ne čakajo na prevajanje.
+    """
+    for ime in sorted(os.listdir('html')):
+        predloge.prevedi('html/' + ime)
+
+
+def vklopi_nadzor():
+    """
+    Vklopi nadzor poizvedb, če je v nastavitvah podan ključ "nadzor",
+    npr. {"nadzor": {"prag": 0.1, "dnevnik": 100}}.
+    """
+    if 'nadzor' in nastavitve():
+        import nadzor
+        nadzor.vklopi(**nastavitve()['nadzor'])
+
+
+def vklopi_katalog():
+    """
+    Vklopi katalog v pomnilniku (glej katalog.py), če je v nastavitvah
+    ključ "katalog" nastavljen na true.
+    """
+    if nastavitve().get('katalog'):
+        katalog.vklopi()
+
+
+def vloga():
+    """
+    Vrne vlogo uporabnika za predpomnilnik strani: 'anonimni' ali 'admin';
+    strani drugih prijavljenih uporabnikov (na njih je uporabniško ime)
+    ne predpomnimo.
+    """
+    ime = uporabnisko_ime()
+    if ime is None:
+        return 'anonimni'
+    if ime == 'admin':
+        return 'admin'
+    return None
+
+
+def vklopi_stiskanje():
+    """
+    Aplikacijo ovije v stiskanje odgovorov (glej stiskanje.py), razen če je
+    v nastavitvah ključ "stiskanje" nastavljen na false. Nastavitve podamo
+    npr. kot {"stiskanje": {"prag": 1024, "raven": 6}}.
+    """
+    nastavitve_stiskanja = nastavitve().get('stiskanje', True)
+    if nastavitve_stiskanja is not False:
+        stiskanje.vklopi(bottle.default_app(), **(nastavitve_stiskanja if isinstance(nastavitve_stiskanja, dict) else {}))
+
+
+def vklopi_zgoscevanje():
+    """
+    Zgoščevanje gesel prestavi v bazen procesov (glej geslo.py), razen če je
+    v nastavitvah ključ "zgoscevanje" nastavljen na false. Nastavitve podamo
+    npr. kot {"zgoscevanje": {"procesi": 2, "vrsta": 16}}; obe števili
+    veljata za vsak proces strežnika posebej. Brez števila procesov si
+    procesi strežnika razdelijo jedra.
+    """
+    nastavitve_zgoscevanja = nastavitve().get('zgoscevanje', True)
+    if nastavitve_zgoscevanja is not False:
+        import strezniki
+        streznik = nastavitve().get('streznik') or {}
+        streznikov = streznik.get('procesi', strezniki.PROCESI) if streznik.get('nacin') == 'procesi' else 1
+        geslo.vklopi(streznikov=streznikov,
+                     **(nastavitve_zgoscevanja if isinstance(nastavitve_zgoscevanja, dict) else {}))
+
+
+def vklopi_omejevanje():
+    """
+    Vklopi omejevanje poskusov prijave in vpisa (glej omejevanje.py), razen
+    če je v nastavitvah ključ "omejevanje" nastavljen na false. Nastavitve
+    podamo npr. kot {"omejevanje": {"hitrost_ip": 1, "zmogljivost_ip": 20,
+    "hitrost_imena": 0.2, "zmogljivost_imena": 5, "najvec": 10000}}.
+    """
+    nastavitve_omejevanja = nastavitve().get('omejevanje', True)
+    if nastavitve_omejevanja is not False:
+        omejevanje.vklopi(**(nastavitve_omejevanja if isinstance(nastavitve_omejevanja, dict) else {}))
+
+
+def vklopi_api():
+    """
+    Doda poti JSON API (glej api.py), razen če je v nastavitvah ključ "api"
+    nastavljen na false. API uvozimo šele tu, da ne podaljša zagona.
+    """
+    if nastavitve().get('api', True) is not False:
+        import api
+
+
+def aplikacija():
+    """
+    Vrne aplikacijo WSGI, ki jo poženemo: bottle z vsemi vmesnimi sloji.
+    """
+    return stiskanje.vmesni_sloj() or bottle.default_app()
+
+
+def vklopi_predpomnilnik():
+    """
+    Vklopi predpomnilnik izrisanih strani (glej predpomnilnik.py), če je
+    v nastavitvah podan ključ "predpomnilnik", npr.
+    {"predpomnilnik": {"velikost": 67108864}}. Vklopiti ga moramo
+    za stiskanjem, da hrani tudi stisnjene strani.
+    """
+    if 'predpomnilnik' in nastavitve():
+        import predpomnilnik
+        predpomnilnik.vklopi(vloga=vloga, stiskanje=stiskanje.vmesni_sloj(), **nastavitve()['predpomnilnik'])
+
+
+# načini strežnika in imena razredov v strezniki.py
+STREZNIKI = {
+    'niti': 'NitniStreznik',
+    'procesi': 'ProcesniStreznik',
+}
+
+
+def zazeni(nastavitve_streznika=None):
+    """
+    Zažene strežnik. Brez nastavitev teče razvojni strežnik (wsgiref
+    s ponovnim nalaganjem ob spremembah in razhroščevanjem), sicer
+    produkcijski, npr. {"nacin": "procesi", "procesi": 2, "niti": 8,
+    "zaostanek": 128, "gostitelj": "0.0.0.0", "vrata": 8080, "tiho": true}.
+    """
+    if nastavitve_streznika is None:
+        bottle.run(aplikacija(), reloader=True, debug = True)
+        return
+    import strezniki
+    moznosti = dict(nastavitve_streznika)
+    streznik = getattr(strezniki, STREZNIKI[moznosti.pop('nacin', 'niti')])
+    bottle.run(
+        aplikacija(),
+        server=streznik,
+        host=moznosti.pop('gostitelj', '127.0.0.1'),
+        port=moznosti.pop('vrata', 8080),
+        quiet=moznosti.pop('tiho', True),
+        reloader=False, debug=False,
+        **moznosti
+    )
+
+
+@bottle.hook('before_request')
+def preberi_spremembe():
+    """
+    Pred vsako zahtevo predpomnilnikom posreduje spremembe,
+    ki so jih v bazo zapisali drugi procesi.
+    """
+    spremembe.obdelaj(cakaj=False)
 
 
 def zahtevaj_prijavo():
-    if bottle.request.get_cookie('uporabnik', secret = SKRIVNOST) != 'admin':
+    if uporabnisko_ime() != 'admin':
         return False
     return True
 
 
 
 def zahtevaj_odjavo():
-    if bottle.request.get_cookie('uporabnik', secret=SKRIVNOST):
+    if uporabnisko_ime():
         bottle.redirect('/')
 
 
+def zasedeno(predloga, ime):
+    """
+    Odgovori s 503, ko so vsi procesi za zgoščevanje gesel zasedeni.
+    """
+    bottle.response.status = 503
+    bottle.response.set_header('Retry-After', '1')
+    return bottle.template(
+        predloga,
+        napaka = 'Strežnik je preobremenjen, poskusite znova čez trenutek.',
+        ime = ime
+    )
+
+
+def omejeno(predloga, ime, cakaj):
+    """
+    Odgovori s 429, ko je poskusov prijave ali vpisa preveč.
+    """
+    sekunde = omejevanje.sekunde(cakaj)
+    bottle.response.status = 429
+    bottle.response.set_header('Retry-After', str(sekunde))
+    return bottle.template(
+        predloga,
+        napaka = 'Preveč poskusov, poskusite znova čez {} s.'.format(sekunde),
+        ime = ime
+    )
+
+
 def prijavi_uporabnika(uporabnik):
-    bottle.response.set_cookie('uporabnik', uporabnik.ime, path='/', secret=SKRIVNOST)
-    bottle.response.set_cookie('uid', str(uporabnik.id), path='/', secret=SKRIVNOST)
+    seja.prijavi(uporabnik.id, uporabnik.ime, skrivnost())
     bottle.redirect('/')
 
 @bottle.route('/prijava/')
@@ -48,7 +263,12 @@ def prijava_post():
     ime = bottle.request.forms['uporabnisko_ime']
     geslo = bottle.request.forms['geslo']
     try:
+        omejevanje.preveri(bottle.request.environ.get('REMOTE_ADDR'), ime)
         prijavi_uporabnika(Uporabnik.prijava(ime, geslo))
+    except Omejeno as omejitev:
+        return omejeno('html/prijava.html', ime, omejitev.cakaj)
+    except Zasedeno:
+        return zasedeno('html/prijava.html', ime)
     except LoginError:
         return bottle.template(
             'html/prijava.html',
@@ -79,9 +299,14 @@ def vpis_post():
             ime=ime
         )
     try:
+        omejevanje.preveri(bottle.request.environ.get('REMOTE_ADDR'), ime)
         uporabnik = Uporabnik(ime)
         uporabnik.dodaj_v_bazo(geslo1)
         prijavi_uporabnika(uporabnik)
+    except Omejeno as omejitev:
+        return omejeno('html/vpis.html', ime, omejitev.cakaj)
+    except Zasedeno:
+        return zasedeno('html/vpis.html', ime)
     except IntegrityError:
         return bottle.template(
             'html/vpis.html',
@@ -92,29 +317,31 @@ def vpis_post():
 
 @bottle.get('/odjava/')
 def odjava():
-    bottle.response.delete_cookie('uporabnik', path='/')
-    bottle.response.delete_cookie('uid', path='/')
+    seja.odjavi()
     bottle.redirect('/')
 
 # ------------------------------------------------------------------
 # Glavna Stran
 @bottle.route('/')
+@razlicice.pogojno()
 def glavna_stran():
     return bottle.template(
         'html/glavna_stran.html',
         admin = zahtevaj_prijavo(),
         najnovejse_igre = Igre.najnovejse_igre(),
-        ime = bottle.request.get_cookie('uporabnik', secret=SKRIVNOST)
+        ime = uporabnisko_ime()
     )
 
 # Prikaz igre
 @bottle.get('/<igra>/')
+@razlicice.pogojno(lambda igra: razlicice.razlicice().igra(igra))
 def igra(igra):
     return bottle.template(
         'html/igra.html',
         admin = zahtevaj_prijavo(),
         igra = igra,
-        podatki_o_igri = Igre.podatki_o_igri(igra)
+        podatki_o_igri = Igre.podatki_o_igri(igra),
+        podobne_igre = Igre.podobne_igre(igra)
     )
 
 # Dodajanje platforme igri
@@ -207,69 +434,193 @@ def dodaj_igri_distributerja(igra):
         igrca.dodajdistributerja()
         bottle.redirect('/' + str(ime_igre) + '/')
 
+def zacetek_strani(parameter):
+    """
+    Vrne id, za katerim se začne stran seznama, iz parametra v naslovu.
+    Če parametra ni ali ni število, vrne 0 (prva stran).
+    """
+    try:
+        return max(int(bottle.request.query.get(parameter, 0)), 0)
+    except ValueError:
+        return 0
+
+
+def stran(igre, kljuc=lambda igra: igra.id):
+    """
+    Iz seznama največ STRAN + 1 iger vrne igre na strani
+    in ključ, za katerim se začne naslednja stran (None, če je ni).
+    """
+    igre = list(igre)
+    if len(igre) > STRAN:
+        return igre[:STRAN], kljuc(igre[STRAN - 1])
+    return igre, None
+
+
 # Prikaz Podjetja
 @bottle.get('/podjetje/<podjetje>/')
+@razlicice.pogojno(lambda podjetje: razlicice.razlicice().podjetje(ime=podjetje))
 def podjetje(podjetje):
+    podatki_o_podjetju = list(Podjetje.podatki_o_podjetju(podjetje))
+    razvite = izdane = []
+    naslednje_razvite = naslednje_izdane = None
+    stevilo_razvitih = stevilo_izdanih = 0
+    razvite_od = zacetek_strani('razvite_od')
+    izdane_od = zacetek_strani('izdane_od')
+    for podatek in podatki_o_podjetju:
+        razvite, naslednje_razvite = stran(Podjetje.razvite_igre(podatek.id, razvite_od, STRAN + 1))
+        izdane, naslednje_izdane = stran(Podjetje.izdane_igre(podatek.id, izdane_od, STRAN + 1))
+        stevilo_razvitih, stevilo_izdanih = Podjetje.stevilo_iger(podatek.id)
     return bottle.template(
         'html/podjetje.html',
         podjetje = podjetje,
-        podatki_o_podjetju = Podjetje.podatki_o_podjetju(podjetje)
+        podatki_o_podjetju = podatki_o_podjetju,
+        razvite = razvite, naslednje_razvite = naslednje_razvite, stevilo_razvitih = stevilo_razvitih,
+        izdane = izdane, naslednje_izdane = naslednje_izdane, stevilo_izdanih = stevilo_izdanih,
+        razvite_od = razvite_od, izdane_od = izdane_od
     )
 
 # Prikaz Platforme
 @bottle.get('/platforme/<platforma>/')
+@razlicice.pogojno(lambda platforma: razlicice.razlicice().platforma(ime=platforma))
 def platforma(platforma):
+    podatki_o_platformi = list(Platforma.podatki_o_platformi(platforma))
+    razvrsti = bottle.request.query.get('razvrsti')
+    if razvrsti not in RAZVRSTITVE:
+        razvrsti = 'id'
+    od = None
+    if 'od_id' in bottle.request.query:
+        try:
+            tip = RAZVRSTITVE[razvrsti][3]
+            od = (tip(bottle.request.query.getunicode('od', '0')), int(bottle.request.query.od_id))
+        except ValueError:
+            od = None
+    igre, naslednja = [], None
+    stevilo_iger = 0
+    for podatek in podatki_o_platformi:
+        igre, naslednja = stran(Platforma.igre(podatek.id, razvrsti, od, STRAN + 1),
+                                lambda igra: igra.kljuc(razvrsti))
+        stevilo_iger = Platforma.stevilo_iger(podatek.id)
+    if naslednja is not None:
+        naslednja = urlencode({'razvrsti': razvrsti, 'od': naslednja[0], 'od_id': naslednja[1]})
     return bottle.template(
         'html/platforma.html',
         platforma = platforma,
-        podatki_o_platformi = Platforma.podatki_o_platformi(platforma)
+        podatki_o_platformi = podatki_o_platformi,
+        igre = igre, stevilo_iger = stevilo_iger,
+        razvrsti = razvrsti, prva_stran = od is None, naslednja = naslednja
     )
 
 # Iskanje stran
 @bottle.get('/isci/')
+@razlicice.pogojno()
 def iskanje():
     iskalni_niz = bottle.request.query.getunicode('iskalni_niz')
     igre = Igre.poisci(iskalni_niz)
-    return bottle.template(
-        'html/iskanje.html',
-        iskalni_niz = iskalni_niz,
-        igre = igre
+    return pretocno.izrisi(
+        'html/iskanje.html', 'html/vrstice_iskanja.html', igre,
+        iskalni_niz = iskalni_niz
     )
 
 # Glej vse igre stran, + vse verjante
 @bottle.get('/glej_vse_igre/')
+@razlicice.pogojno()
 def glej_vse_igre():
-    return bottle.template(
-        'html/glej_vse_igre.html',
-        glej_vse_igre=Igre.glej_vse_igre()
-    )
+    return pretocno.izrisi('html/glej_vse_igre.html', 'html/vrstice_iger.html', Igre.glej_vse_igre())
 
 @bottle.get('/glej_vse_igre/po_imenih/')
+@razlicice.pogojno()
 def glej_vse_igre_imena():
-    return bottle.template(
-        'html/glej_vse_igre_po_imenih.html',
-        glej_vse_igre_imena=Igre.glej_vse_igre_imena()
-    )
+    return pretocno.izrisi('html/glej_vse_igre_po_imenih.html', 'html/vrstice_iger.html', Igre.glej_vse_igre_imena())
 
 @bottle.get('/glej_vse_igre/po_datumu/')
+@razlicice.pogojno()
 def glej_vse_igre_datum():
-    return bottle.template(
-        'html/glej_vse_igre_po_datumu.html',
-        glej_vse_igre_datum=Igre.glej_vse_igre_datum()
-    )
+    return pretocno.izrisi('html/glej_vse_igre_po_datumu.html', 'html/vrstice_iger.html', Igre.glej_vse_igre_datum())
 
 @bottle.get('/glej_vse_igre/po_ceni/')
+@razlicice.pogojno()
 def glej_vse_igre_cena():
-    return bottle.template(
-        'html/glej_vse_igre_po_ceni.html',
-        glej_vse_igre_cena=Igre.glej_vse_igre_cena()
-    )
+    return pretocno.izrisi('html/glej_vse_igre_po_ceni.html', 'html/vrstice_iger.html', Igre.glej_vse_igre_cena())
 
 @bottle.get('/glej_vse_igre/po_oceni/')
+@razlicice.pogojno()
 def glej_vse_igre_ocena():
+    return pretocno.izrisi('html/glej_vse_igre_po_oceni.html', 'html/vrstice_iger.html', Igre.glej_vse_igre_ocena())
+
+# Statistika iger po skupinah
+STATISTIKE = {
+    'razvijalci': ('Razvijalec', Statistika.po_razvijalcih),
+    'platforme': ('Platforma', Statistika.po_platformah),
+    'leta': ('Leto izdaje', Statistika.po_letih),
+}
+
+@bottle.get('/statistika/<skupina>/')
+@razlicice.pogojno()
+def statistika(skupina):
+    if skupina not in STATISTIKE:
+        bottle.abort(404, 'Te statistike ni!')
+    naslov, statistika = STATISTIKE[skupina]
     return bottle.template(
-        'html/glej_vse_igre_po_oceni.html',
-        glej_vse_igre_ocena=Igre.glej_vse_igre_ocena()
+        'html/statistika.html',
+        naslov = naslov,
+        statistika = statistika()
+    )
+
+NAJVEC_VREDNOSTI = 10  # koliko vrednosti vsake fasete pokažemo
+
+
+def oznake_vrednosti(faseta, vrednosti):
+    """
+    Vrne slovar, ki vrednostim fasete priredi njihove opise.
+    """
+    if faseta == 'platforma':
+        return Platforma.imena_po_id(vrednosti)
+    if faseta in ('zaloznik', 'razvijalec'):
+        return Podjetje.imena_po_id(vrednosti)
+    import fasete
+    return {vrednost: fasete.oznaka(faseta, vrednost) for vrednost in vrednosti}
+
+
+# Filtriranje iger po fasetah
+@bottle.get('/fasete/')
+@razlicice.pogojno()
+def filtriranje():
+    import fasete
+    izbira = {}
+    for faseta, (_, tip) in fasete.FASETE.items():
+        try:
+            izbira[faseta] = [tip(vrednost) for vrednost in bottle.request.query.getall(faseta)]
+        except ValueError:
+            izbira[faseta] = []
+    vse = fasete.fasete()
+    stevila = vse.stevila(izbira)
+    izbrane = vse.izberi(izbira)
+    od = zacetek_strani('od')
+    ids = [id for id in izbrane if id > od][:STRAN + 1]
+    igre, naslednja = stran(Igre.igre_po_id(ids) if ids else [])
+
+    pari = [(faseta, vrednost) for faseta, vrednosti in izbira.items() for vrednost in vrednosti]
+    prikaz = []
+    for faseta, (opis, _) in fasete.FASETE.items():
+        vrednosti = [par for par in stevila[faseta] if par[0] in izbira[faseta]]
+        vrednosti += [par for par in stevila[faseta] if par[0] not in izbira[faseta]][:NAJVEC_VREDNOSTI]
+        oznake = oznake_vrednosti(faseta, [vrednost for vrednost, _ in vrednosti])
+        vrstice = []
+        for vrednost, stevilo in vrednosti:
+            izbrana = vrednost in izbira[faseta]
+            if izbrana:
+                nova = [par for par in pari if par != (faseta, vrednost)]
+            else:
+                nova = pari + [(faseta, vrednost)]
+            vrstice.append((oznake.get(vrednost, vrednost), stevilo, izbrana, urlencode(nova)))
+        prikaz.append((opis, vrstice))
+    return bottle.template(
+        'html/fasete.html',
+        fasete = prikaz,
+        stevilo_iger = len(izbrane),
+        igre = igre,
+        naslednja = None if naslednja is None else urlencode(pari + [('od', naslednja)]),
+        prva = urlencode(pari) if od else None
     )
 
 # Dodajanje igre
@@ -460,4 +811,73 @@ def dodaj_podjetje_post():
         bottle.redirect('/')
 
 
-bottle.run(reloader=True, debug = True)
+# Množični uvoz podatkov iz datotek CSV
+@bottle.get('/uvoz/')
+def uvoz_podatkov():
+    if not zahtevaj_prijavo():
+        bottle.abort(403, 'Uvoz lahko vidi le administrator!')
+    import uvoz
+    return bottle.template('html/uvoz.html', napaka=None, vrste=uvoz.VRSTE, uvozi=uvoz.uvozi())
+
+@bottle.post('/uvoz/')
+def uvoz_podatkov_post():
+    if not zahtevaj_prijavo():
+        bottle.abort(403, 'Uvoz lahko začne le administrator!')
+    import uvoz
+    try:
+        id = uvoz.sprejmi(bottle.request.environ)
+    except uvoz.NapakaUvoza as napaka:
+        bottle.response.status = napaka.status
+        return bottle.template('html/uvoz.html', napaka=napaka.opis, vrste=uvoz.VRSTE, uvozi=uvoz.uvozi())
+    if 'application/json' in bottle.request.headers.get('Accept', ''):
+        bottle.response.status = 202
+        bottle.response.set_header('Location', '/uvoz/{}/'.format(id))
+        return uvoz.stanje(id)
+    bottle.redirect('/uvoz/')
+
+@bottle.get('/uvoz/<id:re:[0-9a-f]+>/')
+def stanje_uvoza(id):
+    if not zahtevaj_prijavo():
+        bottle.abort(403, 'Uvoz lahko vidi le administrator!')
+    import uvoz
+    stanje = uvoz.stanje(id)
+    if stanje is None:
+        bottle.abort(404, 'Uvoza ni!')
+    return stanje
+
+@bottle.get('/uvoz/<id:re:[0-9a-f]+>/zavrnjene.csv')
+def zavrnjene_vrstice(id):
+    if not zahtevaj_prijavo():
+        bottle.abort(403, 'Uvoz lahko vidi le administrator!')
+    import uvoz
+    return bottle.static_file(uvoz.zavrnjene(id), root='.', mimetype='text/csv', download='zavrnjene.csv')
+
+
+# Statična sredstva z odtisom vsebine v imenu
+@bottle.get(sredstva.PREDPONA + '<ime:path>')
+def staticno(ime):
+    return sredstva.sredstva().odgovor(ime)
+
+
+# Poročilo nadzora poizvedb
+@bottle.get('/nadzor/')
+def porocilo_nadzora():
+    if not zahtevaj_prijavo():
+        bottle.abort(403, 'Poročilo lahko vidi le administrator!')
+    bottle.response.content_type = 'text/plain; charset=utf-8'
+    import nadzor
+    import predpomnilnik
+    return nadzor.porocilo() + '\n' + predpomnilnik.porocilo() + stiskanje.porocilo() + geslo.porocilo() + omejevanje.porocilo()
+
+
+if __name__ == '__main__':
+    ogrej()
+    vklopi_nadzor()
+    vklopi_katalog()
+    vklopi_stiskanje()
+    vklopi_predpomnilnik()
+    vklopi_zgoscevanje()
+    vklopi_omejevanje()
+    vklopi_api()
+    razlicice.razlicice()
+    zazeni(nastavitve().get('streznik'))
@@ -0,0 +1,244 @@
+"""
+Branje dnevnika sprememb (tabela spremembe, glej baza.Spremembe).
+Predpomnilniki se prijavijo kot odjemalci in dobijo le spremembe tabel,
+ki jih zanimajo, zato lahko popravijo samo prizadete vnose. Vsak odjemalec
+si zapomni zaporedno številko zadnje obdelane spremembe, zato spremembe
+dobijo tudi predpomnilniki v drugih procesih, ki pišejo v isto bazo.
+
+Model po vsakem pisanju pokliče obdelaj(); spletni vmesnik jo pokliče
+še pred vsako zahtevo, da opazi spremembe drugih procesov. Po pisanju
+obdelaj iz dnevnika izbriše spremembe, ki so jih prebrali vsi odjemalci
+tega procesa, a zadnjih OHRANI sprememb pusti za druge procese.
+Odjemalec procesa, ki dlje časa ni bral, lahko tako ostane brez sprememb,
+ki jih je drug proces že obrezal. Takrat namesto sprememb dobi klic
+ponastavi in se zgradi na novo iz baze.
+
+Primer:
+    odjemalec = spremembe.prijavi(
+        lambda seznam: print([s.kljuc for s in seznam]), tabele=['igra'])
+    ...
+    spremembe.obdelaj()
+"""
+import sys
+import threading
+import traceback
+
+OHRANI = 10000  # toliko zadnjih sprememb obdržimo za odjemalce v drugih procesih
+OBREZI = 1000  # dnevnik obrežemo, ko je v njem toliko sprememb za obrezovanje
+
+
+class Sprememba:
+    """
+    En zapis v dnevniku sprememb.
+    """
+
+    __slots__ = ('zaporedna', 'tabela', 'kljuc', 'drugi_kljuc', 'operacija')
+
+    def __init__(self, zaporedna, tabela, kljuc, drugi_kljuc, operacija):
+        """
+        Konstruktor spremembe.
+        Argumenti:
+        - zaporedna: zaporedna številka spremembe
+        - tabela: ime spremenjene tabele
+        - kljuc: id vrstice (pri povezovalnih tabelah id igre)
+        - drugi_kljuc: pri povezovalnih tabelah id platforme ali podjetja, sicer None
+        - operacija: 'dodaj', 'spremeni' ali 'izbrisi'
+        """
+        self.zaporedna = zaporedna
+        self.tabela = tabela
+        self.kljuc = kljuc
+        self.drugi_kljuc = drugi_kljuc
+        self.operacija = operacija
+
+    def __repr__(self):
+        return 'Sprememba({}, {!r}, {}, {}, {!r})'.format(
+            self.zaporedna, self.tabela, self.kljuc, self.drugi_kljuc, self.operacija)
+
+
+class Odjemalec:
+    """
+    Prijavljen bralec dnevnika sprememb.
+    """
+
+    def __init__(self, obdelava, tabele, zaporedna, zadnji=False, ponastavi=None):
+        """
+        Konstruktor odjemalca.
+        Argumenti:
+        - obdelava: funkcija, ki dobi neprazen seznam novih sprememb
+        - tabele: imena tabel, katerih spremembe odjemalca zanimajo (None pomeni vse)
+        - zaporedna: številka zadnje spremembe, ki jo odjemalec že pozna
+        - zadnji: ali odjemalca obvestimo šele za vsemi drugimi
+        - ponastavi: funkcija brez argumentov, ki odjemalca zgradi na novo iz baze,
+          ko so bile spremembe, ki jih še ni prebral, že obrezane
+        """
+        self.obdelava = obdelava
+        self.ponastavi = ponastavi
+        self.tabele = None if tabele is None else set(tabele)
+        self.zaporedna = zaporedna
+        self.zadnji = zadnji
+
+
+def _bralec():
+    import model
+    return model.bazen.bralec()
+
+
+def zadnja(conn=None):
+    """
+    Vrne zaporedno številko zadnje spremembe (0, če je dnevnik prazen).
+    """
+    conn = conn or _bralec()
+    return conn.execute("SELECT ifnull(max(zaporedna), 0) FROM spremembe").fetchone()[0]
+
+
+def preberi(od, koliko=None, conn=None):
+    """
+    Vrne seznam sprememb z zaporedno številko, večjo od od, urejen po številki.
+    Argumenti:
+    - od: zaporedna številka zadnje že prebrane spremembe
+    - koliko: največje število vrnjenih sprememb (None pomeni vse)
+    """
+    conn = conn or _bralec()
+    sql = """
+        SELECT zaporedna, tabela, kljuc, drugi_kljuc, operacija
+        FROM spremembe
+        WHERE zaporedna > ?
+        ORDER BY zaporedna
+        LIMIT ?
+    """
+    return [Sprememba(*vrstica) for vrstica in conn.execute(sql, [od, -1 if koliko is None else koliko])]
+
+
+def prva(conn=None):
+    """
+    Vrne zaporedno številko prve spremembe v dnevniku (None, če je prazen).
+    """
+    conn = conn or _bralec()
+    return conn.execute("SELECT min(zaporedna) FROM spremembe").fetchone()[0]
+
+
+def obrezi(do, conn):
+    """
+    Iz dnevnika izbriše spremembe do vključno dane zaporedne številke.
+    Kliče se s povezavo za pisanje, ko te spremembe prebrali vsi odjemalci.
+    """
+    conn.execute("DELETE FROM spremembe WHERE zaporedna <= ?", [do])
+
+
+_odjemalci = []
+_kljucavnica = threading.Lock()
+_obrezano = None  # do katere številke je dnevnik že obrezan
+
+
+def prijavi(obdelava, tabele=None, od=None, zadnji=False, ponastavi=None):
+    """
+    Prijavi novega odjemalca in ga vrne.
+    Odjemalce obveščamo v vrstnem redu prijave.
+    Argumenti:
+    - obdelava: funkcija, ki dobi neprazen seznam novih sprememb
+    - tabele: imena tabel, katerih spremembe odjemalca zanimajo (None pomeni vse)
+    - od: številka zadnje spremembe, ki jo odjemalec že pozna; privzeto zadnja
+      v dnevniku. Predpomnilnik, ki se gradi iz baze, naj jo prebere pred gradnjo.
+    - zadnji: odjemalca obvestimo šele, ko so spremembe obdelali vsi drugi;
+      tako se prijavijo tisti, ki opisujejo stanje drugih predpomnilnikov
+    - ponastavi: funkcija brez argumentov, ki odjemalca zgradi na novo iz baze;
+      pokličemo jo, ko drug proces obreže spremembe, ki jih odjemalec še ni prebral
+    """
+    odjemalec = Odjemalec(obdelava, tabele, zadnja() if od is None else od, zadnji, ponastavi)
+    with _kljucavnica:
+        if zadnji:
+            _odjemalci.append(odjemalec)
+        else:
+            mesto = next((i for i, drugi in enumerate(_odjemalci) if drugi.zadnji), len(_odjemalci))
+            _odjemalci.insert(mesto, odjemalec)
+    return odjemalec
+
+
+def odjavi(odjemalec):
+    """
+    Odjavi odjemalca.
+    """
+    with _kljucavnica:
+        if odjemalec in _odjemalci:
+            _odjemalci.remove(odjemalec)
+
+
+def obdelaj(cakaj=True):
+    """
+    Prebere nove spremembe in jih razdeli prijavljenim odjemalcem.
+    Odjemalec, za katerega so bile nekatere spremembe že obrezane, namesto
+    njih dobi klic ponastavi (ali le opozorilo, če te funkcije nima).
+    Če obdelava odjemalca sproži izjemo, jo izpišemo na stderr in
+    nadaljujemo z drugimi odjemalci; ta odjemalec dobi iste spremembe
+    ob naslednjem klicu. Funkcija sama izjeme ne sproži, saj jo kličemo
+    po že potrjenem pisanju in pred vsako zahtevo.
+    Vrne število prebranih sprememb.
+    Argumenti:
+    - cakaj: če je False in spremembe že obdeluje druga nit, takoj vrne 0;
+      sicer po obdelavi po potrebi še obreže dnevnik
+    """
+    if not _odjemalci:
+        return 0
+    if not _kljucavnica.acquire(blocking=cakaj):
+        return 0
+    try:
+        if not _odjemalci:
+            return 0
+        najmanjsa = min(odjemalec.zaporedna for odjemalec in _odjemalci)
+        nove = preberi(najmanjsa)
+        # vrzel pred prvo novo spremembo pomeni, da je dnevnik obrezal drug proces
+        ohranjena = prva() if nove and nove[0].zaporedna > najmanjsa + 1 else None
+        for odjemalec in list(_odjemalci):
+            zanj = [sprememba for sprememba in nove if sprememba.zaporedna > odjemalec.zaporedna
+                    and (odjemalec.tabele is None or sprememba.tabela in odjemalec.tabele)]
+            try:
+                if ohranjena is not None and odjemalec.zaporedna + 1 < ohranjena:
+                    _ponastavi(odjemalec)
+                elif zanj:
+                    odjemalec.obdelava(zanj)
+            except Exception:
+                traceback.print_exc()
+                continue
+            if nove:
+                odjemalec.zaporedna = max(odjemalec.zaporedna, nove[-1].zaporedna)
+        prebrano = min(odjemalec.zaporedna for odjemalec in _odjemalci)
+    except Exception:
+        traceback.print_exc()
+        return 0
+    finally:
+        _kljucavnica.release()
+    if cakaj:
+        _obrezi_dnevnik(prebrano)
+    return len(nove)
+
+
+def _ponastavi(odjemalec):
+    """
+    Odjemalca, ki je ostal brez obrezanih sprememb, zgradi na novo.
+    """
+    if odjemalec.ponastavi is None:
+        print('Spremembe za odjemalca {!r} so bile obrezane, a se ne zna ponastaviti.'.format(
+            odjemalec.obdelava), file=sys.stderr)
+    else:
+        odjemalec.ponastavi()
+
+
+def _obrezi_dnevnik(prebrano):
+    """
+    Obreže dnevnik do spremembe, ki so jo prebrali vsi odjemalci procesa,
+    a obdrži zadnjih OHRANI sprememb. Ker obrezujemo s povezavo za pisanje,
+    to naredimo le vsakih OBREZI sprememb.
+    """
+    global _obrezano
+    try:
+        if _obrezano is None:
+            _obrezano = (prva() or 1) - 1
+        do = min(prebrano, zadnja() - OHRANI)
+        if do - _obrezano < OBREZI:
+            return
+        import model
+        with model.bazen.pisi() as conn:
+            obrezi(do, conn)
+        _obrezano = do
+    except Exception:
+        traceback.print_exc()
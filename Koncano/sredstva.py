@@ -0,0 +1,130 @@
+"""
+Statična sredstva (slogi, skripte, slike) iz mape staticno.
+Vsako sredstvo strežemo pod imenom z odtisom vsebine, npr.
+/staticno/osnova.3f2a9c1b7e.css, zato ga lahko brskalnik hrani za vedno:
+ko se vsebina spremeni, se spremeni tudi ime in strani kažejo na novo.
+Ob prvi uporabi za vsako sredstvo pripravimo še inačico, stisnjeno
+z gzip (ime.gz), ki jo pošljemo odjemalcem, ki gzip sprejmejo. Datoteke
+pošlje bottle.static_file, ki jih strežniku preda kot datoteke (prek
+wsgi.file_wrapper, če ga strežnik ima).
+
+Predloge dobijo naslov sredstva s funkcijo sredstvo, npr.
+    <link rel="stylesheet" href="{{sredstvo('osnova.css')}}">
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+
+import bottle
+import stiskanje
+
+MAPA = 'staticno'
+PREDPONA = '/staticno/'
+ODTIS = 10  # število šestnajstiških znakov odtisa v imenu
+# sredstva z odtisom se ne spremenijo, zato jih brskalnik hrani leto dni
+HRANJENJE = 'public, max-age=31536000, immutable'
+# teh vrst datotek nima smisla stiskati
+STISNJENE = ('.gz', '.png', '.jpg', '.jpeg', '.gif', '.webp', '.woff', '.woff2', '.ico')
+
+
+class Sredstva:
+    """
+    Odtisi sredstev v mapi in njihove stisnjene inačice.
+    """
+
+    def __init__(self, mapa=MAPA):
+        """
+        Konstruktor sredstev. Prebere vse datoteke v mapi, izračuna odtise
+        in po potrebi na novo stisne inačice gzip.
+        Argumenti:
+        - mapa: mapa s sredstvi
+        """
+        self.mapa = mapa
+        self.naslovi = {}  # ime sredstva -> ime z odtisom
+        self.imena = {}  # ime z odtisom -> (ime sredstva, odtis, ime stisnjene inačice ali None)
+        for koren, _, datoteke in os.walk(mapa):
+            for datoteka in sorted(datoteke):
+                pot = os.path.join(koren, datoteka)
+                ime = os.path.relpath(pot, mapa).replace(os.sep, '/')
+                if ime.endswith('.gz'):
+                    continue
+                with open(pot, 'rb') as vsebina:
+                    vsebina = vsebina.read()
+                odtis = hashlib.sha256(vsebina).hexdigest()[:ODTIS]
+                osnova, koncnica = os.path.splitext(ime)
+                z_odtisom = '{}.{}{}'.format(osnova, odtis, koncnica)
+                self.naslovi[ime] = z_odtisom
+                self.imena[z_odtisom] = (ime, odtis, self._stisni(pot, vsebina))
+
+    @staticmethod
+    def _stisni(pot, vsebina):
+        """
+        Poskrbi, da ima sredstvo svežo inačico, stisnjeno z gzip,
+        in vrne njeno ime (glede na mapo) ali None, če se stiskanje ne splača.
+        """
+        if pot.lower().endswith(STISNJENE):
+            return None
+        stisnjena = pot + '.gz'
+        if not os.path.exists(stisnjena) or os.path.getmtime(stisnjena) < os.path.getmtime(pot):
+            vsebina_gz = gzip.compress(vsebina, 9, mtime=0)
+            if len(vsebina_gz) >= len(vsebina):
+                return None
+            with open(stisnjena + '.tmp', 'wb') as datoteka:
+                datoteka.write(vsebina_gz)
+            os.replace(stisnjena + '.tmp', stisnjena)
+        elif os.path.getsize(stisnjena) >= len(vsebina):
+            return None
+        return stisnjena
+
+    def naslov(self, ime):
+        """
+        Vrne naslov sredstva z danim imenom (npr. 'osnova.css').
+        """
+        return PREDPONA + self.naslovi[ime]
+
+    def odgovor(self, z_odtisom):
+        """
+        Vrne odgovor bottle z vsebino sredstva z danim imenom z odtisom.
+        Odjemalcem, ki sprejmejo gzip, pošlje stisnjeno inačico.
+        """
+        if z_odtisom not in self.imena:
+            return bottle.HTTPError(404, 'Sredstva ni.')
+        ime, odtis, stisnjena = self.imena[z_odtisom]
+        vrsta, _ = mimetypes.guess_type(ime)
+        glave = {'Cache-Control': HRANJENJE}
+        datoteka, etag = ime, '"{}"'.format(odtis)
+        if stisnjena is not None:
+            glave['Vary'] = 'Accept-Encoding'
+            if stiskanje.izberi_kodiranje(bottle.request.get_header('Accept-Encoding')) == 'gzip':
+                datoteka, etag = os.path.relpath(stisnjena, self.mapa), '"{}-gzip"'.format(odtis)
+                glave['Content-Encoding'] = 'gzip'
+        return bottle.static_file(datoteka, root=self.mapa, mimetype=vrsta or 'application/octet-stream',
+                                  etag=etag, headers=glave)
+
+
+_sredstva = None
+_nalaganje = threading.Lock()
+
+
+def sredstva():
+    """
+    Vrne sredstva. Ob prvem klicu jih prebere iz mape, pri razhroščevanju
+    pa ob vsakem klicu, da se spremembe takoj poznajo.
+    """
+    global _sredstva
+    with _nalaganje:
+        if _sredstva is None or bottle.DEBUG:
+            _sredstva = Sredstva()
+    return _sredstva
+
+
+def naslov(ime):
+    """
+    Vrne naslov sredstva z danim imenom. To funkcijo dobijo predloge kot sredstvo.
+    """
+    return sredstva().naslov(ime)
+
+
+bottle.BaseTemplate.defaults['sredstvo'] = naslov
@@ -0,0 +1,178 @@
+"""
+Stiskanje odgovorov (vmesni sloj WSGI).
+Odgovore z besedilno vsebino stisne z gzip ali deflate, kakor se dogovori
+z odjemalcem prek glave Accept-Encoding. Odgovore z znano dolžino, krajše
+od praga, pusti pri miru. Odgovore brez dolžine (generatorje) stiska
+sproti, po kosih, tako da odjemalec vsak kos dobi takoj.
+
+Primer:
+    app = stiskanje.Stiskanje(bottle.default_app(), prag=1024)
+"""
+import zlib
+
+PRAG = 1024  # krajših odgovorov ne stiskamo
+RAVEN = 6  # raven stiskanja zlib
+
+# kodiranja, od najljubšega naprej, in parametri wbits za zlib
+KODIRANJA = {
+    'gzip': 16 + zlib.MAX_WBITS,
+    'deflate': zlib.MAX_WBITS,
+}
+
+# vrste vsebine, ki jih stiskamo
+VRSTE = ('text/', 'application/json', 'application/javascript', 'image/svg+xml')
+
+
+def izberi_kodiranje(glava):
+    """
+    Iz glave Accept-Encoding izbere najljubše podprto kodiranje ali vrne None.
+    """
+    ponudbe = {}
+    for ponudba in (glava or '').split(','):
+        ime, *parametri = ponudba.split(';')
+        q = 1.0
+        for parameter in parametri:
+            kljuc, _, vrednost = parameter.partition('=')
+            if kljuc.strip().lower() == 'q':
+                try:
+                    q = float(vrednost)
+                except ValueError:
+                    q = 0.0
+        ponudbe[ime.strip().lower()] = q
+    izbrano, najvec = None, 0.0
+    for ime in KODIRANJA:
+        q = ponudbe.get(ime, ponudbe.get('*', 0.0))
+        if q > najvec:
+            izbrano, najvec = ime, q
+    return izbrano
+
+
+class Stiskanje:
+    """
+    Vmesni sloj WSGI, ki stiska odgovore.
+    Aplikacija mora start_response poklicati, preden vrne telo odgovora
+    (kot bottle).
+    """
+
+    def __init__(self, app, prag=PRAG, raven=RAVEN):
+        """
+        Konstruktor vmesnega sloja.
+        Argumenti:
+        - app: aplikacija WSGI
+        - prag: odgovorov z znano dolžino, krajših od tega, ne stiskamo
+        - raven: raven stiskanja zlib (1 do 9)
+        """
+        self.app = app
+        self.prag = prag
+        self.raven = raven
+        self.stisnjeni = 0  # število stisnjenih odgovorov
+        self.pred = 0  # bajti stisnjenih odgovorov pred stiskanjem
+        self.po = 0  # in po njem
+
+    def kodiranje(self, environ):
+        """
+        Vrne kodiranje, s katerim stisnemo odgovor na dano zahtevo, ali None.
+        """
+        if environ.get('REQUEST_METHOD') == 'HEAD':
+            return None
+        return izberi_kodiranje(environ.get('HTTP_ACCEPT_ENCODING'))
+
+    def stisni(self, vsebina, kodiranje):
+        """
+        Vrne vsebino, stisnjeno z danim kodiranjem.
+        """
+        stiskalnik = zlib.compressobj(self.raven, zlib.DEFLATED, KODIRANJA[kodiranje])
+        stisnjena = stiskalnik.compress(vsebina) + stiskalnik.flush()
+        self.stisnjeni += 1
+        self.pred += len(vsebina)
+        self.po += len(stisnjena)
+        return stisnjena
+
+    def _stiskaj(self, telo, kodiranje):
+        """
+        Sproti stiska kose telesa odgovora.
+        """
+        stiskalnik = zlib.compressobj(self.raven, zlib.DEFLATED, KODIRANJA[kodiranje])
+        self.stisnjeni += 1
+        try:
+            for kos in telo:
+                if kos:
+                    stisnjen = stiskalnik.compress(kos) + stiskalnik.flush(zlib.Z_SYNC_FLUSH)
+                    self.pred += len(kos)
+                    self.po += len(stisnjen)
+                    yield stisnjen
+            stisnjen = stiskalnik.flush()
+            self.po += len(stisnjen)
+            yield stisnjen
+        finally:
+            if hasattr(telo, 'close'):
+                telo.close()
+
+    def __call__(self, environ, start_response):
+        kodiranje = self.kodiranje(environ)
+        odgovor = {}
+
+        def zacni(status, glave, exc_info=None):
+            odgovor['status'], odgovor['glave'], odgovor['exc_info'] = status, glave, exc_info
+            return lambda podatki: None
+
+        telo = self.app(environ, zacni)
+        status, glave, exc_info = odgovor['status'], odgovor['glave'], odgovor['exc_info']
+        imena = {ime.lower(): vrednost for ime, vrednost in glave}
+        if not imena.get('content-type', '').startswith(VRSTE):
+            start_response(status, glave, exc_info)
+            return telo
+        glave = [(ime, vrednost) for ime, vrednost in glave if ime.lower() != 'vary']
+        vary = [v.strip() for v in imena.get('vary', '').split(',') if v.strip()]
+        glave.append(('Vary', ', '.join(vary + ['Accept-Encoding'])))
+        dolzina = imena.get('content-length')
+        if (kodiranje is None or not status.startswith('200') or 'content-encoding' in imena
+                or dolzina is not None and int(dolzina) < self.prag):
+            start_response(status, glave, exc_info)
+            return telo
+        glave = [(ime, vrednost) for ime, vrednost in glave if ime.lower() != 'content-length']
+        glave.append(('Content-Encoding', kodiranje))
+        # močna oznaka ETag velja le za nestisnjeno vsebino
+        glave = [(ime, 'W/' + vrednost if ime.lower() == 'etag' and vrednost.startswith('"') else vrednost)
+                 for ime, vrednost in glave]
+        if dolzina is None:
+            start_response(status, glave, exc_info)
+            return self._stiskaj(telo, kodiranje)
+        try:
+            stisnjena = self.stisni(b''.join(telo), kodiranje)
+        finally:
+            if hasattr(telo, 'close'):
+                telo.close()
+        glave.append(('Content-Length', str(len(stisnjena))))
+        start_response(status, glave, exc_info)
+        return [stisnjena]
+
+
+_stiskanje = None
+
+
+def vklopi(app, prag=PRAG, raven=RAVEN):
+    """
+    Ovije aplikacijo v vmesni sloj stiskanja in ga vrne.
+    """
+    global _stiskanje
+    _stiskanje = Stiskanje(app, prag, raven)
+    return _stiskanje
+
+
+def vmesni_sloj():
+    """
+    Vrne vklopljen vmesni sloj stiskanja ali None.
+    """
+    return _stiskanje
+
+
+def porocilo():
+    """
+    Vrne besedilno poročilo o stiskanju odgovorov.
+    """
+    if _stiskanje is None:
+        return 'Stiskanje odgovorov ni vklopljeno.\n'
+    s = _stiskanje
+    return 'Stiskanje odgovorov: {} odgovorov, {:.1f} MB pred in {:.1f} MB po stiskanju.\n'.format(
+        s.stisnjeni, s.pred / 2**20, s.po / 2**20)
@@ -0,0 +1,146 @@
+"""
+Strežniki za produkcijski zagon spletnega vmesnika.
+Oba temeljita na strežniku wsgiref iz standardne knjižnice, zato ne
+potrebujeta dodatnih paketov:
+- NitniStreznik zahteve streže v bazenu delovnih niti,
+- ProcesniStreznik v glavnem procesu odpre vtičnico in razcepi več
+  delovnih procesov, ki si jo delijo, vsak s svojim bazenom niti.
+Možnosti (podamo jih bottle.run): niti, procesi, zaostanek (dolžina
+vrste nesprejetih povezav, ki jo hrani jedro).
+"""
+import os
+import queue
+import signal
+import sys
+import threading
+import traceback
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+import bottle
+
+NITI = 8  # delovne niti v enem procesu
+PROCESI = 2  # delovni procesi
+ZAOSTANEK = 128  # največ nesprejetih povezav v vrsti jedra
+
+
+class _Obravnava(WSGIRequestHandler):
+    """
+    Obravnava zahteve brez poizvedb DNS, ki zahteve beleži le, če strežnik ni tih.
+    """
+    tiho = False
+
+    def address_string(self):
+        return self.client_address[0]
+
+    def log_request(self, *args, **kwargs):
+        if not self.tiho:
+            super().log_request(*args, **kwargs)
+
+
+class _BazenNiti(WSGIServer):
+    """
+    Strežnik wsgiref, ki sprejete povezave preda bazenu delovnih niti.
+    Vrsta med sprejemanjem in nitmi je omejena, zato strežnik ob
+    preobremenitvi neha sprejemati povezave in te čakajo v vrsti jedra.
+    """
+
+    def __init__(self, naslov, obravnava, zaostanek):
+        self.request_queue_size = zaostanek
+        super().__init__(naslov, obravnava)
+        self._vrsta = None
+
+    def zazeni_niti(self, niti):
+        """
+        Zažene delovne niti.
+        """
+        self._vrsta = queue.Queue(niti)
+        for _ in range(niti):
+            threading.Thread(target=self._delaj, daemon=True).start()
+
+    def process_request(self, request, client_address):
+        self._vrsta.put((request, client_address))
+
+    def _delaj(self):
+        while True:
+            request, client_address = self._vrsta.get()
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+
+class NitniStreznik(bottle.ServerAdapter):
+    """
+    Strežnik z bazenom delovnih niti.
+    """
+
+    def _streznik(self, app):
+        """
+        Vrne strežnik, ki že posluša na vtičnici, a še nima delovnih niti.
+        """
+        class Obravnava(_Obravnava):
+            tiho = self.quiet
+
+        streznik = _BazenNiti((self.host, self.port), Obravnava, self.options.get('zaostanek', ZAOSTANEK))
+        streznik.set_app(app)
+        self.port = streznik.server_port
+        return streznik
+
+    def run(self, app):
+        streznik = self._streznik(app)
+        streznik.zazeni_niti(self.options.get('niti', NITI))
+        try:
+            streznik.serve_forever()
+        finally:
+            streznik.server_close()
+
+
+class ProcesniStreznik(NitniStreznik):
+    """
+    Strežnik z več delovnimi procesi, ki si delijo vtičnico.
+    Glavni proces le nadzoruje delovne procese in nadomesti tiste, ki se končajo.
+    Kar se naloži pred zagonom (predloge, katalog ...), si procesi delijo.
+    Deluje le na sistemih z os.fork.
+    """
+
+    def run(self, app):
+        streznik = self._streznik(app)
+        procesi = set()
+        # ob SIGTERM glavni proces pred koncem ustavi še delovne procese
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        try:
+            while True:
+                while len(procesi) < self.options.get('procesi', PROCESI):
+                    pid = os.fork()
+                    if pid == 0:
+                        self._delaj(streznik)
+                    procesi.add(pid)
+                pid, _ = os.wait()
+                procesi.discard(pid)
+        finally:
+            for pid in procesi:
+                os.kill(pid, signal.SIGTERM)
+            streznik.server_close()
+
+    def _delaj(self, streznik):
+        """
+        Telo delovnega procesa; se nikoli ne vrne.
+        """
+        koda = 0
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        try:
+            import model
+            # povezav SQLite ne smemo deliti med procesi
+            model.bazen.ponastavi()
+            streznik.zazeni_niti(self.options.get('niti', NITI))
+            streznik.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        except BaseException:
+            traceback.print_exc()
+            koda = 1
+        finally:
+            sys.stderr.flush()
+            os._exit(koda)
@@ -0,0 +1,422 @@
+"""
+Množični uvoz podatkov iz datotek CSV.
+Administrator naloži datoteko v obliki datotek iz mape podatki (igre,
+podjetja, platforme, podpira ali distributira). Telo zahteve beremo po
+kosih in datoteko sproti pišemo na disk, zato je ne hranimo v pomnilniku.
+Uvoz nato teče v ozadju: vrstice preverimo in veljavne dodamo v bazo
+v paketih (ena transakcija na paket), zavrnjene pa skupaj z razlogom
+zapišemo v poročilo CSV. Stanje uvoza sproti zapisujemo v datoteko JSON,
+zato ga vidijo vsi procesi strežnika.
+
+Primer:
+    id = uvoz.sprejmi(bottle.request.environ)
+    uvoz.stanje(id)['dodane']
+"""
+import csv
+import datetime
+import email.parser
+import json
+import os
+import secrets
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+import baza
+import model
+import spremembe
+
+MAPA = 'uvozi'  # mapa z naloženimi datotekami, poročili in stanji uvozov
+NAJVEC = 256 * 2**20  # največja velikost telesa zahteve v bajtih
+KOS = 64 * 2**10  # telo beremo po toliko bajtov
+GLAVE = 16 * 2**10  # največja velikost glave dela telesa oziroma vrednosti polja
+PAKET = 500  # število vrstic v eni transakciji
+
+
+def _datum(vrednost):
+    try:
+        leto, mesec, dan = map(int, vrednost.split('-'))
+        datetime.date(leto, mesec, dan)
+    except ValueError:
+        raise ValueError('datum mora biti oblike leto-mesec-dan')
+    return vrednost
+
+
+def _nenegativno(vrednost):
+    try:
+        vrednost = float(vrednost)
+    except ValueError:
+        raise ValueError('{} ni število'.format(vrednost))
+    if vrednost < 0:
+        raise ValueError('{} je negativno'.format(vrednost))
+    return vrednost
+
+
+def _ocena(vrednost):
+    vrednost = _nenegativno(vrednost)
+    if vrednost > 100:
+        raise ValueError('ocena mora biti med 0 in 100')
+    return vrednost
+
+
+def _id(vrednost):
+    try:
+        return int(vrednost)
+    except ValueError:
+        raise ValueError('id {} ni celo število'.format(vrednost))
+
+
+# vrsta uvoza -> (tabela, seznam trojic (stolpec, pretvorba, obvezen));
+# pretvorba je funkcija ali ime tabele, v kateri mora vrednost obstajati
+VRSTE = {
+    'igre': (baza.Igra, [
+        ('id', _id, False),
+        ('ime_igre', str, True),
+        ('datum_izdaje', _datum, True),
+        ('cena', _nenegativno, False),
+        ('vsebuje', str, False),
+        ('razvija', 'podjetje', False),
+        ('povprecno_igranje', _nenegativno, False),
+        ('mediana', _nenegativno, False),
+        ('ocena', _ocena, False),
+    ]),
+    'podjetja': (baza.Podjetje, [
+        ('id', _id, False),
+        ('ime', str, True),
+        ('drzava', str, False),
+        ('datum_ustanovitve', str, False),
+        ('opis', str, False),
+    ]),
+    'platforme': (baza.Platforma, [
+        ('id', _id, False),
+        ('ime', str, True),
+        ('tip', str, True),
+        ('datum_izdaje', _datum, True),
+        ('opis', str, False),
+        ('podjetje', str, False),
+    ]),
+    'podpira': (baza.Podpira, [
+        ('ime_igre', 'igra', True),
+        ('platforma', 'platforma', True),
+    ]),
+    'distributira': (baza.Distributira, [
+        ('podjetje', 'podjetje', True),
+        ('ime_igre', 'igra', True),
+    ]),
+}
+
+
+class NapakaUvoza(Exception):
+    """
+    Napaka pri sprejemu datoteke.
+    Polje status je status odgovora HTTP.
+    """
+
+    def __init__(self, status, opis):
+        super().__init__(opis)
+        self.status = status
+        self.opis = opis
+
+
+class Reference:
+    """
+    Id-ji (in imena) podjetij, platform in iger, na katere se lahko
+    sklicujejo uvožene vrstice. Podjetje in platformo podamo z id-jem
+    ali imenom, igro pa z id-jem.
+    """
+
+    def __init__(self, conn):
+        self.imena = {
+            'podjetje': dict(conn.execute("SELECT ime, id FROM podjetje")),
+            'platforma': dict(conn.execute("SELECT ime, id FROM platforma")),
+            'igra': {},
+        }
+        self.ids = {tabela: set(imena.values()) for tabela, imena in self.imena.items()}
+        self.ids['igra'] = {id for id, in conn.execute("SELECT id FROM igra")}
+
+    def poisci(self, tabela, vrednost):
+        """
+        Vrne id zapisa v dani tabeli ali sproži ValueError.
+        """
+        if vrednost.isdigit() and int(vrednost) in self.ids[tabela]:
+            return int(vrednost)
+        if vrednost in self.imena[tabela]:
+            return self.imena[tabela][vrednost]
+        raise ValueError('{} {} ne obstaja'.format(tabela, vrednost))
+
+    def dodaj(self, tabela, id, ime=None):
+        """
+        Doda nov zapis, da se nanj lahko sklicujejo naslednje vrstice.
+        """
+        if tabela in self.ids:
+            self.ids[tabela].add(id)
+            if ime is not None:
+                self.imena[tabela][ime] = id
+
+
+def _pot(id, koncnica, mapa=MAPA):
+    return os.path.join(mapa, id + koncnica)
+
+
+def _zapisi_stanje(stanje, mapa=MAPA):
+    """
+    Zapiše stanje uvoza. Datoteko zamenja naenkrat,
+    da drugi procesi ne preberejo napol zapisane.
+    """
+    pot = _pot(stanje['id'], '.json', mapa)
+    with open(pot + '.tmp', 'w', encoding='utf-8') as datoteka:
+        json.dump(stanje, datoteka, ensure_ascii=False)
+    os.replace(pot + '.tmp', pot)
+
+
+def stanje(id, mapa=MAPA):
+    """
+    Vrne slovar s stanjem uvoza z danim id-jem ali None, če ga ni.
+    Ključi: id, vrsta, ime, velikost, prebrano (bajti), vrstice, dodane,
+    zavrnjene, stanje ('v vrsti', 'poteka', 'končano' ali 'napaka'),
+    napaka, zacetek, konec.
+    """
+    try:
+        with open(_pot(id, '.json', mapa), encoding='utf-8') as datoteka:
+            return json.load(datoteka)
+    except FileNotFoundError:
+        return None
+
+
+def uvozi(mapa=MAPA):
+    """
+    Vrne seznam stanj vseh uvozov, od najnovejšega naprej.
+    """
+    if not os.path.isdir(mapa):
+        return []
+    stanja = [stanje(ime[:-len('.json')], mapa) for ime in os.listdir(mapa) if ime.endswith('.json')]
+    return sorted((s for s in stanja if s is not None), key=lambda s: s['zacetek'], reverse=True)
+
+
+def zavrnjene(id, mapa=MAPA):
+    """
+    Vrne pot do poročila o zavrnjenih vrsticah uvoza z danim id-jem.
+    """
+    return _pot(id, '-zavrnjene.csv', mapa)
+
+
+def _kosi(vhod, dolzina):
+    """
+    Vrne generator kosov telesa zahteve dane dolžine.
+    """
+    while dolzina > 0:
+        kos = vhod.read(min(KOS, dolzina))
+        if not kos:
+            raise NapakaUvoza(400, 'Telo zahteve je krajše, kot pravi Content-Length.')
+        dolzina -= len(kos)
+        yield kos
+
+
+def _razcleni(kosi, meja, pot):
+    """
+    Razčleni telo multipart/form-data, ki ga dobimo po kosih.
+    Vsebino prvega dela z datoteko sproti zapisuje v datoteko pot,
+    vrednosti ostalih polj pa vrne v slovarju skupaj z imenom naložene
+    datoteke (None, če je ni bilo).
+    """
+    locilo = b'\r\n--' + meja
+    polja = {}
+    ime_datoteke = None
+
+    def naslednji():
+        kos = next(kosi, None)
+        if kos is None:
+            raise NapakaUvoza(400, 'Telo zahteve ni pravilno oblikovano.')
+        return kos
+
+    # pred prvo mejo ni preloma vrstice, zato ga dodamo
+    medpomnilnik = b'\r\n'
+    while locilo not in medpomnilnik:
+        medpomnilnik = medpomnilnik[-len(locilo):] + naslednji()
+    medpomnilnik = medpomnilnik.split(locilo, 1)[1]
+    while True:
+        while len(medpomnilnik) < 2:
+            medpomnilnik += naslednji()
+        if medpomnilnik.startswith(b'--'):
+            return polja, ime_datoteke
+        while b'\r\n\r\n' not in medpomnilnik:
+            if len(medpomnilnik) > GLAVE:
+                raise NapakaUvoza(400, 'Glava dela telesa je predolga.')
+            medpomnilnik += naslednji()
+        glava, medpomnilnik = medpomnilnik[2:].split(b'\r\n\r\n', 1)
+        glava = email.parser.BytesHeaderParser().parsebytes(glava)
+        ime = glava.get_param('name', header='content-disposition')
+        datoteka = None
+        if glava.get_filename() is not None and ime_datoteke is None:
+            ime_datoteke = glava.get_filename()
+            datoteka = open(pot, 'wb')
+        vrednost = bytearray()
+        try:
+            while True:
+                konec = medpomnilnik.find(locilo)
+                if konec >= 0:
+                    del_, medpomnilnik = medpomnilnik[:konec], medpomnilnik[konec + len(locilo):]
+                else:
+                    # konec medpomnilnika je lahko začetek meje
+                    varno = max(0, len(medpomnilnik) - len(locilo) + 1)
+                    del_, medpomnilnik = medpomnilnik[:varno], medpomnilnik[varno:]
+                if datoteka is not None:
+                    datoteka.write(del_)
+                elif len(vrednost) + len(del_) > GLAVE:
+                    raise NapakaUvoza(400, 'Vrednost polja {} je predolga.'.format(ime))
+                else:
+                    vrednost += del_
+                if konec >= 0:
+                    break
+                medpomnilnik += naslednji()
+        finally:
+            if datoteka is not None:
+                datoteka.close()
+        if datoteka is None and ime is not None:
+            polja[ime] = vrednost.decode('utf-8', 'replace')
+
+
+_izvajalec = ThreadPoolExecutor(max_workers=1, thread_name_prefix='uvoz')
+
+
+def sprejmi(environ, mapa=MAPA, najvec=NAJVEC):
+    """
+    Sprejme datoteko iz zahteve in uvoz postavi v vrsto. Vrne id uvoza.
+    Telo je lahko multipart/form-data s poljem vrsta in datoteko ali pa kar
+    vsebina CSV; vrsto uvoza lahko podamo tudi v poizvedbi (?vrsta=igre).
+    Ob neveljavni zahtevi sproži NapakaUvoza.
+    """
+    try:
+        dolzina = int(environ.get('CONTENT_LENGTH') or -1)
+    except ValueError:
+        dolzina = -1
+    if dolzina < 0:
+        raise NapakaUvoza(411, 'Zahteva mora imeti glavo Content-Length.')
+    if dolzina > najvec:
+        raise NapakaUvoza(413, 'Datoteka je večja od {} MB.'.format(najvec // 2**20))
+    os.makedirs(mapa, exist_ok=True)
+    id = secrets.token_hex(6)
+    pot = _pot(id, '.csv', mapa)
+    polja = {kljuc: vrednosti[0] for kljuc, vrednosti in parse_qs(environ.get('QUERY_STRING', '')).items()}
+    ime = None
+    glava = email.parser.HeaderParser().parsestr('Content-Type: ' + environ.get('CONTENT_TYPE', ''))
+    kosi = _kosi(environ['wsgi.input'], dolzina)
+    try:
+        if glava.get_content_type() == 'multipart/form-data':
+            meja = glava.get_param('boundary')
+            if not meja:
+                raise NapakaUvoza(400, 'Manjka meja delov telesa.')
+            dodatna, ime = _razcleni(kosi, meja.encode('latin-1'), pot)
+            polja.update(dodatna)
+            if ime is None:
+                raise NapakaUvoza(400, 'Zahteva ne vsebuje datoteke.')
+        else:
+            with open(pot, 'wb') as datoteka:
+                for kos in kosi:
+                    datoteka.write(kos)
+        if polja.get('vrsta') not in VRSTE:
+            raise NapakaUvoza(400, 'Vrsta uvoza mora biti ena od: {}.'.format(', '.join(VRSTE)))
+    except BaseException:
+        if os.path.exists(pot):
+            os.remove(pot)
+        raise
+    _zapisi_stanje({
+        'id': id, 'vrsta': polja['vrsta'], 'ime': ime, 'velikost': os.path.getsize(pot),
+        'prebrano': 0, 'vrstice': 0, 'dodane': 0, 'zavrnjene': 0,
+        'stanje': 'v vrsti', 'napaka': None, 'zacetek': time.time(), 'konec': None,
+    }, mapa)
+    _izvajalec.submit(uvozi_datoteko, id, mapa)
+    return id
+
+
+def _pretvori(vrstica, stolpci, reference):
+    """
+    Vrne slovar pretvorjenih vrednosti vrstice ali sproži ValueError.
+    """
+    podatki = {}
+    for vrednost, (stolpec, pretvorba, obvezen) in zip(vrstica, stolpci):
+        vrednost = vrednost.strip()
+        if vrednost == '':
+            if obvezen:
+                raise ValueError('manjka {}'.format(stolpec))
+            podatki[stolpec] = None
+        elif isinstance(pretvorba, str):
+            podatki[stolpec] = reference.poisci(pretvorba, vrednost)
+        else:
+            podatki[stolpec] = pretvorba(vrednost)
+    return podatki
+
+
+def uvozi_datoteko(id, mapa=MAPA):
+    """
+    Uvozi naloženo datoteko in sproti posodablja stanje uvoza.
+    Po koncu datoteko zbriše, poročilo o zavrnjenih vrsticah pa ostane.
+    """
+    stanje_uvoza = stanje(id, mapa)
+    tabela, vsi_stolpci = VRSTE[stanje_uvoza['vrsta']]
+    stanje_uvoza['stanje'] = 'poteka'
+    _zapisi_stanje(stanje_uvoza, mapa)
+    pot = _pot(id, '.csv', mapa)
+    try:
+        with open(pot, encoding='utf-8-sig', newline='') as datoteka, \
+                open(zavrnjene(id, mapa), 'w', encoding='utf-8', newline='') as porocilo:
+            bralec = csv.reader(datoteka)
+            glava = [stolpec.strip().lower() for stolpec in next(bralec, [])]
+            po_imenih = {stolpec[0]: stolpec for stolpec in vsi_stolpci}
+            neznani = [stolpec for stolpec in glava if stolpec not in po_imenih]
+            manjkajoci = [stolpec for stolpec, _, obvezen in vsi_stolpci if obvezen and stolpec not in glava]
+            if neznani or manjkajoci or len(set(glava)) < len(glava):
+                raise ValueError('Glava mora imeti stolpce {} (neznani: {}, manjkajoči: {}).'.format(
+                    ', '.join(po_imenih), ', '.join(neznani) or '/', ', '.join(manjkajoci) or '/'))
+            stolpci = [po_imenih[stolpec] for stolpec in glava]
+            zavrni = csv.writer(porocilo)
+            zavrni.writerow(['vrstica', 'razlog'] + glava)
+            reference = Reference(model.bazen.bralec())
+            sql = tabela(None).dodajanje(glava)
+            paket = []
+            for vrstica in bralec:
+                stanje_uvoza['vrstice'] += 1
+                try:
+                    if len(vrstica) != len(glava):
+                        raise ValueError('vrstica ima {} stolpcev namesto {}'.format(len(vrstica), len(glava)))
+                    paket.append((bralec.line_num, vrstica, _pretvori(vrstica, stolpci, reference)))
+                except ValueError as napaka:
+                    zavrni.writerow([bralec.line_num, str(napaka)] + vrstica)
+                    stanje_uvoza['zavrnjene'] += 1
+                if len(paket) >= PAKET:
+                    _vstavi(tabela, sql, paket, reference, zavrni, stanje_uvoza)
+                    paket = []
+                    stanje_uvoza['prebrano'] = datoteka.buffer.tell()
+                    _zapisi_stanje(stanje_uvoza, mapa)
+            _vstavi(tabela, sql, paket, reference, zavrni, stanje_uvoza)
+        stanje_uvoza['prebrano'] = stanje_uvoza['velikost']
+        stanje_uvoza['stanje'] = 'končano'
+    except Exception as napaka:
+        stanje_uvoza['stanje'] = 'napaka'
+        stanje_uvoza['napaka'] = str(napaka)
+    finally:
+        stanje_uvoza['konec'] = time.time()
+        _zapisi_stanje(stanje_uvoza, mapa)
+        os.remove(pot)
+    return stanje_uvoza
+
+
+def _vstavi(tabela, sql, paket, reference, zavrni, stanje_uvoza):
+    """
+    V eni transakciji doda vrstice paketa. Vrstice, ki kršijo omejitve
+    baze (npr. podvojeno ime ali id), zavrne, ostale pa doda.
+    """
+    if not paket:
+        return
+    with model.bazen.pisi() as conn:
+        for stevilka, vrstica, podatki in paket:
+            try:
+                id = conn.execute(sql, podatki).lastrowid
+            except sqlite3.IntegrityError as napaka:
+                zavrni.writerow([stevilka, str(napaka)] + vrstica)
+                stanje_uvoza['zavrnjene'] += 1
+                continue
+            reference.dodaj(tabela.ime, id, podatki.get('ime'))
+            stanje_uvoza['dodane'] += 1
+    spremembe.obdelaj()